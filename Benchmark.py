@@ -0,0 +1,275 @@
+from typing import Dict, List
+from FactoryGenerator import generateFactory, getFactorySeeds
+from Performance import Performance
+from Profiling import ProfiledSimulation
+from RandomNumberGeneration import RandomNumberGeneration
+from SchedulerType import SchedulerType
+from Simulation import Simulation, MAX_BUFFER_SIZE, SIMULATION_TIME, WARMUP_TIME
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+
+HORIZONS = [SIMULATION_TIME, 10 * SIMULATION_TIME, 50 * SIMULATION_TIME]
+BUFFER_SIZES = [1, 2, 4, 8]
+POLICIES = {"roundRobin": True, "priority": False}
+PERFORMANCE_REPLICATIONS = 10
+# the numbers of inspectors of the generated factories the scaling benchmark runs
+SCALING_SIZES = [2, 10, 50, 100, 200, 400]
+# Simulation options that turn off one of the engine's default speedups or swap the future event list backend, to
+# measure what each one is worth
+ENGINE_OPTIONS = {
+    "default": {},
+    "unbuffered": {"blockSize": 0},
+    "noRecycling": {"recycleEvents": False},
+    "calendarQueue": {"schedulerType": SchedulerType.CALENDAR},
+}
+
+
+def benchmarkSimulation(isRoundRobin: bool, horizon: float, maxBufferSize: int, repeats: int,
+                        topology: dict = None, engineOptions: dict = None,
+                        warmup: float = WARMUP_TIME) -> Dict[str, float]:
+    """
+    Measures one configuration of Simulation.run(). The replication is timed repeats times with the streams of the
+    first replication, and then run once more under tracemalloc to measure its memory, so the timings are not slowed
+    down by the tracing
+    Args:
+        isRoundRobin: The policy of the inspectors
+        horizon: The time the simulation ends at
+        maxBufferSize: The capacity of every buffer
+        repeats: The number of timed runs
+        topology: A factory made by generateFactory to run instead of the project's factory
+        engineOptions: Keyword arguments of the Simulation, from ENGINE_OPTIONS
+        warmup: The warm-up period of the simulation
+    Returns:
+        Dict[str, float]: The events, the best and median wall time, the events per second of the best run, the peak
+        traced memory in bytes, the net number of allocated blocks left after the run and the number of garbage
+        collections of each generation during the run
+    """
+    seeds = RandomNumberGeneration.getReplicationSeeds(0) if topology is None else getFactorySeeds(topology)
+
+    def createSimulation(simulationType=Simulation):
+        return simulationType(seeds, isRoundRobin, time=horizon, warmup=warmup, maxBufferSize=maxBufferSize,
+                              topology=topology, **(engineOptions or {}))
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        profiled = createSimulation(ProfiledSimulation)
+        profiled.run()
+        numEvents = profiled.profile.getNumEvents()
+
+        wallTimes = []
+        for _ in range(repeats):
+            sim = createSimulation()
+            gc.collect()
+            start = time.perf_counter()
+            sim.run()
+            wallTimes.append(time.perf_counter() - start)
+
+        sim = createSimulation()
+        gc.collect()
+        collectionsBefore = [generation["collections"] for generation in gc.get_stats()]
+        blocksBefore = sys.getallocatedblocks()
+        tracemalloc.start()
+        sim.run()
+        _, peakMemory = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        blocksAfter = sys.getallocatedblocks()
+        collections = [generation["collections"] - before
+                       for generation, before in zip(gc.get_stats(), collectionsBefore)]
+
+    best = min(wallTimes)
+    return {
+        "events": numEvents,
+        "wallTime": best,
+        "medianWallTime": statistics.median(wallTimes),
+        "eventsPerSecond": numEvents / best,
+        "peakMemory": peakMemory,
+        "allocatedBlocks": blocksAfter - blocksBefore,
+        "gcCollections": collections,
+    }
+
+
+def benchmarkPerformance(numReplications: int, repeats: int) -> Dict[str, float]:
+    """
+    Measures Performance.run() end to end, including writing the csv file, with the replications run one after
+    another in this process. It runs in a temporary directory so the production run csv files are left alone
+    Args:
+        numReplications: The number of replications
+        repeats: The number of timed runs
+    Returns:
+        Dict[str, float]: The best and median wall time and the wall time per replication of the best run
+    """
+    wallTimes = []
+    currentDirectory = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory, contextlib.redirect_stdout(io.StringIO()):
+        os.chdir(directory)
+        try:
+            for _ in range(repeats):
+                per = Performance(numReplications)
+                gc.collect()
+                start = time.perf_counter()
+                per.run()
+                wallTimes.append(time.perf_counter() - start)
+        finally:
+            os.chdir(currentDirectory)
+    best = min(wallTimes)
+    return {
+        "wallTime": best,
+        "medianWallTime": statistics.median(wallTimes),
+        "wallTimePerReplication": best / numReplications,
+    }
+
+
+def benchmarkScaling(sizes: List[int], repeats: int, seed: int = 0) -> Dict[str, Dict[str, float]]:
+    """
+    Measures Simulation.run() on generated factories of growing size, to show how the cost of an event grows with the
+    number of entities, with the heap and with the calendar queue future event list. The warm-up and the run length
+    shrink by the same factor as the factory grows, so every size handles a similar number of events and keeps the
+    same share of them in the warm-up
+    Args:
+        sizes: The numbers of inspectors of the factories
+        repeats: The number of timed runs of each factory
+        seed: The seed of the generated factories
+    Returns:
+        Dict[str, Dict[str, float]]: The measurements of each factory, with its number of entities, the cost of an
+        event relative to the smallest factory and the events per second of the calendar queue relative to the heap
+    """
+    results = {}
+    smallestCost = None
+    for size in sizes:
+        topology = generateFactory(size, seed)
+        scale = sizes[0] / size
+        horizon, warmup = SIMULATION_TIME * scale, WARMUP_TIME * scale
+        name = f"scaling/inspectors={size}"
+        results[name] = benchmarkSimulation(True, horizon, MAX_BUFFER_SIZE, repeats, topology, warmup=warmup)
+        results[name]["buffers"] = len(topology["buffers"])
+        results[name]["workstations"] = len(topology["workstations"])
+        cost = 1 / results[name]["eventsPerSecond"]
+        smallestCost = cost if smallestCost is None else smallestCost
+        results[name]["relativeEventCost"] = cost / smallestCost
+        calendar = benchmarkSimulation(True, horizon, MAX_BUFFER_SIZE, repeats, topology,
+                                       ENGINE_OPTIONS["calendarQueue"], warmup)
+        results[name]["calendarQueueSpeedup"] = calendar["eventsPerSecond"] / results[name]["eventsPerSecond"]
+        print(f"{name} ({results[name]['buffers']} buffers, {results[name]['workstations']} workstations): "
+              f"{results[name]['eventsPerSecond']:.0f} events/s, {results[name]['relativeEventCost']:.2f}x the cost "
+              f"of an event of the smallest factory, calendar queue {results[name]['calendarQueueSpeedup']:.2f}x as "
+              f"fast as the heap")
+    return results
+
+
+def runBenchmarks(repeats: int = 3, quick: bool = False, scaling: bool = False) -> Dict[str, Dict[str, float]]:
+    """
+    Runs the benchmark suite: Simulation.run() for both policies against the horizon and against the buffer capacity,
+    and Performance end to end
+    Args:
+        repeats: The number of timed runs of each benchmark
+        quick: If True, only the shortest horizon and smallest design are run, for a quick check
+        scaling: If True, the generated factories of SCALING_SIZES are run as well
+    Returns:
+        Dict[str, Dict[str, float]]: The measurements of each benchmark, keyed by its name
+    """
+    horizons = HORIZONS[:2] if quick else HORIZONS
+    bufferSizes = BUFFER_SIZES[:2] if quick else BUFFER_SIZES
+    results = {}
+    for policyName, isRoundRobin in POLICIES.items():
+        for horizon in horizons:
+            name = f"simulation/{policyName}/time={horizon}"
+            results[name] = benchmarkSimulation(isRoundRobin, horizon, MAX_BUFFER_SIZE, repeats)
+            print(f"{name}: {results[name]['eventsPerSecond']:.0f} events/s")
+        for bufferSize in bufferSizes:
+            name = f"simulation/{policyName}/maxBufferSize={bufferSize}"
+            results[name] = benchmarkSimulation(isRoundRobin, 10 * SIMULATION_TIME, bufferSize, repeats)
+            print(f"{name}: {results[name]['eventsPerSecond']:.0f} events/s")
+    for engineName, engineOptions in ENGINE_OPTIONS.items():
+        name = f"simulation/engine={engineName}"
+        results[name] = benchmarkSimulation(True, 10 * SIMULATION_TIME, MAX_BUFFER_SIZE, repeats,
+                                            engineOptions=engineOptions)
+        print(f"{name}: {results[name]['eventsPerSecond']:.0f} events/s")
+    numReplications = 2 if quick else PERFORMANCE_REPLICATIONS
+    name = f"performance/replications={numReplications}"
+    results[name] = benchmarkPerformance(numReplications, repeats)
+    print(f"{name}: {results[name]['wallTimePerReplication']:.3f} s per replication")
+    if scaling:
+        results.update(benchmarkScaling(SCALING_SIZES[:4] if quick else SCALING_SIZES, repeats))
+    return results
+
+
+def getEnvironment() -> Dict[str, str]:
+    """
+    Describes the machine and versions the benchmarks ran on, since results are only comparable on the same setup
+    Returns:
+        Dict[str, str]: The environment
+    """
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "system": platform.system(),
+        "cpus": str(os.cpu_count()),
+    }
+
+
+def compareWithBaseline(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+                        tolerance: float) -> List[str]:
+    """
+    Compares the wall times of every benchmark in both the results and the baseline
+    Args:
+        results: The measurements of this run
+        baseline: The stored measurements to compare with
+        tolerance: The largest acceptable slowdown, e.g. 0.1 for 10% slower
+    Returns:
+        List[str]: The benchmarks that got slower than the tolerance allows
+    """
+    regressions = []
+    for name, measurements in results.items():
+        if name not in baseline:
+            continue
+        ratio = measurements["wallTime"] / baseline[name]["wallTime"]
+        status = "REGRESSION" if ratio > 1 + tolerance else "ok"
+        print(f"{name}: {ratio:.3f}x the baseline wall time {status}")
+        if ratio > 1 + tolerance:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the simulation engine")
+    parser.add_argument("--repeats", type=int, default=3, help="timed runs of each benchmark, the best one is kept")
+    parser.add_argument("--quick", action="store_true", help="only run a small part of the suite")
+    parser.add_argument("--scaling", action="store_true",
+                        help="also measure the events per second of generated factories with up to "
+                             f"{SCALING_SIZES[-1]} inspectors")
+    parser.add_argument("--output", default="benchmark_results.json", help="json file to write the results to")
+    parser.add_argument("--baseline", default=None,
+                        help="json file of earlier results to compare with, exits with status 1 on a regression")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="largest acceptable slowdown relative to the baseline")
+    args = parser.parse_args()
+    results = runBenchmarks(args.repeats, args.quick, args.scaling)
+    with open(args.output, 'w', encoding='UTF8') as f:
+        json.dump({"environment": getEnvironment(), "results": results}, f, indent=2)
+    print(f"Results written to {args.output}")
+    if args.baseline is not None:
+        with open(args.baseline, encoding='UTF8') as f:
+            baseline = json.load(f)
+        if baseline["environment"] != getEnvironment():
+            print("The baseline was measured on a different environment, the comparison may not be meaningful")
+        regressions = compareWithBaseline(results, baseline["results"], args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} benchmarks regressed: {regressions}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 from Component import Component
 from ComponentType import ComponentType
+from TimeWeightedStatistic import TimeWeightedStatistic
 
 
 class Buffer:
@@ -9,8 +10,11 @@ class Buffer:
         self.maxSize = maxSize
         self.size = 0
         self.componentType = componentType
-        self.componentList = []
-        self.cumulativeOcc = 0
+        # fixed capacity ring, the oldest component is at index head
+        self.componentList = [None] * maxSize
+        self.head = 0
+        self.occupancy = TimeWeightedStatistic()
+        self.workInProcess = None
         self.isSteadyState = False
     
     def getSize(self) -> int:
@@ -21,28 +25,42 @@ class Buffer:
         """
         return self.size
     
-    def addComponent(self, component:Component) -> bool:
+    def addComponent(self, component:Component, currentTime:float) -> bool:
         """
         Adds a component to this buffer
+        Args:
+            component: The component to add
+            currentTime: The time the component is added at
         Returns: True if there is space to add the component, otherwise false
 
         """
         # print(f"Adding to buffer {self.id}")
         if self.size < self.maxSize:
+            self.componentList[(self.head + self.size) % self.maxSize] = component
             self.size += 1
-            self.componentList.append(component)
+            self.occupancy.update(currentTime, self.size)
+            if self.workInProcess is not None:
+                self.workInProcess.add(currentTime, 1)
             return True
         return False
 
-    def removeComponent(self) -> Component:
+    def removeComponent(self, currentTime:float) -> Component:
         """
         Removes a component from this buffer
+        Args:
+            currentTime: The time the component is removed at
         Returns: The next component in the buffer, None if buffer is empty
 
         """
         if self.size > 0:
+            component = self.componentList[self.head]
+            self.componentList[self.head] = None
+            self.head = (self.head + 1) % self.maxSize
             self.size -= 1
-            return self.componentList.pop(0)
+            self.occupancy.update(currentTime, self.size)
+            if self.workInProcess is not None:
+                self.workInProcess.add(currentTime, -1)
+            return component
         return None
     
     def isFull(self) -> bool:
@@ -76,26 +94,34 @@ class Buffer:
 
     def getCummulativeOcc(self) -> float:
         """
-        Gets the cumulative buffer occupancy value
+        Gets the cumulative buffer occupancy value since steady state started, up to the last update
         Returns: cumulative occupancy
         """
-        return self.cumulativeOcc
+        return self.occupancy.getArea()
+
+    def updateStatistics(self, currentTime:float):
+        """
+        Brings the buffer occupancy statistic up to the current time
+        Args:
+            currentTime: The current simulation time
+        """
+        self.occupancy.update(currentTime, self.size)
 
-    def accumulateOcc(self, timeElapsed:float):
+    def setWorkInProcess(self, workInProcess:TimeWeightedStatistic):
         """
-        Accumulates the buffer occupancy value
+        Set the statistic counting the components in the whole system, which this buffer updates when its size changes
         Args:
-            timeElapsed: The amount of time elapsed since the last accumulation
+            workInProcess: The shared work in process statistic
         """
-        # print(f"Buffer {self.id} size is: {self.size}")
-        if self.isSteadyState:
-            self.cumulativeOcc = self.cumulativeOcc + (self.getSize() * timeElapsed)
-        # print(f"Buffer {self.id} cumulative occupancy is: {self.cumulativeOcc}")
+        self.workInProcess = workInProcess
 
-    def setSteadyState(self, steadyState:bool):
+    def setSteadyState(self, steadyState:bool, currentTime:float):
         """
-        Set if we are in steady state or not
+        Set if we are in steady state or not. Entering steady state discards the occupancy accumulated during warm-up
         Args:
             steadyState: True if in steady state
+            currentTime: The time steady state starts at
         """
         self.isSteadyState = steadyState
+        if steadyState:
+            self.occupancy.reset(currentTime)
@@ -1,12 +1,41 @@
 from ComponentType import ComponentType
 import typing
 class Component:
+    __slots__ = ("arrivalTime", "componentType", "departureTime")
+
+    ## Components released once they are consumed, reused by create() instead of allocating new ones. Every
+    ## simulation in the process shares it, so it only keeps up to maxFreeListSize components
+    freeList = []
+    maxFreeListSize = 1024
 
     def __init__(self, arrivalTime:float, componentType:ComponentType):
         self.arrivalTime = arrivalTime
         self.componentType = componentType
         self.departureTime = None
 
+    @classmethod
+    def create(cls, arrivalTime: float, componentType: ComponentType):
+        """
+        Get a component, reusing a released one if there is one
+        Args:
+            arrivalTime: The time the component entered the system
+            componentType: The type of the component
+        Returns:
+            Component: The component
+        """
+        if cls.freeList:
+            component = cls.freeList.pop()
+            Component.__init__(component, arrivalTime, componentType)
+            return component
+        return cls(arrivalTime, componentType)
+
+    def release(self):
+        """
+        Give this component back to be reused once it has been consumed. It must not be used afterwards
+        """
+        if len(self.freeList) < self.maxFreeListSize:
+            self.freeList.append(self)
+
     def getComponentType(self) -> ComponentType:
         """
         Get the component type of this component
@@ -0,0 +1,160 @@
+from typing import Dict
+import math
+import numpy as np
+
+# the continuous distributions of the input models and the names of their parameters
+FAMILIES = {
+    "exponential": ["rate"],
+    "gamma": ["shape", "scale"],
+    "weibull": ["shape", "scale"],
+    "lognormal": ["mu", "sigma"],
+}
+MAX_ITERATIONS = 200
+EPSILON = 1e-12
+TINY = 1e-300
+
+lgamma = np.vectorize(math.lgamma, otypes=[np.float64])
+
+
+def digamma(x: float) -> float:
+    """
+    The digamma function, shifted up with psi(x) = psi(x + 1) - 1/x until its asymptotic series is accurate
+    """
+    result = 0.0
+    while x < 6:
+        result -= 1 / x
+        x += 1
+    inverseSquare = 1 / (x * x)
+    return result + math.log(x) - 0.5 / x - inverseSquare * (1 / 12 - inverseSquare * (1 / 120 - inverseSquare *
+                                                                                      (1 / 252 - inverseSquare / 240)))
+
+
+def trigamma(x: float) -> float:
+    """
+    The trigamma function, shifted up with psi'(x) = psi'(x + 1) + 1/x^2 until its asymptotic series is accurate
+    """
+    result = 0.0
+    while x < 6:
+        result += 1 / (x * x)
+        x += 1
+    inverseSquare = 1 / (x * x)
+    return result + 1 / x + inverseSquare / 2 + inverseSquare / x * (1 / 6 - inverseSquare * (1 / 30 - inverseSquare *
+                                                                                            (1 / 42 - inverseSquare / 30)))
+
+
+def regularizedGammaP(a, x) -> np.ndarray:
+    """
+    The regularized lower incomplete gamma function P(a, x), with its series where x < a + 1 and its continued fraction
+    elsewhere, each evaluated for all the points at once
+    Args:
+        a: The shape, broadcast against x
+        x: The points
+    Returns:
+        np.ndarray: P(a, x)
+    """
+    a, x = np.broadcast_arrays(np.asarray(a, dtype=np.float64), np.asarray(x, dtype=np.float64))
+    result = np.zeros(a.shape)
+    series = (x > 0) & (x < a + 1)
+    fraction = (x > 0) & ~series
+    if series.any():
+        aa, xx = a[series], x[series]
+        term = 1 / aa
+        total = term.copy()
+        n = aa.copy()
+        for _ in range(MAX_ITERATIONS):
+            n += 1
+            term *= xx / n
+            total += term
+            if np.all(np.abs(term) < np.abs(total) * EPSILON):
+                break
+        result[series] = total * np.exp(-xx + aa * np.log(xx) - lgamma(aa))
+    if fraction.any():
+        aa, xx = a[fraction], x[fraction]
+        b = xx + 1 - aa
+        c = np.full(aa.shape, 1 / TINY)
+        d = 1 / b
+        h = d.copy()
+        for i in range(1, MAX_ITERATIONS):
+            an = -i * (i - aa)
+            b += 2
+            d = an * d + b
+            d[np.abs(d) < TINY] = TINY
+            c = b + an / c
+            c[np.abs(c) < TINY] = TINY
+            d = 1 / d
+            delta = d * c
+            h *= delta
+            if np.all(np.abs(delta - 1) < EPSILON):
+                break
+        result[fraction] = 1 - np.exp(-xx + aa * np.log(xx) - lgamma(aa)) * h
+    return result
+
+
+def getCdf(family: str, parameters: Dict[str, float], x: np.ndarray) -> np.ndarray:
+    """
+    Evaluates the cumulative distribution function of a fitted distribution
+    Args:
+        family: One of FAMILIES
+        parameters: The parameters of the distribution
+        x: The points, all positive
+    Returns:
+        np.ndarray: F(x)
+    """
+    if family == "exponential":
+        return 1 - np.exp(-parameters["rate"] * x)
+    if family == "gamma":
+        return regularizedGammaP(parameters["shape"], x / parameters["scale"])
+    if family == "weibull":
+        return 1 - np.exp(-(x / parameters["scale"]) ** parameters["shape"])
+    if family == "lognormal":
+        z = (np.log(x) - parameters["mu"]) / (parameters["sigma"] * math.sqrt(2))
+        # erf(z) = P(1/2, z^2) for z >= 0
+        return 0.5 * (1 + np.sign(z) * regularizedGammaP(0.5, z * z))
+    raise ValueError(f"Unknown distribution {family}, expected one of {list(FAMILIES)}")
+
+
+def getMean(family: str, parameters: Dict[str, float]) -> float:
+    """
+    Gets the mean of a fitted distribution
+    Args:
+        family: One of FAMILIES
+        parameters: The parameters of the distribution
+    Returns:
+        float: E[X]
+    """
+    if family == "exponential":
+        return 1 / parameters["rate"]
+    if family == "gamma":
+        return parameters["shape"] * parameters["scale"]
+    if family == "weibull":
+        return parameters["scale"] * math.gamma(1 + 1 / parameters["shape"])
+    if family == "lognormal":
+        return math.exp(parameters["mu"] + parameters["sigma"] ** 2 / 2)
+    raise ValueError(f"Unknown distribution {family}, expected one of {list(FAMILIES)}")
+
+
+def getTailExpectation(family: str, parameters: Dict[str, float], x: float) -> float:
+    """
+    Evaluates the partial expectation of a fitted distribution above a point, the mean of X counting only the values
+    above x
+    Args:
+        family: One of FAMILIES
+        parameters: The parameters of the distribution
+        x: The point, positive
+    Returns:
+        float: E[X; X > x]
+    """
+    points = np.array([x], dtype=np.float64)
+    if family == "exponential":
+        return (x + 1 / parameters["rate"]) * math.exp(-parameters["rate"] * x)
+    if family == "gamma":
+        shifted = {"shape": parameters["shape"] + 1, "scale": parameters["scale"]}
+        return getMean(family, parameters) * float(1 - getCdf(family, shifted, points)[0])
+    if family == "weibull":
+        shape = parameters["shape"]
+        return getMean(family, parameters) * float(1 - regularizedGammaP(1 + 1 / shape,
+                                                                         (points / parameters["scale"]) ** shape)[0])
+    if family == "lognormal":
+        shifted = {"mu": parameters["mu"] + parameters["sigma"] ** 2, "sigma": parameters["sigma"]}
+        return getMean(family, parameters) * float(1 - getCdf(family, shifted, points)[0])
+    raise ValueError(f"Unknown distribution {family}, expected one of {list(FAMILIES)}")
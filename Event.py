@@ -2,6 +2,13 @@ from EventType import EventType
 
 
 class Event:
+    __slots__ = ("createdTime", "startTime", "eventType")
+
+    ## Events released after being handled, reused by create() instead of allocating new ones. Every simulation in
+    ## the process shares it, so it only keeps up to maxFreeListSize events of each type
+    freeList = []
+    maxFreeListSize = 1024
+
     def __init__(self, createdTime: float, startTime: float, eventType: EventType):
         """Initialize an event to be added to a future event list
 
@@ -13,6 +20,31 @@ class Event:
         self.createdTime = createdTime
         self.startTime = startTime
         self.eventType = eventType
+
+    @classmethod
+    def create(cls, createdTime: float, startTime: float, eventType: EventType):
+        """Get an event, reusing a released one if there is one
+
+        Args:
+            createdTime (float): The time the event was created at
+            startTime (float): The time where this event should start at
+            eventType (EventType): The type of event
+
+        Returns:
+            (Event) : The event
+        """
+        if cls.freeList:
+            event = cls.freeList.pop()
+            Event.__init__(event, createdTime, startTime, eventType)
+            return event
+        return cls(createdTime, startTime, eventType)
+
+    def release(self):
+        """Give this event back to be reused once it has been handled. It must not be used afterwards
+        """
+        freeList = type(self).freeList
+        if len(freeList) < self.maxFreeListSize:
+            freeList.append(self)
     
     def getCreatedTime(self) -> float:
         """Get the time this event was created at
@@ -36,4 +68,12 @@ class Event:
         Returns:
              (EventType) : The type of event
         """
-        return self.eventType
\ No newline at end of file
+        return self.eventType
+
+    def getEntityId(self) -> int:
+        """Get the id of the entity this event belongs to
+
+        Returns:
+             (int) : The id of the entity, None if the event does not belong to an entity
+        """
+        return None
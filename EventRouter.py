@@ -0,0 +1,46 @@
+from typing import Callable, Dict, List, Tuple
+
+from Event import Event
+from EventType import EventType
+
+
+class EventRouter:
+    """
+    Delivers events only to the handlers that can react to them. Handlers subscribe to an event type for a specific
+    entity id, and are called in the order they subscribed.
+    """
+
+    def __init__(self):
+        self.subscribers: Dict[Tuple[EventType, int], List[Callable[[Event], Event]]] = {}
+
+    def subscribe(self, eventType: EventType, entityId: int, handler: Callable[[Event], Event]):
+        """
+        Subscribe a handler to the events of a given type created by a given entity
+        Args:
+            eventType: The type of event the handler reacts to
+            entityId: The id of the inspector or workstation the event belongs to
+            handler: The handler to call, it returns the next event or None
+        """
+        self.subscribers.setdefault((eventType, entityId), []).append(handler)
+
+    def getSubscribers(self, eventType: EventType, entityId: int) -> List[Callable[[Event], Event]]:
+        """
+        Get the handlers subscribed to a given event type and entity
+        Returns: The subscribed handlers in the order they will be called
+        """
+        return self.subscribers.get((eventType, entityId), [])
+
+    def route(self, event: Event) -> List[Event]:
+        """
+        Passes the event to every handler subscribed to its type and entity
+        Args:
+            event: The event that is to be handled
+        Returns:
+            List[Event]: a list containing the Events created by the handlers
+        """
+        events = []
+        for handler in self.subscribers.get((event.getEventType(), event.getEntityId()), ()):
+            newEvent = handler(event)
+            if newEvent is not None:
+                events.append(newEvent)
+        return events
@@ -8,3 +8,5 @@ class EventType(Enum):
     WD = "Workstation Done"
     SD = "Simulation Done"
     SSS = "Steady State Started"
+    BE = "Batch Ended"
+    CP = "Checkpoint"
@@ -0,0 +1,125 @@
+from typing import List, Tuple
+from ComponentType import ComponentType
+from RandomNumberGeneration import RandomNumberGeneration
+from Simulation import SERVICE_RATES
+from Topology import getStreamKeys, validateTopology
+import argparse
+import json
+import math
+import numpy as np
+
+INSPECTOR_RATES = (min(SERVICE_RATES["servinsp1"], SERVICE_RATES["servinsp22"], SERVICE_RATES["servinsp23"]),
+                   max(SERVICE_RATES["servinsp1"], SERVICE_RATES["servinsp22"], SERVICE_RATES["servinsp23"]))
+WORKSTATION_RATES = (min(SERVICE_RATES["ws1"], SERVICE_RATES["ws2"], SERVICE_RATES["ws3"]),
+                     max(SERVICE_RATES["ws1"], SERVICE_RATES["ws2"], SERVICE_RATES["ws3"]))
+
+
+def generateFactory(numInspectors: int, seed: int = 0, buffersPerType: Tuple[int, int] = (1, 3),
+                    multiTypeProbability: float = 0.5, numWorkstations: int = None) -> dict:
+    """
+    Generates a random factory topology of any size, for loading into the Simulation like Factory.json. Every
+    inspector cleans one component type, or two chosen between at random like inspector 2, and delivers to its own
+    buffers of those types. Every buffer is taken from by exactly one workstation, and a workstation takes from at most
+    one buffer of the inspectors that clean two component types. Such a factory can never deadlock: if every inspector
+    were blocked, every buffer of a one type inspector and the blocking type's buffers of the others would be full, so
+    the workstations taking from the blocking buffers could start. Rates are drawn between the smallest and largest
+    rates of the project's factory
+    Args:
+        numInspectors: The number of inspectors
+        seed: The seed of the wiring and rates, the same seed always gives the same factory
+        buffersPerType: The smallest and largest number of buffers an inspector has for each type it cleans
+        multiTypeProbability: The probability an inspector cleans two component types
+        numWorkstations: The number of workstations. If None, about one for every two buffers
+    Returns:
+        dict: The topology, with its streams numbered from 0 streamSpacing apart, so
+              RandomNumberGeneration.getReplicationSeeds(r, len(getStreamKeys(topology))) seeds it
+    Raises:
+        ValueError: If the number of workstations cannot be wired, there must be at least one buffer for each and at
+                    least one for every buffer of a two type inspector
+    """
+    rng = np.random.default_rng(seed)
+    componentTypes = [componentType.name for componentType in ComponentType]
+    streams = iter(range(0, 2 ** 62, RandomNumberGeneration.streamSpacing))
+
+    def drawRate(rates: Tuple[float, float]) -> float:
+        return round(float(rng.uniform(*rates)), 6)
+
+    buffers = []
+    inspectors = []
+    multiTypeBuffers = []
+    for inspectorId in range(1, numInspectors + 1):
+        numTypes = 2 if rng.random() < multiTypeProbability else 1
+        types = [componentTypes[i] for i in sorted(rng.choice(len(componentTypes), numTypes, replace=False))]
+        inspector = {"id": inspectorId, "components": [], "buffers": []}
+        for componentType in types:
+            inspector["components"].append({"componentType": componentType, "stream": next(streams),
+                                             "distribution": "exponential", "rate": drawRate(INSPECTOR_RATES)})
+            for _ in range(rng.integers(buffersPerType[0], buffersPerType[1] + 1)):
+                buffer = {"id": len(buffers) + 1, "componentType": componentType}
+                buffers.append(buffer)
+                inspector["buffers"].append(buffer["id"])
+                if numTypes > 1:
+                    multiTypeBuffers.append(buffer["id"])
+        if numTypes > 1:
+            inspector["chooserStream"] = next(streams)
+        inspector["buffers"] = [int(bufferId) for bufferId in rng.permutation(inspector["buffers"])]
+        inspectors.append(inspector)
+
+    if numWorkstations is None:
+        numWorkstations = max(len(multiTypeBuffers), math.ceil(len(buffers) / 2))
+    if not len(multiTypeBuffers) <= numWorkstations <= len(buffers):
+        raise ValueError(f"{numWorkstations} workstations cannot take from {len(buffers)} buffers, of which "
+                         f"{len(multiTypeBuffers)} belong to inspectors that clean two component types")
+    inputs: List[List[int]] = [[] for _ in range(numWorkstations)]
+    for workstation, bufferId in zip(rng.permutation(numWorkstations), multiTypeBuffers):
+        inputs[workstation].append(bufferId)
+    isMultiType = set(multiTypeBuffers)
+    singleTypeBuffers = [buffer["id"] for buffer in buffers if buffer["id"] not in isMultiType]
+    singleTypeBuffers = [int(bufferId) for bufferId in rng.permutation(singleTypeBuffers)]
+    # first give every workstation without a buffer one, then spread the rest at random
+    empty = [workstation for workstation in range(numWorkstations) if not inputs[workstation]]
+    for workstation, bufferId in zip(empty, singleTypeBuffers):
+        inputs[workstation].append(bufferId)
+    for bufferId in singleTypeBuffers[len(empty):]:
+        inputs[rng.integers(numWorkstations)].append(bufferId)
+
+    workstations = [{"id": workstationId, "stream": next(streams), "distribution": "exponential",
+                     "rate": drawRate(WORKSTATION_RATES), "buffers": sorted(bufferIds)}
+                    for workstationId, bufferIds in enumerate(inputs, start=1)]
+    topology = {"buffers": buffers, "inspectors": inspectors, "workstations": workstations}
+    validateTopology(topology)
+    return topology
+
+
+def getFactorySeeds(topology: dict, replication: int = 0) -> dict:
+    """
+    Gets the seeds of every stream of a generated factory for one replication
+    Args:
+        topology: A topology made by generateFactory
+        replication: The index of the replication, starting at 0
+    Returns:
+        dict: The seeds keyed by stream, as the Simulation expects
+    """
+    return RandomNumberGeneration.getReplicationSeeds(replication, len(getStreamKeys(topology)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a random factory topology that can be simulated")
+    parser.add_argument("--inspectors", type=int, default=100, help="number of inspectors")
+    parser.add_argument("--workstations", type=int, default=None,
+                        help="number of workstations, about one for every two buffers by default")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the wiring and rates")
+    parser.add_argument("--multi-type-probability", type=float, default=0.5,
+                        help="probability an inspector cleans two component types")
+    parser.add_argument("--output", default="GeneratedFactory.json", help="json file to write the topology to")
+    args = parser.parse_args()
+    topology = generateFactory(args.inspectors, args.seed, multiTypeProbability=args.multi_type_probability,
+                               numWorkstations=args.workstations)
+    with open(args.output, 'w', encoding='UTF8') as f:
+        json.dump(topology, f, indent=2)
+    print(f"{len(topology['inspectors'])} inspectors, {len(topology['buffers'])} buffers and "
+          f"{len(topology['workstations'])} workstations written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
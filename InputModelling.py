@@ -0,0 +1,317 @@
+from typing import Dict, List, Optional, Tuple
+from Distributions import EPSILON, FAMILIES, MAX_ITERATIONS, digamma, getCdf, regularizedGammaP, trigamma
+from ReplayGenerator import DATA_DIRECTORY
+from Simulation import SERVICE_RATES
+from Topology import DEFAULT_TOPOLOGY, getNamedRateStreams
+import argparse
+import csv
+import hashlib
+import json
+import math
+import os
+import tempfile
+import numpy as np
+
+# change when a change to the fitting makes earlier fits stale, so they are no longer found
+FIT_VERSION = 1
+INPUT_CACHE_DIRECTORY = os.path.join(DATA_DIRECTORY, ".input_cache")
+
+
+def fitExponential(observations: np.ndarray) -> Dict[str, float]:
+    """
+    Maximum likelihood fit of the exponential distribution, the rate is one over the sample mean
+    """
+    return {"rate": float(1 / observations.mean())}
+
+
+def fitGamma(observations: np.ndarray) -> Dict[str, float]:
+    """
+    Maximum likelihood fit of the gamma distribution. The shape k solves log(k) - psi(k) = log(mean) - mean(log),
+    found with Newton's method from the closed form approximation of Minka, and the scale is the mean over the shape
+    """
+    mean = observations.mean()
+    s = math.log(mean) - float(np.log(observations).mean())
+    shape = (3 - s + math.sqrt((s - 3) ** 2 + 24 * s)) / (12 * s)
+    for _ in range(MAX_ITERATIONS):
+        step = (math.log(shape) - digamma(shape) - s) / (1 / shape - trigamma(shape))
+        shape = max(shape - step, shape / 10)
+        if abs(step) < EPSILON * shape:
+            break
+    return {"shape": shape, "scale": float(mean / shape)}
+
+
+def fitWeibull(observations: np.ndarray) -> Dict[str, float]:
+    """
+    Maximum likelihood fit of the Weibull distribution. The shape c solves
+    sum(x^c log x) / sum(x^c) - 1/c - mean(log x) = 0, found with Newton's method on the observations scaled by their
+    largest value to keep x^c in range, and the scale is mean(x^c)^(1/c)
+    """
+    largest = observations.max()
+    logs = np.log(observations / largest)
+    meanLog = logs.mean()
+    shape = 1.2 / max(float(logs.std()), EPSILON)
+    for _ in range(MAX_ITERATIONS):
+        powers = np.exp(shape * logs)
+        total = powers.sum()
+        weighted = (powers * logs).sum()
+        value = weighted / total - 1 / shape - meanLog
+        derivative = ((powers * logs * logs).sum() * total - weighted * weighted) / (total * total) + 1 / shape ** 2
+        step = value / derivative
+        shape = max(shape - step, shape / 10)
+        if abs(step) < EPSILON * shape:
+            break
+    scale = largest * float(np.exp(shape * logs).mean()) ** (1 / shape)
+    return {"shape": float(shape), "scale": float(scale)}
+
+
+def fitLognormal(observations: np.ndarray) -> Dict[str, float]:
+    """
+    Maximum likelihood fit of the lognormal distribution, the mean and the population standard deviation of the logs
+    """
+    logs = np.log(observations)
+    return {"mu": float(logs.mean()), "sigma": float(logs.std())}
+
+
+FITTERS = {"exponential": fitExponential, "gamma": fitGamma, "weibull": fitWeibull, "lognormal": fitLognormal}
+
+
+def getLogLikelihood(family: str, parameters: Dict[str, float], x: np.ndarray) -> float:
+    """
+    Evaluates the log-likelihood of the observations under a fitted distribution
+    Args:
+        family: One of FAMILIES
+        parameters: The parameters of the distribution
+        x: The observations, all positive
+    Returns:
+        float: The log-likelihood
+    """
+    n = len(x)
+    logs = np.log(x)
+    if family == "exponential":
+        return float(n * math.log(parameters["rate"]) - parameters["rate"] * x.sum())
+    if family == "gamma":
+        shape, scale = parameters["shape"], parameters["scale"]
+        return float((shape - 1) * logs.sum() - x.sum() / scale - n * shape * math.log(scale) - n * math.lgamma(shape))
+    if family == "weibull":
+        shape, scale = parameters["shape"], parameters["scale"]
+        return float(n * math.log(shape / scale) + (shape - 1) * (logs - math.log(scale)).sum() -
+                     ((x / scale) ** shape).sum())
+    if family == "lognormal":
+        mu, sigma = parameters["mu"], parameters["sigma"]
+        return float(-logs.sum() - n * math.log(sigma * math.sqrt(2 * math.pi)) -
+                     ((logs - mu) ** 2).sum() / (2 * sigma * sigma))
+    raise ValueError(f"Unknown distribution {family}, expected one of {list(FAMILIES)}")
+
+
+def ksTest(cdfValues: np.ndarray) -> Tuple[float, float]:
+    """
+    Kolmogorov-Smirnov test of the observations against a fitted distribution. The p-value is the asymptotic one of
+    Stephens, which is conservative when the parameters were estimated from the same observations
+    Args:
+        cdfValues: F(x) of every observation
+    Returns:
+        Tuple[float, float]: The statistic D and its p-value
+    """
+    n = len(cdfValues)
+    values = np.sort(cdfValues)
+    ranks = np.arange(1, n + 1)
+    statistic = float(max((ranks / n - values).max(), (values - (ranks - 1) / n).max()))
+    lam = (math.sqrt(n) + 0.12 + 0.11 / math.sqrt(n)) * statistic
+    k = np.arange(1, 101)
+    pValue = float(2 * (((-1.0) ** (k - 1)) * np.exp(-2 * k * k * lam * lam)).sum())
+    return statistic, min(max(pValue, 0.0), 1.0)
+
+
+def chiSquareTest(cdfValues: np.ndarray, numParameters: int, numBins: int = None) -> Tuple[float, int, float]:
+    """
+    Chi-square goodness of fit test with bins that are equally likely under the fitted distribution, counted from
+    F(x) so the inverse of the distribution is never needed
+    Args:
+        cdfValues: F(x) of every observation
+        numParameters: The number of parameters estimated, which are taken off the degrees of freedom
+        numBins: The number of bins, the square root of the number of observations by default
+    Returns:
+        Tuple[float, int, float]: The statistic, its degrees of freedom and its p-value
+    """
+    n = len(cdfValues)
+    numBins = numBins if numBins is not None else max(int(math.sqrt(n)), numParameters + 2)
+    observed = np.bincount(np.minimum((cdfValues * numBins).astype(np.int64), numBins - 1), minlength=numBins)
+    expected = n / numBins
+    statistic = float(((observed - expected) ** 2).sum() / expected)
+    degreesOfFreedom = numBins - 1 - numParameters
+    pValue = float(1 - regularizedGammaP(degreesOfFreedom / 2, statistic / 2))
+    return statistic, degreesOfFreedom, pValue
+
+
+def fitObservations(observations: np.ndarray) -> dict:
+    """
+    Fits every distribution of FAMILIES to the observations and tests each fit. The chosen distribution is the one
+    with the lowest Akaike information criterion, so a distribution with more parameters is only chosen if it fits
+    clearly better
+    Args:
+        observations: The observations, all positive
+    Returns:
+        dict: The number of observations, the chosen distribution, and for each distribution its parameters,
+        log-likelihood, AIC, and the statistics and p-values of both tests
+    """
+    observations = np.asarray(observations, dtype=np.float64)
+    if observations.size < 2 or (observations <= 0).any():
+        raise ValueError("Distributions can only be fitted to two or more positive observations")
+    fits = {}
+    for family, fitter in FITTERS.items():
+        parameters = fitter(observations)
+        cdfValues = getCdf(family, parameters, observations)
+        logLikelihood = getLogLikelihood(family, parameters, observations)
+        ksStatistic, ksPValue = ksTest(cdfValues)
+        chiSquare, degreesOfFreedom, chiSquarePValue = chiSquareTest(cdfValues, len(parameters))
+        fits[family] = {
+            "parameters": parameters,
+            "logLikelihood": logLikelihood,
+            "aic": 2 * len(parameters) - 2 * logLikelihood,
+            "ksStatistic": ksStatistic,
+            "ksPValue": ksPValue,
+            "chiSquare": chiSquare,
+            "degreesOfFreedom": degreesOfFreedom,
+            "chiSquarePValue": chiSquarePValue,
+        }
+    return {
+        "observations": int(observations.size),
+        "chosen": min(fits, key=lambda family: fits[family]["aic"]),
+        "fits": fits,
+    }
+
+
+def fitFile(name: str, directory: str = DATA_DIRECTORY, cacheDirectory: Optional[str] = INPUT_CACHE_DIRECTORY) -> dict:
+    """
+    Fits the distributions to one data file, e.g. "servinsp1" for servinsp1.dat. Fits are cached under a hash of the
+    file's contents, so a file is only fitted again once its measurements change
+    Args:
+        name: The name of the data file, without its .dat extension
+        directory: The directory of the data files
+        cacheDirectory: The directory fits are cached in, None to always fit
+    Returns:
+        dict: The fits, as fitObservations returns them
+    """
+    with open(os.path.join(directory, f"{name}.dat"), "rb") as f:
+        contents = f.read()
+    key = hashlib.sha256(f"{FIT_VERSION}\n".encode() + contents).hexdigest()
+    path = os.path.join(cacheDirectory, f"{key}.json") if cacheDirectory is not None else None
+    if path is not None and os.path.exists(path):
+        try:
+            with open(path, encoding='UTF8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            pass
+    result = fitObservations(np.array(contents.split(), dtype=np.float64))
+    if path is not None:
+        os.makedirs(cacheDirectory, exist_ok=True)
+        descriptor, temporaryPath = tempfile.mkstemp(dir=cacheDirectory, suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, 'w', encoding='UTF8') as f:
+                json.dump(result, f)
+            os.replace(temporaryPath, path)
+        except BaseException:
+            os.remove(temporaryPath)
+            raise
+    return result
+
+
+def fitInputs(names: List[str] = None, directory: str = DATA_DIRECTORY,
+              cacheDirectory: Optional[str] = INPUT_CACHE_DIRECTORY) -> Dict[str, dict]:
+    """
+    Fits the distributions to every data file of the model
+    Args:
+        names: The names of the data files, the names of SERVICE_RATES by default
+        directory: The directory of the data files
+        cacheDirectory: The directory fits are cached in, None to always fit
+    Returns:
+        Dict[str, dict]: The fits of every file, keyed by its name
+    """
+    names = names if names is not None else list(SERVICE_RATES)
+    return {name: fitFile(name, directory, cacheDirectory) for name in names}
+
+
+def getFittedServiceRates(inputs: Dict[str, dict] = None) -> Dict[str, float]:
+    """
+    Gets the rates of the exponentials fitted to the data files, keyed the same way as SERVICE_RATES, so they can be
+    passed as the serviceRates of the Simulation. SERVICE_RATES holds the same rates rounded to six decimals
+    Args:
+        inputs: The fits from fitInputs, which fits the data files of SERVICE_RATES if None
+    Returns:
+        Dict[str, float]: The rates
+    """
+    inputs = inputs if inputs is not None else fitInputs()
+    return {name: fit["fits"]["exponential"]["parameters"]["rate"] for name, fit in inputs.items()}
+
+
+def getFittedTopology(topology: dict = DEFAULT_TOPOLOGY, inputs: Dict[str, dict] = None) -> dict:
+    """
+    Gets a copy of a topology that samples the distribution chosen for each data file, wherever the rate is given by
+    the name of a data file. Exponential times keep being sampled with their fitted rate, the other distributions
+    are sampled from a table of their quantiles
+    Args:
+        topology: The topology
+        inputs: The fits from fitInputs, which fits the data files of the named rates if None
+    Returns:
+        dict: The new topology
+    """
+    names = list(getNamedRateStreams(topology))
+    inputs = inputs if inputs is not None else fitInputs(names)
+
+    def fitted(spec: dict) -> dict:
+        if not isinstance(spec.get("rate"), str):
+            return dict(spec)
+        result = inputs[spec["rate"]]
+        fit = result["fits"][result["chosen"]]
+        replaced = {key: value for key, value in spec.items() if key != "rate"}
+        replaced["distribution"] = result["chosen"]
+        if result["chosen"] == "exponential":
+            replaced["rate"] = fit["parameters"]["rate"]
+        else:
+            replaced["parameters"] = dict(fit["parameters"])
+        return replaced
+
+    inspectors = [{**inspector, "components": [fitted(component) for component in inspector["components"]]}
+                  for inspector in topology["inspectors"]]
+    return {**topology, "inspectors": inspectors,
+            "workstations": [fitted(workstation) for workstation in topology["workstations"]]}
+
+
+def getInputModelRows(inputs: Dict[str, dict]) -> List[list]:
+    """
+    Lays out the fits as csv rows
+    Args:
+        inputs: The fits from fitInputs
+    Returns:
+        List[list]: The header row followed by one row per file and distribution
+    """
+    rows = [['File', 'Distribution', 'Parameters', 'Log-Likelihood', 'AIC', 'KS Statistic', 'KS p-value',
+             'Chi-Square', 'Degrees Of Freedom', 'Chi-Square p-value', 'Chosen']]
+    for name, result in inputs.items():
+        for family, fit in result["fits"].items():
+            parameters = " ".join(f"{key}={value:.6g}" for key, value in fit["parameters"].items())
+            rows.append([name, family, parameters, fit["logLikelihood"], fit["aic"], fit["ksStatistic"],
+                         fit["ksPValue"], fit["chiSquare"], fit["degreesOfFreedom"], fit["chiSquarePValue"],
+                         family == result["chosen"]])
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fit distributions to the data files and test the fits")
+    parser.add_argument("names", nargs="*", help="data files to fit, without .dat (default: every file of the model)")
+    parser.add_argument("--directory", default=DATA_DIRECTORY, help="directory of the data files")
+    parser.add_argument("--no-cache", action="store_true", help="fit every file again instead of reusing cached fits")
+    parser.add_argument("--output", default="Input_Models.csv", help="csv file to write the fits to")
+    args = parser.parse_args()
+    inputs = fitInputs(args.names or None, args.directory, None if args.no_cache else INPUT_CACHE_DIRECTORY)
+    rows = getInputModelRows(inputs)
+    for row in rows[1:]:
+        chosen = " (chosen)" if row[-1] else ""
+        print(f"{row[0]} {row[1]}{chosen}: {row[2]}, AIC {row[4]:.2f}, KS p-value {row[6]:.4f}, "
+              f"chi-square p-value {row[9]:.4f}")
+    with open(args.output, 'w', encoding='UTF8', newline='') as f:
+        csv.writer(f).writerows(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -40,6 +40,8 @@ class Inspector:
         self.isSteadyState = False
         self.roundRobinPolicy = roundRobinPolicy
         self.currStartIdx = 0
+        self.routes = {}
+        self.currRoutes = None
 
     def getBuffers(self):
         """Get the list of buffers this inspector has
@@ -63,6 +65,25 @@ class Inspector:
             self.buffers[index] = buffer
             return True
         return False
+
+    def compileRoutes(self):
+        """
+        Builds the routing table of the inspector: for every component type it cleans and every buffer the round robin
+        policy can start from, the buffers that hold that component type, as (index, buffer) pairs in the order they
+        are tried. Delivering a component then only looks at the buffers that can take it. Call it once every buffer
+        has been set, before the first event is handled
+        """
+        self.routes = {}
+        for componentType in self.componentsToHandle:
+            self.routes[componentType] = []
+            for startIdx in range(self.numBuffers):
+                candidates = []
+                for i in range(self.numBuffers):
+                    index = (startIdx + i) % self.numBuffers
+                    buffer = self.buffers[index]
+                    if buffer is not None and buffer.getComponentType() == componentType:
+                        candidates.append((index, buffer))
+                self.routes[componentType].append(candidates)
     
     def getComponentsToHandle(self) -> List[Component]:
         """Get the list of components handled by this inspector
@@ -70,7 +91,7 @@ class Inspector:
         Returns:
             Component[]: The components this inspector handles
         """
-        self.componentsToHandle
+        return self.componentsToHandle
 
     def getTimeBlocked(self) -> float:
         """Get the amount of time this inspector has been blocked
@@ -80,6 +101,21 @@ class Inspector:
         """
         return self.timeBlocked
 
+    def getTimeBlockedUntil(self, currentTime: float) -> float:
+        """Get the time blocked including the blocked spell in progress up to the current time. A spell is added to
+        the time blocked whole when the inspector unblocks, so this is what the time blocked will have grown by at
+        currentTime
+
+        Args:
+            currentTime (float): The current time
+
+        Returns:
+            float: Minutes the inspector has been blocked in steady state, up to the current time
+        """
+        if self.isBlocked and self.isSteadyState:
+            return self.timeBlocked + currentTime - self.blockedStartTime
+        return self.timeBlocked
+
     def getNumComponentsPickedUp(self) -> int:
         """Get the amount of components picked up by the inspector
 
@@ -110,6 +146,14 @@ class Inspector:
             generators.append(self.randomNumberGenerators.get("choose component"))
         return generators
 
+    def setRoundRobinPolicy(self, roundRobinPolicy: bool):
+        """
+        Set the policy used to deliver components from now on
+        Args:
+            roundRobinPolicy: If True, uses round robin policy. Otherwise uses the original priority policy
+        """
+        self.roundRobinPolicy = roundRobinPolicy
+
     def setSteadyState(self, steadyState:bool):
         """
         Set if we are in steady state or not
@@ -135,15 +179,16 @@ class Inspector:
             # print(f"Inspector {self.id} is blocked, skipping inspector started event")
             return None
         self.currComponentType = self.__selectComponentToClean()
+        self.currRoutes = self.routes[self.currComponentType]
         self.numComponentsPickedUp += 1
         cleaningTime = self.__generateRandomCleaningTime()
         currentTime = event.getStartTime()
-        self.currComponent = Component(currentTime, self.currComponentType)
+        self.currComponent = Component.create(currentTime, self.currComponentType)
         if (self.currComponentType == None):
             raise ValueError("Inspector is not fully configured for use. Please set the components this inspector should handle.")
         
         # print(f"Inspector {self.id} started cleaning {self.currComponentType} at {currentTime}")
-        doneEvent = InspectorEvent(currentTime, (currentTime + cleaningTime), EventType.ID, self.id)
+        doneEvent = InspectorEvent.create(currentTime, (currentTime + cleaningTime), EventType.ID, self.id)
         return doneEvent
     
     def handleInspectorDone(self, event: InspectorEvent) -> Event:
@@ -161,10 +206,10 @@ class Inspector:
         if (event.getInspectorId() != self.id): #not this inspector
             return None
 
-        success = self.__iterateThroughBuffers(self.currComponentType)
         currentTime = event.getStartTime()
+        success = self.__iterateThroughBuffers(self.currComponentType, currentTime)
         if success:
-            startEvent = InspectorEvent(currentTime, currentTime, EventType.IS, self.id)
+            startEvent = InspectorEvent.create(currentTime, currentTime, EventType.IS, self.id)
             # print(f"Inspector {self.id} finished cleaning {self.currComponentType} at {currentTime}")
             return startEvent
         else:
@@ -185,14 +230,14 @@ class Inspector:
             is blocked
         """
         if self.isBlocked:
-            success = self.__iterateThroughBuffers(self.currComponentType)
+            currentTime = event.getStartTime()
+            success = self.__iterateThroughBuffers(self.currComponentType, currentTime)
             if success:
                 # print(f"Inspector {self.id} is now unblocked")
                 self.isBlocked = False
-                currentTime = event.getStartTime()
                 if self.isSteadyState:
                     self.timeBlocked += currentTime - self.blockedStartTime
-                startEvent = InspectorEvent(currentTime, currentTime, EventType.IS, self.id)
+                startEvent = InspectorEvent.create(currentTime, currentTime, EventType.IS, self.id)
                 return startEvent
         return None
 
@@ -216,23 +261,24 @@ class Inspector:
         else:
             return self.componentsToHandle[0]
         
-    def __iterateThroughBuffers(self, componentType: ComponentType) -> bool:
-        """Iterate through the buffers to see if the inspector can add a component to at least one of them.
+    def __iterateThroughBuffers(self, componentType: ComponentType, currentTime: float) -> bool:
+        """Iterate through the buffers to see if the inspector can add a component to at least one of them. Only the
+        buffers the routing table lists for the component being delivered are looked at.
 
         Args:
             componentType (ComponentType): The component type to be added to a buffer
+            currentTime (float): The time the component is delivered at
 
         Returns:
             bool: True if the inspector is able to add to the buffer, otherwise False
         """
         success = False
-        for i in range(self.numBuffers):
-            buffer = self.buffers[(self.currStartIdx + i) % self.numBuffers]
-            if (buffer.getComponentType() == componentType) and not buffer.isFull():
-                success = buffer.addComponent(self.currComponent)
+        for index, buffer in self.currRoutes[self.currStartIdx]:
+            if not buffer.isFull():
+                success = buffer.addComponent(self.currComponent, currentTime)
                 if success:
                     # print(f"Inspector {self.id} is adding {componentType} to Buffer {buffer.getId()}")
                     if(self.roundRobinPolicy):
-                        self.currStartIdx = (self.currStartIdx + i + 1) % self.numBuffers
+                        self.currStartIdx = (index + 1) % self.numBuffers
                     break
         return success
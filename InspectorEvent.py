@@ -4,6 +4,10 @@ from EventType import EventType
 
 
 class InspectorEvent(Event):
+    __slots__ = ("inspectorId",)
+
+    freeList = []
+
     def __init__(self, createdTime: float, startTime: float, eventType: EventType, inspectorId: int):
         """Initialize an inspector event
 
@@ -15,6 +19,26 @@ class InspectorEvent(Event):
         """
         Event.__init__(self, createdTime, startTime, eventType)
         self.inspectorId = inspectorId
+
+    @classmethod
+    def create(cls, createdTime: float, startTime: float, eventType: EventType, inspectorId: int):
+        """Get an inspector event, reusing a released one if there is one
+
+        Args:
+            createdTime (float): The time the event was created at
+            startTime (float): The time where this event should start at
+            eventType (EventType): The type of event
+            inspectorId (int): The id of the inspector
+
+        Returns:
+            InspectorEvent : The event
+        """
+        if cls.freeList:
+            event = cls.freeList.pop()
+            Event.__init__(event, createdTime, startTime, eventType)
+            event.inspectorId = inspectorId
+            return event
+        return cls(createdTime, startTime, eventType, inspectorId)
     
     def getInspectorId(self):
         """Get the id of the inspector that created this event
@@ -22,4 +46,12 @@ class InspectorEvent(Event):
         Returns:
             int : Id of the inspector
         """
-        return self.inspectorId
\ No newline at end of file
+        return self.inspectorId
+
+    def getEntityId(self) -> int:
+        """Get the id of the inspector that created this event
+
+        Returns:
+            int : Id of the inspector
+        """
+        return self.inspectorId
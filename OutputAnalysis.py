@@ -0,0 +1,168 @@
+import math
+from typing import List, Tuple
+import numpy as np
+
+
+def regularizedIncompleteBeta(a: float, b: float, x: float) -> float:
+    """
+    Computes the regularized incomplete beta function I_x(a, b) with its continued fraction
+    Args:
+        a: The first shape parameter
+        b: The second shape parameter
+        x: The point to evaluate at, between 0 and 1
+    Returns:
+        float: I_x(a, b)
+    """
+    if x <= 0.0:
+        return 0.0
+    if x >= 1.0:
+        return 1.0
+    if x > (a + 1.0) / (a + b + 2.0):
+        return 1.0 - regularizedIncompleteBeta(b, a, 1.0 - x)
+    front = math.exp(math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b) + a * math.log(x) + b * math.log(1.0 - x))
+    tiny = 1e-300
+    c = 1.0
+    d = 1.0 - (a + b) * x / (a + 1.0)
+    d = 1.0 / (d if abs(d) > tiny else tiny)
+    fraction = d
+    for m in range(1, 300):
+        for numerator in (m * (b - m) * x / ((a + 2 * m - 1) * (a + 2 * m)),
+                          -(a + m) * (a + b + m) * x / ((a + 2 * m) * (a + 2 * m + 1))):
+            d = 1.0 + numerator * d
+            d = 1.0 / (d if abs(d) > tiny else tiny)
+            c = 1.0 + numerator / c
+            c = c if abs(c) > tiny else tiny
+            fraction *= c * d
+        if abs(c * d - 1.0) < 1e-15:
+            break
+    return front * fraction / a
+
+
+def studentTCdf(t: float, degreesOfFreedom: float) -> float:
+    """
+    Computes the cumulative distribution function of Student's t distribution
+    Args:
+        t: The point to evaluate at
+        degreesOfFreedom: The degrees of freedom
+    Returns:
+        float: P(T <= t)
+    """
+    tail = 0.5 * regularizedIncompleteBeta(degreesOfFreedom / 2.0, 0.5, degreesOfFreedom / (degreesOfFreedom + t * t))
+    return 1.0 - tail if t > 0 else tail
+
+
+def tQuantile(probability: float, degreesOfFreedom: float) -> float:
+    """
+    Computes the quantile of Student's t distribution by bisection on its cumulative distribution function
+    Args:
+        probability: The probability, between 0 and 1
+        degreesOfFreedom: The degrees of freedom
+    Returns:
+        float: The t value with P(T <= t) = probability
+    """
+    if probability == 0.5:
+        return 0.0
+    if probability < 0.5:
+        return -tQuantile(1.0 - probability, degreesOfFreedom)
+    low, high = 0.0, 1.0
+    while studentTCdf(high, degreesOfFreedom) < probability:
+        low, high = high, 2.0 * high
+    for _ in range(100):
+        middle = (low + high) / 2.0
+        if studentTCdf(middle, degreesOfFreedom) < probability:
+            low = middle
+        else:
+            high = middle
+    return (low + high) / 2.0
+
+
+def confidenceIntervals(data, confidence: float = 0.95) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Computes t-based confidence intervals for the mean of every column of the data
+    Args:
+        data: The observations, one row per replication and one column per quantity of interest
+        confidence: The confidence level of the intervals
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The mean and the half width of the interval for each column
+    """
+    data = np.asarray(data, dtype=float)
+    numObservations = data.shape[0]
+    means = data.mean(axis=0)
+    if numObservations < 2:
+        return means, np.full(means.shape, np.inf)
+    standardErrors = data.std(axis=0, ddof=1) / math.sqrt(numObservations)
+    return means, tQuantile(1.0 - (1.0 - confidence) / 2.0, numObservations - 1) * standardErrors
+
+
+def pairedConfidenceIntervals(first, second, confidence: float = 0.95) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Computes confidence intervals for the mean difference of paired observations, such as two systems run on common
+    random numbers, along with how much the pairing reduced the variance of the difference
+    Args:
+        first: The observations of the first system, one row per replication and one column per quantity of interest
+        second: The observations of the second system, paired row by row with the first
+        confidence: The confidence level of the intervals
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: The mean and the half width of the interval of each difference, and
+        the variance of each difference relative to its variance if the systems had been run independently
+    """
+    first = np.asarray(first, dtype=float)
+    second = np.asarray(second, dtype=float)
+    means, halfWidths = confidenceIntervals(first - second, confidence)
+    ratios = np.ones(means.shape)
+    if first.shape[0] >= 2:
+        independent = first.var(axis=0, ddof=1) + second.var(axis=0, ddof=1)
+        varies = independent > 0
+        ratios[varies] = (first - second).var(axis=0, ddof=1)[varies] / independent[varies]
+    return means, halfWidths, ratios
+
+
+def relativeHalfWidths(means: np.ndarray, halfWidths: np.ndarray) -> np.ndarray:
+    """
+    Computes the half width of each interval relative to its mean. An interval of width 0 is treated as precise even
+    if its mean is 0
+    Args:
+        means: The means of the intervals
+        halfWidths: The half widths of the intervals
+    Returns:
+        np.ndarray: The relative half widths
+    """
+    relative = np.full(means.shape, np.inf)
+    nonZero = means != 0
+    relative[nonZero] = halfWidths[nonZero] / np.abs(means[nonZero])
+    relative[halfWidths == 0] = 0.0
+    return relative
+
+
+def lag1Autocorrelations(data) -> np.ndarray:
+    """
+    Estimates the lag-1 autocorrelation of every column of a series of observations, such as batch means
+    Args:
+        data: The observations in order, one row per observation and one column per quantity of interest
+    Returns:
+        np.ndarray: The lag-1 autocorrelation of each column, 0 for columns that do not vary
+    """
+    data = np.asarray(data, dtype=float)
+    deviations = data - data.mean(axis=0)
+    variances = (deviations ** 2).sum(axis=0)
+    covariances = (deviations[:-1] * deviations[1:]).sum(axis=0)
+    autocorrelations = np.zeros(data.shape[1])
+    varies = variances > 0
+    autocorrelations[varies] = covariances[varies] / variances[varies]
+    return autocorrelations
+
+
+def getConfidenceIntervalRows(headers: List[str], means: np.ndarray, halfWidths: np.ndarray) -> List[list]:
+    """
+    Lays out confidence intervals as csv rows
+    Args:
+        headers: The name of each quantity of interest
+        means: The mean of each quantity
+        halfWidths: The half width of the interval of each quantity
+    Returns:
+        List[list]: The header row followed by one row per quantity
+    """
+    rows = [['Quantity', 'Mean', 'Half Width', 'Lower Bound', 'Upper Bound', 'Relative Half Width']]
+    for header, mean, halfWidth, relative in zip(headers, means, halfWidths, relativeHalfWidths(means, halfWidths)):
+        rows.append([header, mean, halfWidth, mean - halfWidth, mean + halfWidth, relative])
+    return rows
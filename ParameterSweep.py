@@ -0,0 +1,321 @@
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from typing import Dict, List, Tuple
+from OutputAnalysis import confidenceIntervals
+from RandomNumberGeneration import RandomNumberGeneration
+from Replication import Replication
+from ReplicationCache import CACHE_DIRECTORY, ReplicationCache, getReplicationKey
+from Simulation import Simulation, MAX_BUFFER_SIZE, SERVICE_RATES, SIMULATION_TIME, WARMUP_TIME
+from VectorizedSimulation import VectorizedSimulation
+import argparse
+import csv
+import numpy as np
+import os
+
+# the parameters a design point can set, every parameter it leaves out keeps its value from Simulation.py
+PARAMETERS = ["maxBufferSize"] + list(SERVICE_RATES) + ["isRoundRobin"]
+DEFAULT_POINT = {"maxBufferSize": MAX_BUFFER_SIZE, **SERVICE_RATES, "isRoundRobin": True}
+
+
+def gridDesign(levels: Dict[str, list]) -> List[dict]:
+    """
+    Creates a full factorial design with every combination of the given levels
+    Args:
+        levels: The levels of each parameter to vary, keyed by its name in PARAMETERS
+    Returns:
+        List[dict]: The design points, each one a full set of parameters
+    """
+    checkParameters(levels)
+    names = list(levels)
+    return [{**DEFAULT_POINT, **dict(zip(names, values))} for values in product(*(levels[name] for name in names))]
+
+
+def latinHypercubeDesign(ranges: Dict[str, Tuple[float, float]], numPoints: int, seed: int = 0,
+                         policies: Tuple[bool, ...] = (True, False)) -> List[dict]:
+    """
+    Creates a Latin hypercube sample of the given ranges, crossed with the given policies so that every sampled point
+    is run with each policy. The range of every parameter is split into numPoints strata and each stratum is sampled
+    exactly once. Parameters with integer bounds, such as the buffer capacity, are sampled as integers
+    Args:
+        ranges: The lowest and highest value of each parameter to vary, keyed by its name in PARAMETERS
+        numPoints: The number of points to sample
+        seed: The seed of the sample
+        policies: The policies every point is run with, True for round robin and False for priority
+    Returns:
+        List[dict]: The design points, each one a full set of parameters
+    """
+    checkParameters(ranges)
+    if "isRoundRobin" in ranges:
+        raise ValueError("The policy is not sampled, use the policies argument instead")
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for name, (low, high) in ranges.items():
+        strata = (rng.permutation(numPoints) + rng.random(numPoints)) / numPoints
+        if isinstance(low, int) and isinstance(high, int):
+            columns[name] = [int(value) for value in low + np.floor(strata * (high - low + 1))]
+        else:
+            columns[name] = [float(value) for value in low + strata * (high - low)]
+    return [{**DEFAULT_POINT, **{name: values[x] for name, values in columns.items()}, "isRoundRobin": policy}
+            for x in range(numPoints) for policy in policies]
+
+
+def checkParameters(parameters: dict):
+    """
+    Checks that every parameter of a design can be set
+    Args:
+        parameters: The parameters of the design, keyed by name
+    """
+    unknown = [name for name in parameters if name not in PARAMETERS]
+    if unknown:
+        raise ValueError(f"Unknown parameters {unknown}, the parameters must be one of {PARAMETERS}")
+
+
+def getServiceRates(point: dict) -> dict:
+    """
+    Gets the service rates of a design point
+    Args:
+        point: The design point
+    Returns:
+        dict: The rates of the point, keyed the same way as SERVICE_RATES
+    """
+    return {name: point[name] for name in SERVICE_RATES}
+
+
+def getSweepKey(point: dict, seeds: dict, warmup: float) -> str:
+    """
+    Gets the cache key of a replication of a design point
+    Args:
+        point: The design point
+        seeds: The seeds of the replication
+        warmup: The warm-up period
+    Returns:
+        str: The key of the replication
+    """
+    return getReplicationKey(seeds, point["isRoundRobin"], warmup + SIMULATION_TIME - WARMUP_TIME, warmup,
+                             point["maxBufferSize"], getServiceRates(point))
+
+
+def runSweepReplication(point: dict, replication: int, warmup: float, cacheDirectory: str = None) -> Replication:
+    """
+    Run one replication of a design point. Replication x of every design point uses the same streams, so design points
+    are compared on common random numbers. This is a module level function so it can be sent to worker processes
+    Args:
+        point: The design point
+        replication: The index of the replication, which picks its streams
+        warmup: The warm-up period, the replication then runs for the same steady state period as Performance
+        cacheDirectory: If given, the replication is only run if its result is not already in this cache, and is
+                        added to it otherwise
+    Returns:
+        Replication: The statistics of the replication
+    """
+    seeds = RandomNumberGeneration.getReplicationSeeds(replication)
+    cache = ReplicationCache(cacheDirectory) if cacheDirectory is not None else None
+    if cache is not None:
+        key = getSweepKey(point, seeds, warmup)
+        result = cache.get(key)
+        if result is not None:
+            return result
+    sim = Simulation(seeds, point["isRoundRobin"], time=warmup + SIMULATION_TIME - WARMUP_TIME, warmup=warmup,
+                     maxBufferSize=point["maxBufferSize"], serviceRates=getServiceRates(point))
+    sim.run()
+    result = sim.getStatistics()
+    if cache is not None:
+        cache.put(key, result, sim.getXis())
+    return result
+
+
+def runSweepPoint(point: dict, numReplications: int, warmup: float, cacheDirectory: str = None) -> List[Replication]:
+    """
+    Run every replication of a design point at once with the VectorizedSimulation, with the same streams as
+    runSweepReplication. This is a module level function so it can be sent to worker processes
+    Args:
+        point: The design point
+        numReplications: The number of replications
+        warmup: The warm-up period
+        cacheDirectory: If given, only the replications that are not already in this cache are run, and they are
+                        added to it
+    Returns:
+        List[Replication]: The statistics of each replication
+    """
+    replicationSeeds = [RandomNumberGeneration.getReplicationSeeds(x) for x in range(numReplications)]
+    cache = ReplicationCache(cacheDirectory) if cacheDirectory is not None else None
+    keys = [getSweepKey(point, seeds, warmup) for seeds in replicationSeeds] if cache else []
+    replications = [cache.get(key) for key in keys] if cache else [None] * numReplications
+    missing = [x for x, replication in enumerate(replications) if replication is None]
+    if missing:
+        sim = VectorizedSimulation([replicationSeeds[x] for x in missing], point["isRoundRobin"],
+                                   warmup + SIMULATION_TIME - WARMUP_TIME, warmup, point["maxBufferSize"],
+                                   getServiceRates(point))
+        sim.run()
+        for row, (x, replication) in enumerate(zip(missing, sim.getStatistics())):
+            replications[x] = replication
+            if cache is not None:
+                cache.put(keys[x], replication, sim.getXis(row))
+    return replications
+
+
+class ParameterSweep:
+    """
+    Runs replications of every point of an experimental design on a pool of worker processes and collects the results
+    into one tidy table, with one row per design point and replication
+    """
+
+    def __init__(self, design: List[dict], numReplications: int, numWorkers: int = None, vectorized: bool = False,
+                 warmup: float = WARMUP_TIME, cacheDirectory: str = None):
+        """
+        Args:
+            design: The design points, such as the ones from gridDesign or latinHypercubeDesign
+            numReplications: The number of replications of each design point
+            numWorkers: The number of processes to run on, all cores if None
+            vectorized: If True, each worker runs all the replications of a design point at once with the
+                        VectorizedSimulation. Otherwise each worker runs one replication at a time
+            warmup: The warm-up period of every replication
+            cacheDirectory: If given, replications already in this cache are read from it instead of being run, and
+                            every replication that is run is added to it, so adding a design point only runs the
+                            new point
+        """
+        self.design = design
+        self.numReplications = numReplications
+        self.numWorkers = numWorkers
+        self.vectorized = vectorized
+        self.warmup = warmup
+        self.cacheDirectory = cacheDirectory
+        self.rows = []
+        self.metricHeaders = []
+
+    def run(self) -> List[list]:
+        """
+        Run every replication of every design point. Results are collected in design order whatever order the workers
+        finish in
+        Returns:
+            List[list]: The rows of the result table, laid out as getHeaders describes
+        """
+        numPoints = len(self.design)
+        with ProcessPoolExecutor(max_workers=self.numWorkers) as executor:
+            if self.vectorized:
+                results = executor.map(runSweepPoint, self.design, [self.numReplications] * numPoints,
+                                       [self.warmup] * numPoints, [self.cacheDirectory] * numPoints)
+                replications = [replication for point in results for replication in point]
+            else:
+                numTasks = numPoints * self.numReplications
+                chunkSize = max(1, numTasks // ((self.numWorkers or os.cpu_count() or 1) * 4))
+                replications = list(executor.map(
+                    runSweepReplication,
+                    [point for point in self.design for _ in range(self.numReplications)],
+                    [x for _ in self.design for x in range(self.numReplications)],
+                    [self.warmup] * numTasks, [self.cacheDirectory] * numTasks, chunksize=chunkSize))
+        self.rows = []
+        self.metricHeaders = replications[0].getReplicationHeaders()
+        for x, replication in enumerate(replications):
+            pointIndex, replicationIndex = divmod(x, self.numReplications)
+            point = self.design[pointIndex]
+            self.rows.append([pointIndex + 1] + [point[name] for name in PARAMETERS] + [replicationIndex + 1] +
+                             [float(value) for value in replication.getReplicationData()])
+        return self.rows
+
+    def summarize(self, confidence: float = 0.95) -> List[list]:
+        """
+        Summarizes the result table with the mean and the confidence interval half width of every metric at each
+        design point
+        Args:
+            confidence: The confidence level of the intervals
+        Returns:
+            List[list]: One row per design point, laid out as getSummaryHeaders describes
+        """
+        numParameters = len(PARAMETERS)
+        summary = []
+        for pointIndex in range(len(self.design)):
+            rows = self.rows[pointIndex * self.numReplications:(pointIndex + 1) * self.numReplications]
+            means, halfWidths = confidenceIntervals([row[numParameters + 2:] for row in rows], confidence)
+            summary.append(rows[0][:numParameters + 1] + [value for pair in zip(means, halfWidths)
+                                                          for value in map(float, pair)])
+        return summary
+
+    def write(self, filename: str):
+        """
+        Write the result table and its summary, which goes next to it with a _Summary suffix
+        Args:
+            filename: The name of the csv file of the result table
+        """
+        with open(filename, 'w', encoding='UTF8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(self.getHeaders())
+            writer.writerows(self.rows)
+        with open(filename.replace(".csv", "_Summary.csv"), 'w', encoding='UTF8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(self.getSummaryHeaders())
+            writer.writerows(self.summarize())
+
+    def getHeaders(self) -> List[str]:
+        """
+        Gets the headers of the result table
+        returns:
+            String[]: the design point number, its parameters, the replication number and the metrics
+        """
+        return ['Design Point #'] + PARAMETERS + ['Replication #'] + self.metricHeaders
+
+    def getSummaryHeaders(self) -> List[str]:
+        """
+        Gets the headers of the summary table
+        returns:
+            String[]: the design point number, its parameters and the mean and half width of every metric
+        """
+        return (['Design Point #'] + PARAMETERS +
+                [f"{header} {quantity}" for header in self.metricHeaders
+                 for quantity in ('Mean', 'Half Width')])
+
+
+def parseLevels(arguments: List[str], parse) -> dict:
+    """
+    Parses command line arguments of the form name=value,value,... into a dictionary
+    Args:
+        arguments: The arguments
+        parse: Converts each value
+    Returns:
+        dict: The values of each name
+    """
+    levels = {}
+    for argument in arguments or []:
+        name, values = argument.split("=", 1)
+        levels[name] = [parse(name, value) for value in values.split(",")]
+    return levels
+
+
+def parseValue(name: str, value: str):
+    """
+    Converts a command line value to the type of its parameter
+    """
+    if name == "isRoundRobin":
+        return value.lower() in ("1", "true", "roundrobin")
+    return int(value) if name == "maxBufferSize" else float(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run replications of the simulation over a design of parameters")
+    parser.add_argument("--level", action="append", metavar="NAME=V1,V2,...",
+                        help=f"levels of a parameter for a full grid, can be repeated. Parameters: {PARAMETERS}")
+    parser.add_argument("--range", action="append", metavar="NAME=LOW,HIGH",
+                        help="range of a parameter for a Latin hypercube sample, can be repeated")
+    parser.add_argument("--points", type=int, default=10, help="number of Latin hypercube points per policy")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the Latin hypercube sample")
+    parser.add_argument("--replications", type=int, default=10, help="replications of each design point")
+    parser.add_argument("--workers", type=int, default=None, help="number of processes, all cores by default")
+    parser.add_argument("--vectorized", action="store_true",
+                        help="run the replications of each design point at once with the vectorized engine")
+    parser.add_argument("--cache", nargs="?", const=CACHE_DIRECTORY, default=None, metavar="DIRECTORY",
+                        help=f"reuse replications already run from this directory (default {CACHE_DIRECTORY})")
+    parser.add_argument("--output", default="Parameter_Sweep.csv", help="csv file of the result table")
+    args = parser.parse_args()
+    if args.range:
+        ranges = {name: tuple(values) for name, values in parseLevels(args.range, parseValue).items()}
+        design = latinHypercubeDesign(ranges, args.points, args.seed)
+    else:
+        design = gridDesign(parseLevels(args.level, parseValue) or {"isRoundRobin": [True, False]})
+    sweep = ParameterSweep(design, args.replications, args.workers, args.vectorized, cacheDirectory=args.cache)
+    sweep.run()
+    sweep.write(args.output)
+    print(f"Ran {len(design)} design points with {args.replications} replications each, written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
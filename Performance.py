@@ -1,52 +1,543 @@
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Dict, List
+from Profiling import ProfiledSimulation, SimulationProfile
+from InputModelling import getFittedServiceRates, getFittedTopology
+from OutputAnalysis import confidenceIntervals, getConfidenceIntervalRows, pairedConfidenceIntervals, relativeHalfWidths
 from RandomNumberGeneration import RandomNumberGeneration
-from Simulation import Simulation
+from Replication import Replication
+from ReplicationCache import CACHE_DIRECTORY, ReplicationCache, getReplicationKey
+from SchedulerType import SchedulerType
+from Simulation import Simulation, SIMULATION_TIME, WARMUP_TIME
+from Topology import DEFAULT_TOPOLOGY, getStreamKeys
+from VectorizedSimulation import VectorizedSimulation
+from WarmupDetection import WarmupDetector
+import argparse
 import csv
+import os
 
 IS_ROUND_ROBIN = True
+STEADY_STATE_TIME = SIMULATION_TIME - WARMUP_TIME
+# the future event list backends that can be chosen on the command line
+SCHEDULERS = {"heap": SchedulerType.HEAP, "calendar": SchedulerType.CALENDAR}
+
+
+def runReplication(seeds: Dict[int, int], isRoundRobin: bool, warmup: float = WARMUP_TIME,
+                   cacheDirectory: str = None, profile: bool = False, serviceRates: dict = None,
+                   topology: dict = None, schedulerType: SchedulerType = SchedulerType.HEAP) -> Replication:
+    """
+    Run a single replication of the simulation. This is a module level function so it can be sent to worker processes
+    Args:
+        seeds: The seeds for each of the simulation's random number streams
+        isRoundRobin: If True, the inspectors use the round robin policy. Otherwise the original priority policy
+        warmup: The warm-up period, the replication then runs for STEADY_STATE_TIME minutes after it
+        cacheDirectory: If given, the replication is only run if its result is not already in this cache, and is
+                        added to it otherwise
+        profile: If True, the replication is run by a ProfiledSimulation and its profile is attached to the result.
+                 It is then always run, so that it can be measured
+        serviceRates: Rates that replace the ones in SERVICE_RATES, keyed the same way
+        topology: The factory to simulate, the factory of the project if None
+        schedulerType: The backend of the future event list, which does not change the results
+    Returns:
+        Replication: The statistics of the replication
+    """
+    cache = ReplicationCache(cacheDirectory) if cacheDirectory is not None else None
+    key = getReplicationKey(seeds, isRoundRobin, warmup + STEADY_STATE_TIME, warmup, serviceRates=serviceRates,
+                            topology=topology) if cache is not None else None
+    if cache is not None and not profile:
+        replication = cache.get(key)
+        if replication is not None:
+            return replication
+    simulationType = ProfiledSimulation if profile else Simulation
+    sim = simulationType(seeds, isRoundRobin, time=warmup + STEADY_STATE_TIME, warmup=warmup,
+                         serviceRates=serviceRates, topology=topology, schedulerType=schedulerType)
+    sim.run()
+    replication = sim.getStatistics()
+    if cache is not None:
+        cache.put(key, replication, sim.getXis())
+    return replication
+
+
+def runVectorizedReplications(replicationSeeds: List[Dict[int, int]], isRoundRobin: bool, warmup: float = WARMUP_TIME,
+                              cacheDirectory: str = None, serviceRates: dict = None,
+                              topology: dict = None) -> List[Replication]:
+    """
+    Run replications at once with the VectorizedSimulation, giving the same results as running each one with
+    runReplication. With a cache, only the replications that are not already in it are run
+    Args:
+        replicationSeeds: The seeds of each replication
+        isRoundRobin: If True, the inspectors use the round robin policy. Otherwise the original priority policy
+        warmup: The warm-up period, the replications then run for STEADY_STATE_TIME minutes after it
+        cacheDirectory: If given, the cache to take finished replications from and add new ones to
+        serviceRates: Rates that replace the ones in SERVICE_RATES, keyed the same way
+        topology: The factory to simulate, the factory of the project if None. Its times must all be exponential
+    Returns:
+        List[Replication]: The statistics of each replication, in the order of their seeds
+    """
+    time = warmup + STEADY_STATE_TIME
+    cache = ReplicationCache(cacheDirectory) if cacheDirectory is not None else None
+    keys = [getReplicationKey(seeds, isRoundRobin, time, warmup, serviceRates=serviceRates, topology=topology)
+            for seeds in replicationSeeds] if cache else []
+    replications = [cache.get(key) for key in keys] if cache else [None] * len(replicationSeeds)
+    missing = [x for x, replication in enumerate(replications) if replication is None]
+    if missing:
+        sim = VectorizedSimulation([replicationSeeds[x] for x in missing], isRoundRobin, time, warmup,
+                                   serviceRates=serviceRates, topology=topology)
+        sim.run()
+        for row, (x, replication) in enumerate(zip(missing, sim.getStatistics())):
+            replications[x] = replication
+            if cache is not None:
+                cache.put(keys[x], replication, sim.getXis(row))
+    return replications
+
+
+def getReplicationSeeds(numReplications: int, numStreams: int = None, first: int = 0) -> List[Dict[int, int]]:
+    """
+    Assign every replication its own set of streams up front, so that replications do not depend on each other
+    Args:
+        numReplications: The number of replications to create seeds for
+        numStreams: The number of streams of the factory being simulated, numStreams of the project's factory if None
+        first: The index of the first replication to create seeds for
+    Returns:
+        List[Dict[int, int]]: The seeds for each replication, keyed the same way the simulation expects
+    """
+    return [RandomNumberGeneration.getReplicationSeeds(x, numStreams) for x in range(first, first + numReplications)]
+
 
 class Performance:
-    def __init__(self, numReplications: int):
+    def __init__(self, numReplications: int, numWorkers: int = None, vectorized: bool = False,
+                 cacheDirectory: str = None, profile: bool = False, serviceRates: dict = None, topology: dict = None,
+                 schedulerType: SchedulerType = SchedulerType.HEAP):
+        """
+        Args:
+            numReplications: The number of replications to run
+            numWorkers: The number of processes to run replications on. If None, replications run one after another,
+                        each one continuing the random number streams of the previous one
+            vectorized: If True, all replications are run at once by the VectorizedSimulation, with the same streams
+                        as the parallel mode
+            cacheDirectory: If given, replications already in this cache are read from it instead of being run, and
+                            every replication that is run is added to it, so an interrupted run can be resumed
+            profile: If True, every replication is profiled and the profile is written next to its statistics. Not
+                     available with the vectorized engine, which has no per replication handlers
+            serviceRates: Rates that replace the ones in SERVICE_RATES in every run mode, keyed the same way, e.g. the
+                          rates InputModelling.getFittedServiceRates fits to the data files
+            topology: The factory to simulate in every run mode, e.g. the one InputModelling.getFittedTopology gives
+                      with the distribution chosen for each data file. The factory of the project if None
+            schedulerType: The backend of the future event list of every Simulation, the calendar queue pays off for
+                           factories with very many entities. The vectorized engine has no future event list
+        """
+        if vectorized and profile:
+            raise ValueError("Replications run by the vectorized engine cannot be profiled")
         self.replications = []
         self.numReplications = numReplications
+        self.numWorkers = numWorkers
+        self.vectorized = vectorized
+        self.confidenceIntervals = None
+        self.warmup = WARMUP_TIME
+        self.cacheDirectory = cacheDirectory
+        self.profile = profile
+        self.serviceRates = serviceRates
+        self.topology = topology
+        self.schedulerType = schedulerType
+        self.numStreams = len(getStreamKeys(topology if topology is not None else DEFAULT_TOPOLOGY))
 
     def run(self):
         """
         Run the specified number of replications and keep track of each one
         """
-        g1 = RandomNumberGeneration(0, 0.0)
-        seeds = g1.generateRandomNumberStreams(100000, 7)
+        with open(self.getFilename(), 'w', encoding='UTF8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(self.getHeaders() + self.getProfileHeaders())
+            if self.vectorized:
+                self.runVectorized(writer)
+            elif self.numWorkers is None:
+                self.runSequential(writer)
+            else:
+                self.runParallel(writer)
 
-        filename = "RoundRobin_Production_Run.csv" if IS_ROUND_ROBIN else "Priority_Queue_Production_Run.csv"
+    def runUntilPrecise(self, targetPrecision: float, metrics: List[str] = None, minReplications: int = 5,
+                        confidence: float = 0.95):
+        """
+        Keep running replications until the confidence interval of every chosen metric has a half width of at most
+        targetPrecision relative to its mean, or until numReplications replications have been run. Replications get
+        the same streams as in the parallel mode and are run numWorkers at a time. The final confidence intervals of
+        every column are written next to the production run csv
+        Args:
+            targetPrecision: The largest acceptable half width relative to the mean, e.g. 0.01 for 1%
+            metrics: The headers of the columns that must reach the target precision, the throughput by default
+            minReplications: The number of replications to run before checking the precision
+            confidence: The confidence level of the intervals
+        Raises:
+            ValueError: If a metric is unknown, or fewer than minReplications replications may be run, since the
+                        precision would then never be checked
+        """
+        if self.numReplications < minReplications:
+            raise ValueError(f"At most {self.numReplications} replications may be run, fewer than the "
+                             f"{minReplications} needed before the precision is checked")
+        metrics = metrics if metrics else ['Throughput']
+        headers = self.getHeaders()[1:]
+        unknown = [metric for metric in metrics if metric not in headers]
+        if unknown:
+            raise ValueError(f"Unknown metrics {unknown}, the metrics must be one of {headers}")
+        metricColumns = [headers.index(metric) for metric in metrics]
+        batchSize = max(self.numWorkers or 1, 1)
+        executor = ProcessPoolExecutor(max_workers=batchSize) if batchSize > 1 else None
+        try:
+            with open(self.getFilename(), 'w', encoding='UTF8', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(self.getHeaders() + self.getProfileHeaders())
+                while len(self.replications) < self.numReplications:
+                    first = len(self.replications)
+                    count = min(max(batchSize, minReplications - first), self.numReplications - first)
+                    replicationSeeds = getReplicationSeeds(count, self.numStreams, first)
+                    runner = executor.map if executor is not None else map
+                    self.recordReplications(writer, runner(runReplication, replicationSeeds, repeat(IS_ROUND_ROBIN),
+                                                           repeat(self.warmup), repeat(self.cacheDirectory), repeat(self.profile),
+                                                           repeat(self.serviceRates), repeat(self.topology),
+                                                           repeat(self.schedulerType)), first)
+                    if len(self.replications) < minReplications:
+                        continue
+                    means, halfWidths = confidenceIntervals(
+                        [replication.getReplicationData() for replication in self.replications], confidence)
+                    self.confidenceIntervals = (means, halfWidths)
+                    relative = relativeHalfWidths(means, halfWidths)[metricColumns]
+                    print(f"\nRelative half widths after {len(self.replications)} replications: " +
+                          str({metric: float(value) for metric, value in zip(metrics, relative)}))
+                    if (relative <= targetPrecision).all():
+                        break
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        if self.confidenceIntervals is None:
+            return
+        if (relative <= targetPrecision).all():
+            print(f"\nTarget precision reached after {len(self.replications)} replications")
+        else:
+            print(f"\nTarget precision not reached within {self.numReplications} replications")
+        with open(self.getFilename().replace(".csv", "_Confidence_Intervals.csv"), 'w', encoding='UTF8', newline='') as f:
+            csv.writer(f).writerows(getConfidenceIntervalRows(headers, *self.confidenceIntervals))
+
+    def runBatchMeans(self, batchLength: float, numBatches: int = 30, metrics: List[str] = None,
+                      confidence: float = 0.95):
+        """
+        Run one long replication split into batches instead of many replications, so the warm-up is only paid once.
+        The batch size grows until the batch means of the chosen metrics are close to independent. Each batch is
+        written to a batch means csv and the confidence intervals from the batch means next to it
+        Args:
+            batchLength: The length of the smallest batch, in minutes
+            numBatches: The number of batches
+            metrics: The headers of the columns whose batch means must be close to independent, the throughput by
+                     default
+            confidence: The confidence level of the intervals
+        """
+        sim = Simulation(RandomNumberGeneration.getReplicationSeeds(0, self.numStreams), IS_ROUND_ROBIN,
+                         warmup=self.warmup, serviceRates=self.serviceRates, topology=self.topology,
+                         schedulerType=self.schedulerType)
+        batches = sim.runBatchMeans(batchLength, numBatches, metrics)
+        headers = self.getHeaders()[1:]
+        print(f"\nBatches of {sim.batchSize * batchLength} minutes, lag-1 autocorrelations: " +
+              str({header: float(value) for header, value in zip(headers, sim.batchAutocorrelations)}))
+        filename = self.getFilename().replace("Production_Run", "Batch_Means")
         with open(filename, 'w', encoding='UTF8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['Batch #'] + headers)
+            for x, batch in enumerate(batches):
+                writer.writerow([str(x + 1)] + batch.getReplicationData())
+        self.confidenceIntervals = confidenceIntervals([batch.getReplicationData() for batch in batches], confidence)
+        with open(filename.replace(".csv", "_Confidence_Intervals.csv"), 'w', encoding='UTF8', newline='') as f:
+            csv.writer(f).writerows(getConfidenceIntervalRows(headers, *self.confidenceIntervals))
+
+    def runSequential(self, writer):
+        """
+        Run the replications one after another, seeding each replication with where the previous one left off
+        Args:
+            writer: The csv writer to write each replication to
+        """
+        g1 = RandomNumberGeneration(0, 0.0)
+        seeds = g1.generateRandomNumberStreams(RandomNumberGeneration.streamSpacing, self.numStreams)
+        cache = ReplicationCache(self.cacheDirectory) if self.cacheDirectory is not None else None
+        time = self.warmup + STEADY_STATE_TIME
+        for x in range(self.numReplications):
+            print(f"\n------------------------------------Replication {x + 1}------------------------------------")
+            print(f"\nSeeds being used: " + str(seeds))
+            key = getReplicationKey(seeds, IS_ROUND_ROBIN, time, self.warmup, serviceRates=self.serviceRates,
+                                    topology=self.topology) if cache is not None else None
+            xis = cache.getXis(key) if cache is not None and not self.profile else None
+            if xis is not None:
+                self.recordReplication(writer, x, cache.get(key))
+                seeds = xis
+                continue
+            simulationType = ProfiledSimulation if self.profile else Simulation
+            sim = simulationType(seeds, IS_ROUND_ROBIN, time=time, warmup=self.warmup, serviceRates=self.serviceRates,
+                                 topology=self.topology, schedulerType=self.schedulerType)
+            sim.run()
+            seeds = sim.getXis()
+            if cache is not None:
+                cache.put(key, sim.getStatistics(), seeds)
+            self.recordReplication(writer, x, sim.getStatistics())
+
+    def runParallel(self, writer):
+        """
+        Run the replications on a pool of worker processes. Every replication gets its own streams up front, so the
+        results are the same no matter how many workers are used. Results are written in replication order
+        Args:
+            writer: The csv writer to write each replication to
+        """
+        replicationSeeds = getReplicationSeeds(self.numReplications, self.numStreams)
+        if self.numWorkers <= 1:
+            self.recordReplications(writer, map(runReplication, replicationSeeds, repeat(IS_ROUND_ROBIN),
+                                                repeat(self.warmup), repeat(self.cacheDirectory), repeat(self.profile),
+                                                repeat(self.serviceRates), repeat(self.topology),
+                                                repeat(self.schedulerType)))
+            return
+        with ProcessPoolExecutor(max_workers=self.numWorkers) as executor:
+            self.recordReplications(writer, executor.map(runReplication, replicationSeeds, repeat(IS_ROUND_ROBIN),
+                                                         repeat(self.warmup), repeat(self.cacheDirectory), repeat(self.profile),
+                                                         repeat(self.serviceRates), repeat(self.topology),
+                                                         repeat(self.schedulerType)))
+
+    def runVectorized(self, writer):
+        """
+        Run all the replications in lockstep with the VectorizedSimulation. Every replication gets the same streams as
+        in the parallel mode, so the results are the same as a parallel run
+        Args:
+            writer: The csv writer to write each replication to
+        """
+        replicationSeeds = getReplicationSeeds(self.numReplications, self.numStreams)
+        replications = runVectorizedReplications(replicationSeeds, IS_ROUND_ROBIN, self.warmup, self.cacheDirectory,
+                                                 self.serviceRates, self.topology)
+        print("Simulation successfully completed")
+        self.recordReplications(writer, replications)
+
+    def comparePolicies(self, confidence: float = 0.95):
+        """
+        Run every replication with both the round robin and the priority policy on the same streams, so that the
+        policies see the same inspection and service times, and compute confidence intervals for the difference of
+        each column (round robin minus priority). Both policies are run in the same pool or vectorized run. The
+        differences of each replication and their confidence intervals are written to the policy comparison csv
+        Args:
+            confidence: The confidence level of the intervals
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: The mean and the half width of the interval of each difference
+        """
+        replicationSeeds = getReplicationSeeds(self.numReplications, self.numStreams)
+        if self.vectorized:
+            replications = []
+            for isRoundRobin in (True, False):
+                replications += runVectorizedReplications(replicationSeeds, isRoundRobin, self.warmup,
+                                                          self.cacheDirectory, self.serviceRates, self.topology)
+        else:
+            policies = [True] * self.numReplications + [False] * self.numReplications
+            if self.numWorkers is None or self.numWorkers <= 1:
+                replications = list(map(runReplication, replicationSeeds * 2, policies, repeat(self.warmup),
+                                        repeat(self.cacheDirectory), repeat(self.profile),
+                                        repeat(self.serviceRates), repeat(self.topology),
+                                        repeat(self.schedulerType)))
+            else:
+                with ProcessPoolExecutor(max_workers=self.numWorkers) as executor:
+                    replications = list(executor.map(runReplication, replicationSeeds * 2, policies,
+                                                     repeat(self.warmup), repeat(self.cacheDirectory), repeat(self.profile),
+                                                     repeat(self.serviceRates), repeat(self.topology),
+                                                     repeat(self.schedulerType)))
+        roundRobin = [replication.getReplicationData() for replication in replications[:self.numReplications]]
+        priority = [replication.getReplicationData() for replication in replications[self.numReplications:]]
+        means, halfWidths, ratios = pairedConfidenceIntervals(roundRobin, priority, confidence)
+        self.confidenceIntervals = (means, halfWidths)
+        headers = self.getHeaders()[1:]
+        print(f"\nRound robin minus priority over {self.numReplications} paired replications:")
+        for header, mean, halfWidth, ratio in zip(headers, means, halfWidths, ratios):
+            print(f"{header}: {mean} +/- {halfWidth} (variance {ratio:.3f} of independent runs)")
+        with open("Policy_Comparison.csv", 'w', encoding='UTF8', newline='') as f:
             writer = csv.writer(f)
             writer.writerow(self.getHeaders())
-            for x in range(self.numReplications):
-                print(f"\n------------------------------------Replication {x + 1}------------------------------------")
-                print(f"\nSeeds being used: " + str(seeds))
-                sim = Simulation(seeds, IS_ROUND_ROBIN)
-                sim.run()
-                seeds = sim.getXis()
-                replication = sim.getStatistics()
-                self.replications.append(replication)
-                replication.printStats()
-                row = replication.getReplicationData()
-                row.insert(0, str(x+1))
-                writer.writerow(row)
+            for x, (first, second) in enumerate(zip(roundRobin, priority)):
+                writer.writerow([str(x + 1)] + [float(a) - float(b) for a, b in zip(first, second)])
+        with open("Policy_Comparison_Confidence_Intervals.csv", 'w', encoding='UTF8', newline='') as f:
+            rows = getConfidenceIntervalRows(headers, means, halfWidths)
+            rows[0].append('Variance Ratio To Independent Runs')
+            for row, ratio in zip(rows[1:], ratios):
+                row.append(ratio)
+            csv.writer(f).writerows(rows)
+        return self.confidenceIntervals
+
+    def detectWarmup(self, numPilots: int = 5, pilotTime: float = SIMULATION_TIME, interval: float = 10):
+        """
+        Choose the warm-up period with MSER-5 from pilot runs, which then applies to every run mode. The pilot runs
+        use the streams of the first replications of the parallel mode
+        Args:
+            numPilots: The number of pilot runs
+            pilotTime: The length of each pilot run, in minutes
+            interval: The length of each observation interval of the pilot runs, in minutes
+        Returns:
+            float: The chosen warm-up period, in minutes
+        """
+        detector = WarmupDetector(IS_ROUND_ROBIN, pilotTime, interval, self.serviceRates, self.topology)
+        detector.runPilots(getReplicationSeeds(numPilots, self.numStreams))
+        self.warmup = detector.detect()
+        print(f"\nWarm-up period chosen by MSER-5: {self.warmup} minutes")
+        return self.warmup
+
+    def runSingle(self, replicationNumber: int, time: float = None, checkpointPath: str = None,
+                  checkpointInterval: float = 1000, tracePath: str = None) -> Replication:
+        """
+        Rerun one replication of a parallel run on its own, with the same streams it is assigned in the parallel run
+        Args:
+            replicationNumber: The replication number as written in the csv file, starting at 1
+            time: The time the replication ends at, the usual STEADY_STATE_TIME minutes after the warm-up if None
+            checkpointPath: If given, the replication is saved to this file every checkpointInterval minutes of
+                            simulated time. If the file already exists, the replication resumes from it instead of
+                            starting over. The file is removed once the replication finishes
+            checkpointInterval: The simulated time between checkpoints, in minutes
+            tracePath: If given, every event is recorded to this binary trace file, see TraceRecorder.readTrace
+        Returns:
+            Replication: The statistics of the replication
+        """
+        seeds = RandomNumberGeneration.getReplicationSeeds(replicationNumber - 1, self.numStreams)
+        print(f"\n------------------------------------Replication {replicationNumber}------------------------------------")
+        print(f"\nSeeds being used: " + str(seeds))
+        time = time if time is not None else self.warmup + STEADY_STATE_TIME
+        simulationType = ProfiledSimulation if self.profile else Simulation
+        if checkpointPath is None:
+            sim = simulationType(seeds, IS_ROUND_ROBIN, time=time, warmup=self.warmup, serviceRates=self.serviceRates,
+                                 topology=self.topology, schedulerType=self.schedulerType)
+        elif os.path.exists(checkpointPath):
+            sim = Simulation.loadCheckpoint(checkpointPath)
+            print(f"\nResuming from the checkpoint at {sim.clock} minutes")
+        else:
+            sim = simulationType(seeds, IS_ROUND_ROBIN, time=time, warmup=self.warmup, serviceRates=self.serviceRates,
+                                 topology=self.topology, schedulerType=self.schedulerType)
+            sim.enableCheckpoints(checkpointPath, checkpointInterval)
+        if tracePath is not None and sim.trace is None:
+            sim.enableTracing(tracePath)
+        sim.run()
+        if checkpointPath is not None and os.path.exists(checkpointPath):
+            os.remove(checkpointPath)
+        replication = sim.getStatistics()
+        replication.printStats()
+        return replication
+
+    def recordReplications(self, writer, replications, first: int = 0):
+        """
+        Record replications in the order they are given
+        Args:
+            writer: The csv writer to write each replication to
+            replications: Iterable of the replications' statistics in replication order
+            first: The index of the first replication given
+        """
+        for x, replication in enumerate(replications, first):
+            print(f"\n------------------------------------Replication {x + 1}------------------------------------")
+            self.recordReplication(writer, x, replication)
+
+    def recordReplication(self, writer, x: int, replication: Replication):
+        """
+        Keep track of a finished replication and write it to the output csv file
+        Args:
+            writer: The csv writer to write the replication to
+            x: The index of the replication
+            replication: The statistics of the replication
+        """
+        self.replications.append(replication)
+        replication.printStats()
+        row = replication.getReplicationData()
+        row.insert(0, str(x+1))
+        if replication.getProfile() is not None:
+            row += replication.getProfile().getProfileData()
+        writer.writerow(row)
+
+    def getFilename(self) -> str:
+        """
+        Gets the name of the output csv file for the policy being run
+        returns:
+            String: the name of the output csv file
+        """
+        return "RoundRobin_Production_Run.csv" if IS_ROUND_ROBIN else "Priority_Queue_Production_Run.csv"
+
+    def getProfileHeaders(self):
+        """
+        Gets the headers of the profile columns written after the statistics of each replication when profiling
+        returns:
+            String[]: the headers of the profile columns, none if not profiling
+        """
+        return SimulationProfile().getProfileHeaders() if self.profile else []
 
     def getHeaders(self):
         """
-        Gets the headers used in the output csv file
+        Gets the headers used in the output csv file. They are taken from the statistics of a simulation of the
+        topology that has not been run, so they match the columns of its replications whatever the factory
         returns:
             String[]: the headers for the output csv file
         """
-        return ['Replication #', 'Throughput', 'Workstation 1 Busy Prob', 'Workstation 2 Busy Prob', 'Workstation 3 Busy Prob',
-         'Inspector 1 Blocked Prob', 'Inspector 2 Blocked Prob', 'Buffer 1 Occupancy Average','Buffer 2 Occupancy Average', 'Buffer 3 Occupancy Average',
-         'Buffer 4 Occupancy Average', 'Buffer 5 Occupancy Average']
+        sim = Simulation(RandomNumberGeneration.getReplicationSeeds(0, self.numStreams), IS_ROUND_ROBIN,
+                         warmup=self.warmup, serviceRates=self.serviceRates, topology=self.topology)
+        return ['Replication #'] + sim.getStatistics().getReplicationHeaders()
 
 def main():
-    per = Performance(20)
-    per.run()
+    parser = argparse.ArgumentParser(description="Run the production runs of the simulation")
+    parser.add_argument("--replications", type=int, default=20, help="number of replications to run")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="run replications in parallel on this many processes, each with its own streams")
+    parser.add_argument("--vectorized", action="store_true",
+                        help="run all replications at once with the vectorized engine, using the parallel mode's streams")
+    parser.add_argument("--precision", type=float, default=None,
+                        help="keep running replications until the confidence intervals of the chosen metrics have at "
+                             "most this half width relative to their mean, --replications is then the maximum")
+    parser.add_argument("--metric", action="append", default=None,
+                        help="a csv column that must reach the precision, can be repeated (default: Throughput)")
+    parser.add_argument("--min-replications", type=int, default=5,
+                        help="replications to run before checking the precision")
+    parser.add_argument("--batch-means", type=float, default=None, metavar="BATCH_LENGTH",
+                        help="run one long replication split into batches of at least this many minutes instead")
+    parser.add_argument("--batches", type=int, default=30, help="number of batches for --batch-means")
+    parser.add_argument("--auto-warmup", action="store_true",
+                        help="choose the warm-up period with MSER-5 from pilot runs instead of using 600 minutes")
+    parser.add_argument("--compare-policies", action="store_true",
+                        help="run both policies on the same streams and give confidence intervals of their difference")
+    parser.add_argument("--cache", nargs="?", const=CACHE_DIRECTORY, default=None, metavar="DIRECTORY",
+                        help=f"reuse replications already run with the same configuration and seeds from this "
+                             f"directory (default {CACHE_DIRECTORY}), and add new ones to it")
+    parser.add_argument("--replication", type=int, default=None,
+                        help="only rerun this replication number of a parallel run and print its statistics")
+    parser.add_argument("--time", type=float, default=None,
+                        help="with --replication, the time the replication ends at instead of 6000 minutes after the "
+                             "warm-up")
+    parser.add_argument("--checkpoint", default=None, metavar="FILE",
+                        help="with --replication, save the replication to this file periodically and resume from it "
+                             "if it exists")
+    parser.add_argument("--checkpoint-interval", type=float, default=1000,
+                        help="simulated minutes between checkpoints")
+    parser.add_argument("--trace", default=None, metavar="FILE",
+                        help="with --replication, record every event to this binary trace file")
+    parser.add_argument("--profile", action="store_true",
+                        help="measure events per type, time per handler, events per second and the longest future "
+                             "event list of every replication and add them to the csv")
+    parser.add_argument("--fitted-rates", action="store_true",
+                        help="fit the rates to the data files with InputModelling instead of using SERVICE_RATES, so "
+                             "new measurements are used without editing the code")
+    parser.add_argument("--fitted-distributions", action="store_true",
+                        help="sample every time from the distribution InputModelling chooses for its data file, with "
+                             "the fitted parameters, instead of the exponential with the rate in SERVICE_RATES")
+    parser.add_argument("--scheduler", choices=SCHEDULERS, default="heap",
+                        help="the future event list backend, the calendar queue suits very large factories")
+    args = parser.parse_args()
+    if args.fitted_rates and args.fitted_distributions:
+        parser.error("--fitted-rates and --fitted-distributions cannot be used together")
+    serviceRates = getFittedServiceRates() if args.fitted_rates else None
+    topology = getFittedTopology() if args.fitted_distributions else None
+    per = Performance(args.replications, args.workers, args.vectorized, args.cache, args.profile, serviceRates,
+                      topology, SCHEDULERS[args.scheduler])
+    if args.auto_warmup:
+        per.detectWarmup()
+    if args.replication is not None:
+        per.runSingle(args.replication, args.time, args.checkpoint, args.checkpoint_interval, args.trace)
+    elif args.compare_policies:
+        per.comparePolicies()
+    elif args.batch_means is not None:
+        per.runBatchMeans(args.batch_means, args.batches, args.metric)
+    elif args.precision is not None:
+        per.runUntilPrecise(args.precision, args.metric, args.min_replications)
+    else:
+        per.run()
 
 
 if __name__ == "__main__":
-   main()
\ No newline at end of file
+   main()
@@ -0,0 +1,145 @@
+from typing import Iterator, List
+from Event import Event
+from EventType import EventType
+from Scheduler import Scheduler
+from Simulation import Simulation
+from time import perf_counter
+
+# the Simulation handlers that are timed
+HANDLERS = ["handleInspectorStarted", "handleInspectorDone", "handleWorkstationStarted", "handleWorkstationDone"]
+
+
+class SimulationProfile:
+    """
+    Where a simulation spent its time: the number of events of each type, the wall time spent in each handler, the
+    longest the future event list got and the wall time spent running
+    """
+
+    def __init__(self):
+        self.eventCounts = {eventType: 0 for eventType in EventType}
+        self.handlerTimes = {handler: 0.0 for handler in HANDLERS}
+        self.felHighWaterMark = 0
+        self.wallTime = 0.0
+
+    def getNumEvents(self) -> int:
+        """
+        Get the number of events processed
+        Returns: The number of events of every type
+        """
+        return sum(self.eventCounts.values())
+
+    def getEventsPerSecond(self) -> float:
+        """
+        Get the number of events processed per second of wall time spent running
+        Returns: The events per second, 0 if the simulation has not run
+        """
+        return self.getNumEvents() / self.wallTime if self.wallTime > 0 else 0.0
+
+    def getProfileHeaders(self) -> List[str]:
+        """
+        Gets the name of each measurement, in the same order as getProfileData
+        Returns: List of the names of the measurements
+        """
+        headers = ['Events', 'Events Per Second', 'Wall Time', 'FEL High Water Mark']
+        headers += [f'{eventType.value} Events' for eventType in self.eventCounts]
+        headers += [f'{handler} Time' for handler in self.handlerTimes]
+        return headers
+
+    def getProfileData(self) -> list:
+        """
+        Gets a list of all the measurements
+        Returns: List of all the measurements, times in seconds
+        """
+        data = [self.getNumEvents(), self.getEventsPerSecond(), self.wallTime, self.felHighWaterMark]
+        data += list(self.eventCounts.values())
+        data += list(self.handlerTimes.values())
+        return data
+
+    def printProfile(self):
+        """
+        Print the measurements
+        """
+        print(f"Events: {self.getNumEvents()} in {self.wallTime:.3f} s, {self.getEventsPerSecond():.0f} events/s")
+        print(f"FEL High Water Mark: {self.felHighWaterMark}")
+        print(f"Events Per Type: {({eventType.name: count for eventType, count in self.eventCounts.items()})}")
+        print(f"Seconds Per Handler: {self.handlerTimes}")
+
+
+class ProfilingScheduler:
+    """
+    Wraps a future event list to count the events taken off it by type and keep track of its longest length
+    """
+
+    def __init__(self, scheduler: Scheduler, profile: SimulationProfile):
+        self.scheduler = scheduler
+        self.profile = profile
+
+    def push(self, event: Event):
+        self.scheduler.push(event)
+
+    def pop(self) -> Event:
+        # events are only added between pops, so the list is at its longest right before one
+        length = len(self.scheduler)
+        if length > self.profile.felHighWaterMark:
+            self.profile.felHighWaterMark = length
+        event = self.scheduler.pop()
+        self.profile.eventCounts[event.getEventType()] += 1
+        return event
+
+    def entries(self) -> List[tuple]:
+        return self.scheduler.entries()
+
+    def __len__(self) -> int:
+        return len(self.scheduler)
+
+    def __iter__(self) -> Iterator[Event]:
+        return iter(self.scheduler)
+
+
+class ProfiledSimulation(Simulation):
+    """
+    A Simulation that measures where it spends its time. The measurements live in this subclass only, so a plain
+    Simulation does not pay for them at all. The profile is attached to the Replication from getStatistics
+    """
+
+    def __init__(self, *args, **kwargs):
+        """
+        Takes the same arguments as the Simulation
+        """
+        self.profile = SimulationProfile()
+        Simulation.__init__(self, *args, **kwargs)
+        self.fel = ProfilingScheduler(self.fel, self.profile)
+
+    def run(self):
+        start = perf_counter()
+        Simulation.run(self)
+        self.profile.wallTime += perf_counter() - start
+
+    def handleInspectorStarted(self, event: Event) -> List[Event]:
+        start = perf_counter()
+        events = Simulation.handleInspectorStarted(self, event)
+        self.profile.handlerTimes["handleInspectorStarted"] += perf_counter() - start
+        return events
+
+    def handleInspectorDone(self, event: Event) -> List[Event]:
+        start = perf_counter()
+        events = Simulation.handleInspectorDone(self, event)
+        self.profile.handlerTimes["handleInspectorDone"] += perf_counter() - start
+        return events
+
+    def handleWorkstationStarted(self, event: Event) -> List[Event]:
+        start = perf_counter()
+        events = Simulation.handleWorkstationStarted(self, event)
+        self.profile.handlerTimes["handleWorkstationStarted"] += perf_counter() - start
+        return events
+
+    def handleWorkstationDone(self, event: Event) -> List[Event]:
+        start = perf_counter()
+        events = Simulation.handleWorkstationDone(self, event)
+        self.profile.handlerTimes["handleWorkstationDone"] += perf_counter() - start
+        return events
+
+    def getStatistics(self):
+        replication = Simulation.getStatistics(self)
+        replication.setProfile(self.profile)
+        return replication
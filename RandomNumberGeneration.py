@@ -7,21 +7,63 @@ class RandomNumberGeneration:
     c = 0
     m = 2147483647
     x0 = 1234567
+    ## Each stream is this many numbers apart and every replication of the simulation uses this many streams
+    streamSpacing = 100000
+    numStreams = 7
 
-    def __init__(self, xi: int, lmbda: float):
+    ## Multipliers and increments taking xi to each of the next blockSize values, cached per block size
+    blockSteps = {}
+
+    def __init__(self, xi: int, lmbda: float, blockSize: int = 0):
         """
         Initialize the random number generator
         Args:
             xi: The initial seed value
             lmbda: The lambda value for this exponential number generator
+            blockSize: If greater than 0, service times are generated this many at a time with NumPy and served from
+                       a buffer. The sequence of service times is the same either way
         """
         self.xi = xi
         self.lmbda = lmbda
         self.ri = -1.0
+        self.blockSize = blockSize
+        self.blockXis = None
+        self.blockServiceTimes = None
+        self.blockIndex = 0
 
     def getXi(self):
+        """
+        Get the current xi value of this generator
+        Returns: The current xi value
+        """
+        self.__discardBlock()
         return self.xi
 
+    def setXi(self, xi: int):
+        """
+        Restart this generator from another xi value, such as the seed of another stream
+        Args:
+            xi: The new xi value
+        """
+        self.__discardBlock()
+        self.xi = xi
+
+    def getLambda(self) -> float:
+        """
+        Get the lambda value of this exponential number generator
+        Returns: The lambda value
+        """
+        return self.lmbda
+
+    def setLambda(self, lmbda: float):
+        """
+        Change the lambda value of this exponential number generator for the numbers generated from now on
+        Args:
+            lmbda: The new lambda value
+        """
+        self.__discardBlock()
+        self.lmbda = lmbda
+
     def generateRandomServiceTime(self) -> float:
         """
         Generates a random number to use as a service time. This uses the inverse transform technique for an exponential
@@ -29,11 +71,63 @@ class RandomNumberGeneration:
         Returns: A random number that follows the exponential distribution
 
         """
+        if self.blockSize > 0:
+            if self.blockServiceTimes is None or self.blockIndex == self.blockSize:
+                self.__generateBlock()
+            serviceTime = self.blockServiceTimes[self.blockIndex]
+            self.blockIndex += 1
+            return serviceTime
         self.lcm()
         self.ri = self.xi / (self.m + 1)
         serviceTime = ((-1)/self.lmbda) * np.log(self.ri)
         return serviceTime
 
+    def __generateBlock(self):
+        """
+        Generates the next blockSize service times at once. Every xi in the block is computed directly from the xi
+        before the block, x(i+k) = (A_k * x(i) + C_k) mod m, which fits in 64 bits since both factors are below 2^31
+        """
+        self.__discardBlock()
+        multipliers, increments = self.__getBlockSteps(self.blockSize)
+        self.blockXis = (multipliers * np.uint64(self.xi) + increments) % np.uint64(self.m)
+        ris = self.blockXis / (self.m + 1)
+        self.blockServiceTimes = ((-1)/self.lmbda) * np.log(ris)
+        self.blockIndex = 0
+
+    def __discardBlock(self):
+        """
+        Moves xi to the last value served from the buffered block and drops the rest of the block, so the scalar
+        methods carry on from the right place in the sequence
+        """
+        if self.blockXis is not None:
+            if self.blockIndex > 0:
+                self.xi = int(self.blockXis[self.blockIndex - 1])
+                self.ri = self.xi / (self.m + 1)
+            self.blockXis = None
+            self.blockServiceTimes = None
+            self.blockIndex = 0
+
+    @classmethod
+    def __getBlockSteps(cls, blockSize: int):
+        """
+        Get the multipliers and increments taking xi to each of the next blockSize values
+        Args:
+            blockSize: The number of values in a block
+
+        Returns: The multipliers and increments as uint64 arrays
+        """
+        if blockSize not in cls.blockSteps:
+            multipliers = np.empty(blockSize, dtype=np.uint64)
+            increments = np.empty(blockSize, dtype=np.uint64)
+            multiplier, increment = 1, 0
+            for k in range(blockSize):
+                multiplier = (cls.a * multiplier) % cls.m
+                increment = (cls.a * increment + cls.c) % cls.m
+                multipliers[k] = multiplier
+                increments[k] = increment
+            cls.blockSteps[blockSize] = (multipliers, increments)
+        return cls.blockSteps[blockSize]
+
     def generateRandomNumberStreams(self, b: int, numBlocks: int):
         """
         Generate streams of random digits using the lowest congruential method
@@ -47,20 +141,77 @@ class RandomNumberGeneration:
         """
         seeds = {}
         self.xi = self.x0
-        seeds[0] = self.x0
-        currJ = 0
         for i in range(numBlocks):
-            for j in range(currJ, i*b):
-                self.lcm()
-            currJ = i*b
-            seeds[currJ] = self.xi
+            self.xi = self.skipAhead(self.x0, i*b)
+            seeds[i*b] = self.xi
         return seeds
 
+    def jumpAhead(self, steps: int):
+        """
+        Advance this generator as if lcm() had been called the given number of times
+        Args:
+            steps: How many numbers to skip
+        """
+        self.__discardBlock()
+        self.xi = self.skipAhead(self.xi, steps)
+
+    @classmethod
+    def skipAhead(cls, xi: int, steps: int) -> int:
+        """
+        Compute the xi value the given number of steps ahead in O(log steps) time. Applying the generator n times is
+        itself a linear congruential step x -> (A*x + C) mod m, which is built up by repeated squaring
+        Args:
+            xi: The value to start from
+            steps: How many numbers to skip
+
+        Returns: The xi value after the given number of steps
+        """
+        multiplier, increment = 1, 0
+        a, c = cls.a, cls.c
+        while steps > 0:
+            if steps & 1:
+                multiplier = (a * multiplier) % cls.m
+                increment = (a * increment + c) % cls.m
+            c = ((a + 1) * c) % cls.m
+            a = (a * a) % cls.m
+            steps >>= 1
+        return (multiplier * xi + increment) % cls.m
+
+    @classmethod
+    def getStreamSeed(cls, replication: int, stream: int, numStreams: int = None) -> int:
+        """
+        Get the seed of one stream of one replication directly. The streams of all replications are laid out one
+        after another, streamSpacing numbers apart, starting at x0
+        Args:
+            replication: The index of the replication, starting at 0
+            stream: The index of the stream within the replication, starting at 0
+            numStreams: The number of streams of every replication, numStreams of the project's factory if None
+
+        Returns: The xi value to seed that stream with
+        """
+        numStreams = cls.numStreams if numStreams is None else numStreams
+        return cls.skipAhead(cls.x0, (replication * numStreams + stream) * cls.streamSpacing)
+
+    @classmethod
+    def getReplicationSeeds(cls, replication: int, numStreams: int = None):
+        """
+        Get the seeds of every stream of one replication
+        Args:
+            replication: The index of the replication, starting at 0
+            numStreams: The number of streams of every replication, numStreams of the project's factory if None
+
+        Returns: A dictionary keyed by where each stream starts within the replication, as the simulation expects
+        """
+        numStreams = cls.numStreams if numStreams is None else numStreams
+        return {stream * cls.streamSpacing: cls.getStreamSeed(replication, stream, numStreams)
+                for stream in range(numStreams)}
+
     def lcm(self):
         """
         Lowest congruential method to generate random numbers
         Returns: A random number
 
         """
+        self.__discardBlock()
         self.xi = (self.a * self.xi + self.c) % self.m
         return self.xi
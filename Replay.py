@@ -0,0 +1,117 @@
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Dict, List
+from InputModelling import getFittedTopology
+from OutputAnalysis import confidenceIntervals, getConfidenceIntervalRows
+from RandomNumberGeneration import RandomNumberGeneration
+from Replication import Replication
+from ReplayGenerator import loadObservations
+from Simulation import Simulation, SERVICE_RATES
+from Topology import DEFAULT_TOPOLOGY, getDistributionSpecs, getReplayTopology
+import argparse
+import csv
+import numpy as np
+
+# where the cleaning and service times of each mode come from: the exponentials fitted to the data files, the
+# recorded observations in order, the observations resampled with replacement, the distribution that fits each data
+# file best, or the continuous empirical distribution of each data file
+MODES = ["fitted", "replay", "bootstrap", "chosen", "empirical"]
+
+
+def getModeTopology(mode: str) -> dict:
+    """
+    Gets the project's factory with the cleaning and service times of a mode
+    Args:
+        mode: One of MODES
+    Returns:
+        dict: The topology
+    """
+    if mode == "fitted":
+        return DEFAULT_TOPOLOGY
+    if mode == "chosen":
+        return getFittedTopology(DEFAULT_TOPOLOGY)
+    topology = getReplayTopology(DEFAULT_TOPOLOGY, bootstrap=mode == "bootstrap")
+    if mode == "empirical":
+        for spec in getDistributionSpecs(topology):
+            if spec["distribution"] == "replay":
+                spec["distribution"] = "empirical"
+    return topology
+
+
+def runModeReplication(mode: str, replication: int, isRoundRobin: bool) -> Replication:
+    """
+    Run one replication of the project's factory in one mode. Replication x of every mode uses the same streams. This
+    is a module level function so it can be sent to worker processes
+    Args:
+        mode: One of MODES
+        replication: The index of the replication, which picks its streams
+        isRoundRobin: If True, the inspectors use the round robin policy. Otherwise the original priority policy
+    Returns:
+        Replication: The statistics of the replication
+    """
+    sim = Simulation(RandomNumberGeneration.getReplicationSeeds(replication), isRoundRobin,
+                     topology=getModeTopology(mode))
+    sim.run()
+    return sim.getStatistics()
+
+
+def runValidation(modes: List[str], numReplications: int, isRoundRobin: bool, numWorkers: int = None,
+                  confidence: float = 0.95) -> Dict[str, tuple]:
+    """
+    Runs the same replications in every mode, to check that the fitted distributions give the same performance as the
+    data they were fitted to
+    Args:
+        modes: The modes to run, from MODES
+        numReplications: The number of replications of each mode
+        isRoundRobin: If True, the inspectors use the round robin policy. Otherwise the original priority policy
+        numWorkers: The number of processes to run replications on, in this process if None or 1
+        confidence: The confidence level of the intervals
+    Returns:
+        Dict[str, tuple]: The headers, and the means and half widths of every mode keyed by the mode
+    """
+    # parse the data files once here, so the workers only map the binary copies
+    for name in SERVICE_RATES:
+        loadObservations(name)
+    allModes = [mode for mode in modes for _ in range(numReplications)]
+    replicationNumbers = list(range(numReplications)) * len(modes)
+    if numWorkers is None or numWorkers <= 1:
+        replications = list(map(runModeReplication, allModes, replicationNumbers, repeat(isRoundRobin)))
+    else:
+        with ProcessPoolExecutor(max_workers=numWorkers) as executor:
+            replications = list(executor.map(runModeReplication, allModes, replicationNumbers, repeat(isRoundRobin)))
+    results = {"headers": replications[0].getReplicationHeaders()}
+    for x, mode in enumerate(modes):
+        data = [replication.getReplicationData() for replication in
+                replications[x * numReplications:(x + 1) * numReplications]]
+        results[mode] = confidenceIntervals(np.array(data), confidence)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate the fitted model by running the same replications with the "
+                                                 "recorded cleaning and service times")
+    parser.add_argument("--replications", type=int, default=20, help="number of replications of each mode")
+    parser.add_argument("--workers", type=int, default=None, help="number of processes, this process by default")
+    parser.add_argument("--mode", action="append", choices=MODES, default=None,
+                        help="a mode to run, can be repeated (default: all of them)")
+    parser.add_argument("--priority", action="store_true", help="use the priority policy instead of round robin")
+    parser.add_argument("--output", default="Replay_Validation.csv", help="csv file to write the intervals to")
+    args = parser.parse_args()
+    modes = args.mode if args.mode else MODES
+    results = runValidation(modes, args.replications, not args.priority, args.workers)
+    headers = results["headers"]
+    print(f"\nMeans and 95% half widths over {args.replications} replications")
+    for column, header in enumerate(headers):
+        print(f"{header}: " + ", ".join(f"{mode} {results[mode][0][column]:.5f} +/- {results[mode][1][column]:.5f}"
+                                        for mode in modes))
+    with open(args.output, 'w', encoding='UTF8', newline='') as f:
+        writer = csv.writer(f)
+        for x, mode in enumerate(modes):
+            rows = getConfidenceIntervalRows(headers, *results[mode])
+            if x == 0:
+                writer.writerow(['Mode'] + rows[0])
+            writer.writerows([mode] + row for row in rows[1:])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+from RandomNumberGeneration import RandomNumberGeneration
+import os
+import numpy as np
+
+DATA_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+DATA_CACHE_DIRECTORY = os.path.join(DATA_DIRECTORY, ".data_cache")
+
+# the observations already loaded by this process, keyed by the path of their data file
+loadedObservations = {}
+
+
+def loadObservations(name: str, directory: str = DATA_DIRECTORY, cacheDirectory: str = DATA_CACHE_DIRECTORY) -> np.ndarray:
+    """
+    Loads the observations of one data file, e.g. "servinsp1" for servinsp1.dat. The text file is only parsed the
+    first time: the observations are then kept as a .npy file in the cache directory, which later loads memory-map
+    instead of parsing, and within a process every file is loaded once
+    Args:
+        name: The name of the data file, without its .dat extension
+        directory: The directory of the data files
+        cacheDirectory: The directory the binary copies are kept in, None to always parse the text file
+    Returns:
+        np.ndarray: The observations, in the order of the file, read only
+    """
+    path = os.path.join(directory, f"{name}.dat")
+    if path in loadedObservations:
+        return loadedObservations[path]
+    if cacheDirectory is None:
+        observations = np.loadtxt(path, dtype=np.float64, ndmin=1)
+        observations.flags.writeable = False
+    else:
+        cachePath = os.path.join(cacheDirectory, f"{name}.npy")
+        # the binary copy is rebuilt whenever the data file is newer than it
+        if not os.path.exists(cachePath) or os.path.getmtime(cachePath) < os.path.getmtime(path):
+            os.makedirs(cacheDirectory, exist_ok=True)
+            temporaryPath = f"{cachePath}.{os.getpid()}.npy"
+            np.save(temporaryPath, np.loadtxt(path, dtype=np.float64, ndmin=1))
+            os.replace(temporaryPath, cachePath)
+        observations = np.load(cachePath, mmap_mode="r")
+    if observations.size == 0:
+        raise ValueError(f"{path} has no observations")
+    loadedObservations[path] = observations
+    return observations
+
+
+class ReplayGenerator(RandomNumberGeneration):
+    """
+    A generator that serves recorded observations as service times instead of sampling an exponential distribution,
+    for validating the model against the data it was fitted to. In replay mode the observations are served in the
+    order they were recorded, starting over after the last one. In bootstrap mode every service time is an
+    observation picked uniformly at random with the generator's stream, so every replication resamples the data
+    differently while staying reproducible from its seeds
+    """
+
+    def __init__(self, xi: int, observations: np.ndarray, bootstrap: bool = False):
+        """
+        Args:
+            xi: The initial seed value, which picks the observations in bootstrap mode
+            observations: The observations to serve, e.g. from loadObservations
+            bootstrap: If True, observations are resampled with replacement. Otherwise they are replayed in order
+        """
+        RandomNumberGeneration.__init__(self, xi, 1 / float(np.mean(observations)))
+        self.observations = observations
+        self.numObservations = len(observations)
+        self.bootstrap = bootstrap
+        self.index = 0
+
+    def setLambda(self, lmbda: float):
+        raise ValueError("The rate of a generator replaying observations cannot be changed")
+
+    def generateRandomServiceTime(self) -> float:
+        """
+        Serves the next observation
+        Returns: The service time
+        """
+        if self.bootstrap:
+            self.lcm()
+            return float(self.observations[int(self.xi / (self.m + 1) * self.numObservations)])
+        serviceTime = float(self.observations[self.index])
+        self.index = (self.index + 1) % self.numObservations
+        return serviceTime
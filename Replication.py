@@ -4,6 +4,7 @@ class Replication:
         self.probabilityWorkstationBusy = {}
         self.probabilityInspectorBlocked = {}
         self.avgBufferOccup = {}
+        self.profile = None
     
     def getThroughput(self) -> float:
         """
@@ -71,6 +72,21 @@ class Replication:
         """
         self.avgBufferOccup[bufferId] = avgBufferOccup
 
+    def getProfile(self):
+        """
+        Get where the replication spent its time, if it was run with profiling
+        Returns: The SimulationProfile of the replication, or None
+        """
+        return self.profile
+
+    def setProfile(self, profile):
+        """
+        Set where the replication spent its time
+        Args:
+            profile(SimulationProfile): the measurements of the replication
+        """
+        self.profile = profile
+
     def printStats(self):
         """
         Print stats for this replication
@@ -79,6 +95,8 @@ class Replication:
         print(f"Probability Workstations Busy: {self.probabilityWorkstationBusy}")
         print(f"Probability Inspectors Blocked: {self.probabilityInspectorBlocked}")
         print(f"Average Buffer Occupancy: {self.avgBufferOccup}")
+        if self.profile is not None:
+            self.profile.printProfile()
 
     def getReplicationData(self):
         """
@@ -95,4 +113,50 @@ class Replication:
 
         for key in self.avgBufferOccup.keys():
             data.append(self.avgBufferOccup[key])
-        return data
\ No newline at end of file
+        return data
+
+    def getReplicationHeaders(self):
+        """
+        Gets the name of each of the quantities of interest, in the same order as getReplicationData
+        Returns: List of the names of the quantities of interest
+        """
+        headers = ['Throughput']
+        for key in self.probabilityWorkstationBusy.keys():
+            headers.append(f'Workstation {key} Busy Prob')
+
+        for key in self.probabilityInspectorBlocked.keys():
+            headers.append(f'Inspector {key} Blocked Prob')
+
+        for key in self.avgBufferOccup.keys():
+            headers.append(f'Buffer {key} Occupancy Average')
+        return headers
+
+    def toDict(self) -> dict:
+        """
+        Gets the statistics of the replication as a dictionary that can be written as JSON
+        Returns: Dictionary of the throughput and the statistics of each workstation, inspector and buffer
+        """
+        return {
+            "throughput": self.throughput,
+            "probabilityWorkstationBusy": [[key, value] for key, value in self.probabilityWorkstationBusy.items()],
+            "probabilityInspectorBlocked": [[key, value] for key, value in self.probabilityInspectorBlocked.items()],
+            "avgBufferOccup": [[key, value] for key, value in self.avgBufferOccup.items()],
+        }
+
+    @classmethod
+    def fromDict(cls, data: dict) -> "Replication":
+        """
+        Creates a replication from a dictionary made by toDict
+        Args:
+            data(dict): the statistics of the replication
+        Returns: The replication
+        """
+        replication = cls()
+        replication.setThroughput(data["throughput"])
+        for key, value in data["probabilityWorkstationBusy"]:
+            replication.addWorkstationBusyProbability(key, value)
+        for key, value in data["probabilityInspectorBlocked"]:
+            replication.addInspectorBlockedProbability(key, value)
+        for key, value in data["avgBufferOccup"]:
+            replication.addAvgBufferOccupancy(key, value)
+        return replication
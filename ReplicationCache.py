@@ -0,0 +1,148 @@
+from typing import Dict, Optional
+from ReplayGenerator import DATA_DIRECTORY
+from Replication import Replication
+from Simulation import MAX_BUFFER_SIZE, SERVICE_RATES, SIMULATION_TIME, WARMUP_TIME
+from Topology import DEFAULT_TOPOLOGY, getDistributionSpecs
+import hashlib
+import json
+import os
+import tempfile
+
+# change when a model change makes earlier results stale, so they are no longer found
+MODEL_VERSION = 2
+CACHE_DIRECTORY = ".replication_cache"
+
+
+def getReplicationKey(seeds: Dict[int, int], isRoundRobin: bool, time: float = SIMULATION_TIME,
+                      warmup: float = WARMUP_TIME, maxBufferSize: int = MAX_BUFFER_SIZE,
+                      serviceRates: dict = None, topology: dict = None) -> str:
+    """
+    Hashes everything that decides the outcome of a replication, so that the same configuration always gets the same
+    key and any change gets a different one
+    Args:
+        seeds: The seeds of the replication's streams
+        isRoundRobin: The policy of the inspectors
+        time: The time the replication ends at
+        warmup: The time steady state starts at
+        maxBufferSize: The capacity of every buffer
+        serviceRates: Rates that replace the ones in SERVICE_RATES
+        topology: The factory simulated, the factory of the project if None
+    Returns:
+        str: The hex digest of the configuration
+    """
+    configuration = {
+        "version": MODEL_VERSION,
+        "seeds": sorted([int(key), int(value)] for key, value in seeds.items()),
+        "isRoundRobin": bool(isRoundRobin),
+        "time": float(time),
+        "warmup": float(warmup),
+        "maxBufferSize": int(maxBufferSize),
+        "serviceRates": sorted({**SERVICE_RATES, **(serviceRates or {})}.items()),
+        "topology": getTopologyDigest(DEFAULT_TOPOLOGY if topology is None else topology),
+    }
+    return hashlib.sha256(json.dumps(configuration, sort_keys=True).encode()).hexdigest()
+
+
+def getTopologyDigest(topology: dict, directory: str = DATA_DIRECTORY) -> str:
+    """
+    Hashes a topology with the contents of the data files its distributions read, so that editing the factory, a
+    distribution or a data file all give a different digest
+    Args:
+        topology: The topology
+        directory: The directory of the data files
+    Returns:
+        str: The hex digest of the topology
+    """
+    digest = hashlib.sha256(json.dumps(topology, sort_keys=True).encode())
+    for name in sorted(set(spec["data"] for spec in getDistributionSpecs(topology) if "data" in spec)):
+        with open(os.path.join(directory, f"{name}.dat"), "rb") as f:
+            digest.update(hashlib.sha256(f.read()).digest())
+    return digest.hexdigest()
+
+
+class ReplicationCache:
+    """
+    Keeps the results of finished replications on disk, one file per replication named by the key of its
+    configuration. Every result is written as soon as its replication finishes, so an interrupted run picks up where
+    it stopped, and several processes can share a cache since each file is written in one atomic rename
+    """
+
+    def __init__(self, directory: str = CACHE_DIRECTORY):
+        """
+        Args:
+            directory: The directory the results are kept in, created when the first result is written
+        """
+        self.directory = directory
+
+    def getPath(self, key: str) -> str:
+        """
+        Gets the file a result is kept in, spread over subdirectories so no directory gets too large
+        Args:
+            key: The key of the replication
+        Returns:
+            str: The path of the file
+        """
+        return os.path.join(self.directory, key[:2], key + ".json")
+
+    def load(self, key: str) -> Optional[dict]:
+        """
+        Reads the entry of a replication
+        Args:
+            key: The key of the replication
+        Returns:
+            dict: The entry, or None if the replication has not been run or its file cannot be read
+        """
+        try:
+            with open(self.getPath(key), encoding='UTF8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return entry
+
+    def get(self, key: str) -> Optional[Replication]:
+        """
+        Gets the statistics of a replication
+        Args:
+            key: The key of the replication
+        Returns:
+            Replication: The statistics, or None if the replication has not been run
+        """
+        entry = self.load(key)
+        return Replication.fromDict(entry["replication"]) if entry is not None else None
+
+    def getXis(self, key: str) -> Optional[Dict[int, int]]:
+        """
+        Gets where a replication left its streams, for replications that continue the streams of the previous one
+        Args:
+            key: The key of the replication
+        Returns:
+            Dict[int, int]: The final xi of each stream, or None if the replication has not been run or they were not
+            kept
+        """
+        entry = self.load(key)
+        if entry is None or entry.get("xis") is None:
+            return None
+        return {int(stream): int(xi) for stream, xi in entry["xis"]}
+
+    def put(self, key: str, replication: Replication, xis: Dict[int, int] = None):
+        """
+        Writes the statistics of a replication, replacing any earlier result with the same key
+        Args:
+            key: The key of the replication
+            replication: The statistics of the replication
+            xis: Where the replication left its streams
+        """
+        path = self.getPath(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        entry = {
+            "replication": replication.toDict(),
+            "xis": [[int(stream), int(xi)] for stream, xi in xis.items()] if xis is not None else None,
+        }
+        descriptor, temporaryPath = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, 'w', encoding='UTF8') as f:
+                json.dump(entry, f)
+            os.replace(temporaryPath, path)
+        except BaseException:
+            os.remove(temporaryPath)
+            raise
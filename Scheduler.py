@@ -0,0 +1,188 @@
+import heapq
+from abc import ABC, abstractmethod
+from bisect import insort
+from itertools import count
+from typing import Iterator, List
+
+from Event import Event
+from SchedulerType import SchedulerType
+
+
+class Scheduler(ABC):
+    """
+    Base class for the future event list. Events are ordered by their start time and events with the same start time
+    are returned in the order they were added, which is the same ordering the sorted list used to give us.
+    """
+
+    def __init__(self):
+        self.sequence = count()
+
+    @abstractmethod
+    def push(self, event: Event):
+        """
+        Adds an event to the future event list
+        Args:
+            event: The event to schedule
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def pop(self) -> Event:
+        """
+        Removes the next event from the future event list
+        Returns: The event with the earliest start time
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def entries(self) -> List[tuple]:
+        """
+        Gets the scheduled (startTime, sequence, event) entries in no particular order
+        Returns: The scheduled entries
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def __iter__(self) -> Iterator[Event]:
+        for entry in sorted(self.entries(), key=lambda e: (e[0], e[1])):
+            yield entry[2]
+
+    def __getstate__(self) -> dict:
+        # the sequence counter is saved as the next number it would give, so that a restored future event list keeps
+        # ordering equal-time events the same way
+        nextSequence = next(self.sequence)
+        self.sequence = count(nextSequence)
+        state = dict(self.__dict__)
+        state["sequence"] = nextSequence
+        return state
+
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        self.sequence = count(state["sequence"])
+
+
+class HeapScheduler(Scheduler):
+    """
+    Future event list backed by a binary heap. Inserting and removing an event are both O(log n).
+    """
+
+    def __init__(self):
+        Scheduler.__init__(self)
+        self.heap = []
+
+    def push(self, event: Event):
+        heapq.heappush(self.heap, (event.getStartTime(), next(self.sequence), event))
+
+    def pop(self) -> Event:
+        if not self.heap:
+            raise IndexError("pop from an empty future event list")
+        return heapq.heappop(self.heap)[2]
+
+    def entries(self) -> List[tuple]:
+        return list(self.heap)
+
+    def __len__(self) -> int:
+        return len(self.heap)
+
+
+class CalendarQueueScheduler(Scheduler):
+    """
+    Future event list backed by a calendar queue (Brown, 1988). Events are hashed into "days" of a fixed width and the
+    number of days grows and shrinks with the number of scheduled events, so inserting and removing an event are O(1)
+    on average even for very large event populations.
+    """
+
+    MIN_BUCKETS = 2
+    WIDTH_SAMPLE_SIZE = 25
+
+    def __init__(self, numBuckets: int = MIN_BUCKETS, width: float = 1.0):
+        """
+        Initialize an empty calendar
+        Args:
+            numBuckets: The initial number of days in the calendar
+            width: The initial width of each day in minutes
+        """
+        Scheduler.__init__(self)
+        self.size = 0
+        self.width = width
+        self.buckets = [[] for _ in range(numBuckets)]
+        self.currentDay = 0
+
+    def push(self, event: Event):
+        entry = (event.getStartTime(), next(self.sequence), event)
+        self.__insert(entry)
+        self.currentDay = min(self.currentDay, int(entry[0] / self.width))
+        self.size += 1
+        if self.size > 2 * len(self.buckets):
+            self.__resize(2 * len(self.buckets))
+
+    def pop(self) -> Event:
+        if self.size == 0:
+            raise IndexError("pop from an empty future event list")
+        numBuckets = len(self.buckets)
+        entry = None
+        for day in range(self.currentDay, self.currentDay + numBuckets):
+            bucket = self.buckets[day % numBuckets]
+            if bucket and int(bucket[0][0] / self.width) <= day:
+                entry = bucket.pop(0)
+                self.currentDay = day
+                break
+        if entry is None:
+            # Nothing is scheduled within the next year, jump straight to the earliest event
+            bucket = min((b for b in self.buckets if b), key=lambda b: (b[0][0], b[0][1]))
+            entry = bucket.pop(0)
+            self.currentDay = int(entry[0] / self.width)
+        self.size -= 1
+        if len(self.buckets) > self.MIN_BUCKETS and self.size < len(self.buckets) // 2:
+            self.__resize(len(self.buckets) // 2)
+        return entry[2]
+
+    def entries(self) -> List[tuple]:
+        return [entry for bucket in self.buckets for entry in bucket]
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __insert(self, entry: tuple):
+        """
+        Places an entry in the bucket of the day it falls on, keeping the bucket sorted by start time and sequence
+        Args:
+            entry: The (startTime, sequence, event) entry to insert
+        """
+        insort(self.buckets[int(entry[0] / self.width) % len(self.buckets)], entry)
+
+    def __resize(self, numBuckets: int):
+        """
+        Rebuilds the calendar with a new number of days, re-estimating the day width from the gaps between the
+        earliest scheduled events
+        Args:
+            numBuckets: The new number of days
+        """
+        entries = sorted(self.entries())
+        sample = [entry[0] for entry in entries[:self.WIDTH_SAMPLE_SIZE]]
+        gaps = [later - earlier for earlier, later in zip(sample, sample[1:]) if later > earlier]
+        if gaps:
+            self.width = 3.0 * sum(gaps) / len(gaps)
+        self.buckets = [[] for _ in range(max(numBuckets, self.MIN_BUCKETS))]
+        for entry in entries:
+            self.__insert(entry)
+        if entries:
+            self.currentDay = int(entries[0][0] / self.width)
+
+
+def createScheduler(schedulerType: SchedulerType) -> Scheduler:
+    """
+    Creates an empty future event list of the given type
+    Args:
+        schedulerType: The backend to use for the future event list
+    Returns:
+        Scheduler: the empty future event list
+    """
+    if schedulerType == SchedulerType.HEAP:
+        return HeapScheduler()
+    elif schedulerType == SchedulerType.CALENDAR:
+        return CalendarQueueScheduler()
+    raise ValueError(f"Unidentified SchedulerType {schedulerType} received.")
@@ -0,0 +1,6 @@
+from enum import Enum
+
+
+class SchedulerType(Enum):
+    HEAP = "Binary Heap"
+    CALENDAR = "Calendar Queue"
@@ -1,4 +1,5 @@
 from Event import Event
+from EventRouter import EventRouter
 from EventType import EventType
 from Inspector import Inspector
 from InspectorEvent import InspectorEvent
@@ -6,94 +7,247 @@ from Replication import Replication
 from Workstation import WorkStation
 from Buffer import Buffer
 from ComponentType import ComponentType
-from typing import List
+from OutputAnalysis import lag1Autocorrelations
+from typing import Dict, List, Tuple
+import gzip
+import os
+import pickle
 from RandomNumberGeneration import RandomNumberGeneration
+from ReplayGenerator import ReplayGenerator, loadObservations
+from TableGenerators import InverseTableGenerator, createEmpiricalGenerator, createPiecewiseLinearGenerator, \
+    getDistributionTable
+from TimeWeightedStatistic import TimeWeightedStatistic
+from Scheduler import createScheduler
+from TraceRecorder import TraceRecorder
+from Topology import DEFAULT_TOPOLOGY, getNamedRateStreams, getRate, getStreamKeys
+from SchedulerType import SchedulerType
 
 MAX_BUFFER_SIZE = 2
-
-def createBuffers() -> List[Buffer]:
+SIMULATION_TIME = 6600
+WARMUP_TIME = 600
+# exponential times are generated this many at a time, which gives the same times as one at a time
+SERVICE_TIME_BLOCK_SIZE = 64
+# handled events and consumed components are reused instead of allocating new ones, which gives the same results
+RECYCLE_EVENTS = True
+TIME_IN_SYSTEM_RESERVOIR_SIZE = 0
+# how far a probability computed from totals may fall outside [0, 1] through rounding
+PROBABILITY_TOLERANCE = 1e-9
+# the rate of the exponential distribution fitted to each data file, keyed by the file's name
+SERVICE_RATES = {
+    "servinsp1": 0.096545,
+    "servinsp22": 0.064363,
+    "servinsp23": 0.048467,
+    "ws1": 0.217183,
+    "ws2": 0.090150,
+    "ws3": 0.113688,
+}
+
+def createBuffers(maxBufferSize: int = MAX_BUFFER_SIZE, topology: dict = DEFAULT_TOPOLOGY) -> List[Buffer]:
     """
     Creates the buffers for the inspectors and workstations to use.
+    Args:
+            maxBufferSize: The capacity of every buffer the topology gives no capacity for
+            topology: The factory to build, as loaded by loadTopology
     Returns:
-        List[Buffer]: the list containing all buffers
+        List[Buffer]: the list containing all buffers, in the order of the topology
     """
-    buf1 = Buffer(1, MAX_BUFFER_SIZE, ComponentType.C1)
-    buf2 = Buffer(2, MAX_BUFFER_SIZE, ComponentType.C1)
-    buf3 = Buffer(3, MAX_BUFFER_SIZE, ComponentType.C1)
-    buf4 = Buffer(4, MAX_BUFFER_SIZE, ComponentType.C2)
-    buf5 = Buffer(5, MAX_BUFFER_SIZE, ComponentType.C3)
-    return [buf1, buf2, buf3, buf4, buf5]
+    return [Buffer(spec["id"], spec.get("capacity", maxBufferSize), ComponentType[spec["componentType"]])
+            for spec in topology["buffers"]]
 
 
-def createInspectors(buffers: List[Buffer], seeds: dict[int], isRoundRobin: bool) -> List[Inspector]:
+def createGenerator(spec: dict, seeds: dict[int], serviceRates: dict = SERVICE_RATES,
+                    blockSize: int = SERVICE_TIME_BLOCK_SIZE) -> RandomNumberGeneration:
+    """
+    Creates the generator of one cleaning or service time of the topology
+    Args:
+            spec: The component of an inspector or the workstation, with its stream and distribution
+            seeds: A dictionary of the seeds that are being used for the simulation
+            serviceRates: The rates of the simulation, keyed by name
+            blockSize: If greater than 0, exponential times are generated in blocks of this size
+    Returns:
+        RandomNumberGeneration: the generator, a subclass of it for the distributions other than exponential
+    """
+    seed = seeds[spec["stream"]]
+    distribution = spec["distribution"]
+    if distribution in ("replay", "bootstrap"):
+        return ReplayGenerator(seed, loadObservations(spec["data"]), distribution == "bootstrap")
+    if distribution == "empirical":
+        return createEmpiricalGenerator(seed, loadObservations(spec["data"]))
+    if distribution == "piecewiseLinear":
+        return createPiecewiseLinearGenerator(seed, spec["breakpoints"], spec["cumulativeProbabilities"])
+    if distribution != "exponential":
+        return InverseTableGenerator(seed, *getDistributionTable(distribution, spec["parameters"]))
+    return RandomNumberGeneration(seed, getRate(spec, serviceRates), blockSize)
+
+
+def createInspectors(buffers: List[Buffer], seeds: dict[int], isRoundRobin: bool,
+                     blockSize: int = SERVICE_TIME_BLOCK_SIZE, serviceRates: dict = SERVICE_RATES,
+                     topology: dict = DEFAULT_TOPOLOGY) -> List[Inspector]:
     """
     Initializes the inspectors.
     Args:
-            buffers: The list of buffers the inspectors will use
+            buffers: The list of buffers the inspectors will use, created by createBuffers from the same topology
             seeds: A dictionary of the seeds that are being used for the simulation
             isRoundRobin: The operating policy which the inspectors will use to deliver components to buffers.
                         If True, uses round robin policy. Otherwise uses the original priority policy
+            blockSize: If greater than 0, cleaning times are generated in blocks of this size
+            serviceRates: The rate of each inspector's cleaning times, keyed the same way as SERVICE_RATES
+            topology: The factory to build, as loaded by loadTopology
     Returns:
         List[Inspector]: a list containing all inspectors
     """
-    gen1 = RandomNumberGeneration(seeds[0], 0.096545)
-    ins1 = Inspector(1, 3, [ComponentType.C1], [gen1], isRoundRobin)
-    ins1.setBuffer(0, buffers[0])
-    ins1.setBuffer(1, buffers[1])
-    ins1.setBuffer(2, buffers[2])
-
-    gen2 = RandomNumberGeneration(seeds[100000], 0.064363)
-    gen3 = RandomNumberGeneration(seeds[200000], 0.048467)
-    gen4 = RandomNumberGeneration(seeds[600000], 0.0)
-    ins2 = Inspector(2, 2, [ComponentType.C2, ComponentType.C3], [gen2, gen3, gen4], isRoundRobin)
-    ins2.setBuffer(0, buffers[3])
-    ins2.setBuffer(1, buffers[4])
-    return [ins1, ins2]
-
-
-def createWorkstations(buffers: List[Buffer], seeds: dict[int]) -> List[WorkStation]:
+    buffersById = {buffer.getId(): buffer for buffer in buffers}
+    inspectors = []
+    for spec in topology["inspectors"]:
+        components = spec["components"]
+        generators = [createGenerator(component, seeds, serviceRates, blockSize) for component in components]
+        if len(components) > 1:
+            generators.append(RandomNumberGeneration(seeds[spec["chooserStream"]], 0.0))
+        componentTypes = [ComponentType[component["componentType"]] for component in components]
+        inspector = Inspector(spec["id"], len(spec["buffers"]), componentTypes, generators, isRoundRobin)
+        for index, bufferId in enumerate(spec["buffers"]):
+            inspector.setBuffer(index, buffersById[bufferId])
+        inspector.compileRoutes()
+        inspectors.append(inspector)
+    return inspectors
+
+
+def createWorkstations(buffers: List[Buffer], seeds: dict[int], blockSize: int = SERVICE_TIME_BLOCK_SIZE,
+                       reservoirSize: int = TIME_IN_SYSTEM_RESERVOIR_SIZE,
+                       serviceRates: dict = SERVICE_RATES, topology: dict = DEFAULT_TOPOLOGY) -> List[WorkStation]:
     """
     Initializes the workstations.
     Args:
-            buffers: The list of buffers the workstations will use
+            buffers: The list of buffers the workstations will use, created by createBuffers from the same topology
             seeds: A dictionary of the seeds that are being used for the simulation
+            blockSize: If greater than 0, service times are generated in blocks of this size
+            reservoirSize: The number of consumed components each workstation keeps a sample of
+            serviceRates: The rate of each workstation's service times, keyed the same way as SERVICE_RATES
+            topology: The factory to build, as loaded by loadTopology
     Returns:
         List[Workstation]: a list containing all workstations
     """
-    gen1 = RandomNumberGeneration(seeds[300000], 0.217183)
-    gen2 = RandomNumberGeneration(seeds[400000], 0.090150)
-    gen3 = RandomNumberGeneration(seeds[500000], 0.113688)
-
-    work1 = WorkStation(1, 1, gen1)
-    work2 = WorkStation(2, 2, gen2)
-    work3 = WorkStation(3, 2, gen3)
-    
-    work1.setBuffer(0, buffers[0])
-    work2.setBuffer(0, buffers[1])
-    work2.setBuffer(1, buffers[3])
-
-    work3.setBuffer(0, buffers[2])
-    work3.setBuffer(1, buffers[4])
-    return [work1, work2, work3]
+    buffersById = {buffer.getId(): buffer for buffer in buffers}
+    workstations = []
+    for spec in topology["workstations"]:
+        generator = createGenerator(spec, seeds, serviceRates, blockSize)
+        workstation = WorkStation(spec["id"], len(spec["buffers"]), generator, reservoirSize)
+        for index, bufferId in enumerate(spec["buffers"]):
+            workstation.setBuffer(index, buffersById[bufferId])
+        workstations.append(workstation)
+    return workstations
+
+
+def createRouter(inspectors: List[Inspector], workstations: List[WorkStation]) -> EventRouter:
+    """
+    Subscribes the inspectors and workstations to the events they can react to. Inspector and workstation events go
+    to the entity that created them, Inspector Done events also go to the workstations that take from one of the
+    inspector's buffers, and Workstation Started events also go to the inspectors that deliver to one of the
+    workstation's buffers.
+    Args:
+            inspectors: The inspectors in the simulation
+            workstations: The workstations in the simulation
+    Returns:
+        EventRouter: the router to pass the simulation's events through
+    """
+    router = EventRouter()
+    inspectorSubscribers, workstationSubscribers = getSharedBufferSubscribers(inspectors, workstations)
+    for inspector, subscribers in zip(inspectors, inspectorSubscribers):
+        router.subscribe(EventType.IS, inspector.getId(), inspector.handleInspectorStarted)
+        router.subscribe(EventType.ID, inspector.getId(), inspector.handleInspectorDone)
+        for w in subscribers:
+            router.subscribe(EventType.ID, inspector.getId(), workstations[w].handleInspectorDone)
+
+    for workstation, subscribers in zip(workstations, workstationSubscribers):
+        router.subscribe(EventType.WS, workstation.getId(), workstation.handleWorkstationStarted)
+        router.subscribe(EventType.WD, workstation.getId(), workstation.handleWorkstationDone)
+        for i in subscribers:
+            router.subscribe(EventType.WS, workstation.getId(), inspectors[i].handleWorkstationStarted)
+    return router
+
+
+def getSharedBufferSubscribers(inspectors: List[Inspector],
+                               workstations: List[WorkStation]) -> Tuple[List[List[int]], List[List[int]]]:
+    """
+    Finds which inspectors and workstations share a buffer, going through the buffers instead of comparing every
+    inspector with every workstation, so it takes time in proportion to the size of the factory
+    Args:
+            inspectors: The inspectors in the simulation
+            workstations: The workstations in the simulation
+    Returns:
+        Tuple[List[List[int]], List[List[int]]]: For every inspector, the indices of the workstations that take from
+        one of its buffers, and for every workstation, the indices of the inspectors that deliver to one of its
+        buffers, each in increasing order
+    """
+    takers = {}
+    for w, workstation in enumerate(workstations):
+        for buffer in workstation.getBuffers():
+            takers.setdefault(id(buffer), []).append(w)
+    inspectorSubscribers = [sorted(set(w for buffer in inspector.getBuffers() for w in takers.get(id(buffer), ())))
+                            for inspector in inspectors]
+    workstationSubscribers = [[] for _ in workstations]
+    for i, subscribers in enumerate(inspectorSubscribers):
+        for w in subscribers:
+            workstationSubscribers[w].append(i)
+    return inspectorSubscribers, workstationSubscribers
 
 
 class Simulation:
 
-    def __init__(self, seeds, isRoundRobin):
+    def __init__(self, seeds, isRoundRobin, schedulerType: SchedulerType = SchedulerType.HEAP,
+                 blockSize: int = SERVICE_TIME_BLOCK_SIZE, recycleEvents: bool = RECYCLE_EVENTS,
+                 reservoirSize: int = TIME_IN_SYSTEM_RESERVOIR_SIZE, time: float = SIMULATION_TIME,
+                 warmup: float = WARMUP_TIME, maxBufferSize: int = MAX_BUFFER_SIZE, serviceRates: dict = None,
+                 topology: dict = None):
         """
         Constructor for a Simulation which will simulate the system.
-        """
-        self.time = 6600
-        self.warmup = 600
+        Args:
+            seeds: A dictionary of the seeds that are being used for the simulation
+            isRoundRobin: If True, the inspectors use the round robin policy. Otherwise the original priority policy
+            schedulerType: The backend used to keep the future event list ordered
+            blockSize: If greater than 0, service times are generated with NumPy in blocks of this size and served
+                       from a buffer, giving the same service times as generating them one at a time
+            recycleEvents: If True, events are released to a free list once handled and reused for new events, and
+                           so are components once consumed unless the workstations keep a sample of them
+            reservoirSize: The number of consumed components each workstation keeps a uniform sample of. The time in
+                           system statistics are kept as running totals either way
+            time: The time the simulation ends at, in minutes
+            warmup: The time steady state starts at, in minutes
+            maxBufferSize: The capacity of every buffer
+            serviceRates: Rates that replace the ones in SERVICE_RATES, keyed the same way
+            topology: The factory to simulate, as loaded by loadTopology. The factory of the project if None
+        """
+        self.time = time
+        self.warmup = warmup
         self.steadyStateTime = self.time - self.warmup
         self.clock = 0
-        self.fel = []
-
-        self.buffers = createBuffers()
-        self.inspectors = createInspectors(self.buffers, seeds, isRoundRobin)
-        self.workstations = createWorkstations(self.buffers, seeds)
+        self.batchLength = None
+        self.batchTotals = []
+        self.batchSize = 1
+        self.batchAutocorrelations = None
+        self.checkpointPath = None
+        self.checkpointInterval = None
+        self.pauseAtSteadyState = False
+        self.trace = None
+        self.fel = createScheduler(schedulerType)
+        self.recycleEvents = recycleEvents
+
+        serviceRates = {**SERVICE_RATES, **(serviceRates or {})}
+        self.topology = DEFAULT_TOPOLOGY if topology is None else topology
+        self.buffers = createBuffers(maxBufferSize, self.topology)
+        self.inspectors = createInspectors(self.buffers, seeds, isRoundRobin, blockSize, serviceRates, self.topology)
+        self.workstations = createWorkstations(self.buffers, seeds, blockSize, reservoirSize, serviceRates,
+                                               self.topology)
+        self.router = createRouter(self.inspectors, self.workstations)
         self.addStartingEvents()
         self.totalComponentTime = 0
+        # inspectors always hold a component, buffers and busy workstations update the count as it changes
+        self.workInProcess = TimeWeightedStatistic(len(self.inspectors))
+        for buffer in self.buffers:
+            buffer.setWorkInProcess(self.workInProcess)
+        for workstation in self.workstations:
+            workstation.setWorkInProcess(self.workInProcess)
+            workstation.setRecycleComponents(recycleEvents and reservoirSize == 0)
         self.xis = {}
 
 
@@ -102,134 +256,89 @@ class Simulation:
         Adds the events that are created at the very start of the simulation. 
         Events to start each inspector and a Simulation Done event
         """
-        self.addEventToFEL(InspectorEvent(0, 0, EventType.IS, 1))
-        self.addEventToFEL(InspectorEvent(0, 0, EventType.IS, 2))
+        for inspector in self.inspectors:
+            self.addEventToFEL(InspectorEvent(0, 0, EventType.IS, inspector.getId()))
         self.addEventToFEL(Event(0, self.warmup, EventType.SSS))
         self.addEventToFEL(Event(0, self.time, EventType.SD))
 
 
     def addEventToFEL(self, event: Event):
         """
-        Adds the given event to the future event list and sorts the list based on the start time of the events
+        Adds the given event to the future event list, which keeps the events ordered by their start time
         Args:
             event: The event that will be added to the future event list
         """
-        self.fel.append(event)
-        self.fel.sort(key=lambda e: e.getStartTime()) #sort fel by the start times
+        self.fel.push(event)
 
     def addEventsToFEL(self, events: List[Event]):
         """
-        Adds the given events to the future event list and sorts the list based on the start time of the events
+        Adds the given events to the future event list, which keeps the events ordered by their start time
         Args:
             events: The event list that will be added to the future event list
         """
         for event in events:
-            self.fel.append(event)
-        self.fel.sort(key=lambda x: x.getStartTime()) #sort fel by the start times
+            self.fel.push(event)
 
     def handleInspectorStarted(self, event:Event) -> List[Event]:
         """
         Handles the logic for when an inspector started event is next.
-        Passes the event to all inspectors to handle individually.
+        Passes the event to the inspector that created it.
         Args:
             event: The event that is to be handled
         Returns:
             List[Event]: a list containing Events from the inspectors
         """
-        events = []
-        for inspector in self.inspectors:
-            newEvent = inspector.handleInspectorStarted(event)
-            if newEvent is not None:
-                events.append(newEvent)
-        return events
+        return self.router.route(event)
 
     def handleInspectorDone(self, event:Event) -> List[Event]:
         """
         Handles the logic for when an Inspector Done event is next.
-        Passes the event to all inspectors and workstations to handle individually.
+        Passes the event to the inspector that created it and the workstations that take from its buffers.
         Args:
                 event: The event that is to be handled
         Returns:
             List[Event]: a list containing Events from the inspectors and workstations
         """
-        events = []
-        for inspector in self.inspectors:
-            newEvent = inspector.handleInspectorDone(event)
-            if newEvent is not None:
-                events.append(newEvent)
-        for workstation in self.workstations:
-            newEvent = workstation.handleInspectorDone(event)
-            if newEvent is not None:
-                events.append(newEvent)
-        return events
+        return self.router.route(event)
 
     def handleWorkstationStarted(self, event:Event) -> List[Event]:
         """
         Handles the logic for when an Workstation Started event is next.
-        Passes the event to all inspectors and workstations to handle individually.
+        Passes the event to the workstation that created it and the inspectors that deliver to its buffers.
         Args:
             event: The event that is to be handled
         Returns:
             List[Event]: a list containing Events from the inspectors and workstations
         """
-        events = []
-        for workstation in self.workstations:
-            newEvent = workstation.handleWorkstationStarted(event)
-            if newEvent is not None:
-                events.append(newEvent)
-        for inspector in self.inspectors:
-            newEvent = inspector.handleWorkstationStarted(event)
-            if newEvent is not None:
-                events.append(newEvent)
-        return events
+        return self.router.route(event)
 
     def handleWorkstationDone(self, event:Event) -> List[Event]:
         """
         Handles the logic for when an Workstation Done event is next.
-        Passes the event to all workstations to handle individually.
+        Passes the event to the workstation that created it.
         Args:
             event: The event that is to be handled
         Returns:
             List[Event]: a list containing Events from the workstations
         """
-        events = []
-        for workstation in self.workstations:
-            newEvent = workstation.handleWorkstationDone(event)
-            if newEvent is not None:
-                events.append(newEvent)
-        return events
-
-    def addBufferOccupancies(self, timeElapsed:float):
-        """
-        Iterates over the buffers and calls a method to accumulate the buffer occupancies
-        Args:
-            timeElapsed: The amount of time elapsed since the last calculation
-        """
-        for buffer in self.buffers:
-            buffer.accumulateOcc(timeElapsed)
+        return self.router.route(event)
 
-    def addAverageInSystem(self, timeElapsed:float):
+    def updateStatistics(self):
         """
-        Add the amount of components that were in the system during the elapsed time
-        Args:
-            timeElapsed: How much time has elapsed since the last time we checked
+        Brings the time-weighted statistics up to the current clock. The statistics are otherwise only updated when
+        the quantities they measure change
         """
         for buffer in self.buffers:
-            self.totalComponentTime += buffer.getSize() * timeElapsed
-
-        for inspector in self.inspectors:
-            self.totalComponentTime += timeElapsed #inspectors always have a component
-
-        for workstation in self.workstations:
-            if(workstation.getIsBusy()):
-                self.totalComponentTime += workstation.getNumComponents() * timeElapsed
+            buffer.updateStatistics(self.clock)
+        self.workInProcess.update(self.clock, self.workInProcess.getValue())
+        self.totalComponentTime = self.workInProcess.getArea()
 
     def setSteadyState(self):
         """
         Set all the entities to be in steady state
         """
         for buffer in self.buffers:
-            buffer.setSteadyState(True)
+            buffer.setSteadyState(True, self.clock)
 
         for inspector in self.inspectors:
             inspector.setSteadyState(True)
@@ -251,13 +360,31 @@ class Simulation:
         Returns:
 
         """
-        self.xis[0] = self.inspectors[0].getGenerators()[0].getXi()
-        self.xis[100000] = self.inspectors[1].getGenerators()[0].getXi()
-        self.xis[200000] = self.inspectors[1].getGenerators()[1].getXi()
-        self.xis[300000] = self.workstations[0].getGenerator().getXi()
-        self.xis[400000] = self.workstations[1].getGenerator().getXi()
-        self.xis[500000] = self.workstations[2].getGenerator().getXi()
-        self.xis[600000] = self.inspectors[1].getGenerators()[2].getXi()
+        for key, generator in self.getStreamGenerators().items():
+            self.xis[key] = generator.getXi()
+
+    def getStreamGenerators(self) -> Dict[int, RandomNumberGeneration]:
+        """
+        Gets the generator of each random number stream
+        Returns: Dictionary of the generators keyed the same way as the seeds
+        """
+        generators = {}
+        for inspector, spec in zip(self.inspectors, self.topology["inspectors"]):
+            streams = [component["stream"] for component in spec["components"]]
+            if len(streams) > 1:
+                streams.append(spec["chooserStream"])
+            generators.update(zip(streams, inspector.getGenerators()))
+        for workstation, spec in zip(self.workstations, self.topology["workstations"]):
+            generators[spec["stream"]] = workstation.getGenerator()
+        return {key: generators[key] for key in getStreamKeys(self.topology)}
+
+    def getServiceTimeGenerators(self) -> Dict[str, RandomNumberGeneration]:
+        """
+        Gets the generator of each cleaning and service time distribution
+        Returns: Dictionary of the generators whose rate the topology gives by name, keyed by that name
+        """
+        generators = self.getStreamGenerators()
+        return {name: generators[key] for name, key in getNamedRateStreams(self.topology).items()}
 
     def run(self):
         """
@@ -271,16 +398,13 @@ class Simulation:
         done = False
         while not done:
             #print("----------------------------------------------------------------")
-            event:Event = self.fel.pop(0)
+            event:Event = self.fel.pop()
 
-            oldClock = self.clock
-            newClock = event.getStartTime()
-            timeElapsed = newClock - oldClock
+            self.clock = event.getStartTime()
             # print(f"Clock value: {self.clock}")
-            # print(f"Time elapsed since last event {timeElapsed}")
-            self.addBufferOccupancies(timeElapsed)
-            self.addAverageInSystem(timeElapsed)
-            self.clock = newClock
+            if self.trace is not None:
+                self.trace.recordEvent(self.clock, event.getEventType(), event.getEntityId(),
+                                       [buffer.size for buffer in self.buffers])
 
             if event.getEventType() == EventType.IS:
                 # print(
@@ -308,14 +432,290 @@ class Simulation:
                 self.addEventsToFEL(events)
             elif event.getEventType() == EventType.SSS:
                 self.setSteadyState()
+                done = self.pauseAtSteadyState
+            elif event.getEventType() == EventType.BE:
+                self.handleBatchEnded()
+            elif event.getEventType() == EventType.CP:
+                self.handleCheckpoint()
             elif event.getEventType() == EventType.SD:
-                done = True
+                # unless the run was extended past this Simulation Done event
+                if self.clock >= self.time:
+                    self.updateStatistics()
+                    if self.batchLength is not None:
+                        self.recordBatchTotals()
+                    done = True
             else:
                 raise ValueError("Unidentified EventType received.")
+            if self.recycleEvents:
+                event.release()
+        if self.trace is not None:
+            self.trace.flush()
+        if self.pauseAtSteadyState:
+            self.pauseAtSteadyState = False
+            return
         print("Simulation successfully completed")
         self.grabXis()
         # self.printStatistics()
 
+    def enableTracing(self, path: str, capacity: int = 65536):
+        """
+        Records every event handled from now on to a binary trace file, which TraceRecorder.readTrace maps into
+        memory. Without tracing, handling an event only costs one extra check
+        Args:
+            path: The trace file
+            capacity: The number of records buffered in memory before they are written
+        """
+        self.trace = TraceRecorder(path, len(self.buffers), capacity)
+
+    def runToSteadyState(self):
+        """
+        Runs the warm-up and stops right after steady state starts, so the warmed up simulation can be forked into
+        several scenarios. Calling run() afterwards continues to the end of the simulation
+        """
+        if self.clock >= self.warmup:
+            raise ValueError("The simulation is already past its warm-up")
+        self.pauseAtSteadyState = True
+        self.run()
+
+    def snapshot(self) -> bytes:
+        """
+        Takes an in-memory snapshot of the full state of the simulation
+        Returns:
+            bytes: The snapshot, which fromSnapshot turns into independent copies of the simulation
+        """
+        return pickle.dumps(self, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def fromSnapshot(snapshot: bytes, isRoundRobin: bool = None, seeds: Dict[int, int] = None,
+                     serviceRates: dict = None) -> "Simulation":
+        """
+        Creates a copy of a simulation from a snapshot, optionally changing the scenario it continues with. Taking one
+        snapshot after the warm-up and creating every scenario from it pays for the warm-up only once
+        Args:
+            snapshot: A snapshot taken by snapshot()
+            isRoundRobin: If given, the policy the inspectors use from now on
+            seeds: If given, every random number stream continues from these seeds instead, keyed the same way as the
+                   seeds of the Simulation, e.g. the seeds of another replication for an independent continuation
+            serviceRates: If given, rates that replace the current ones from now on, keyed the same way as
+                          SERVICE_RATES
+        Returns:
+            Simulation: The copy
+        """
+        sim = pickle.loads(snapshot)
+        if isRoundRobin is not None:
+            for inspector in sim.inspectors:
+                inspector.setRoundRobinPolicy(isRoundRobin)
+        if seeds is not None:
+            for key, generator in sim.getStreamGenerators().items():
+                generator.setXi(seeds[key])
+        if serviceRates is not None:
+            generators = sim.getServiceTimeGenerators()
+            for name, rate in serviceRates.items():
+                generators[name].setLambda(rate)
+        return sim
+
+    def fork(self, isRoundRobin: bool = None, seeds: Dict[int, int] = None, serviceRates: dict = None) -> "Simulation":
+        """
+        Creates an independent copy of the simulation in its current state, optionally changing the scenario it
+        continues with, as fromSnapshot describes
+        Returns:
+            Simulation: The copy
+        """
+        return Simulation.fromSnapshot(self.snapshot(), isRoundRobin, seeds, serviceRates)
+
+    def enableCheckpoints(self, path: str, interval: float):
+        """
+        Saves the simulation to a checkpoint file every interval minutes of simulated time, replacing the previous
+        checkpoint each time. A simulation loaded with loadCheckpoint continues exactly as this one would have
+        Args:
+            path: The checkpoint file
+            interval: The simulated time between checkpoints, in minutes
+        """
+        self.checkpointPath = path
+        self.checkpointInterval = interval
+        self.addEventToFEL(Event.create(self.clock, self.clock + interval, EventType.CP))
+
+    def handleCheckpoint(self):
+        """
+        Schedules the next checkpoint and then saves the simulation, so the saved future event list holds the next
+        checkpoint too and a resumed simulation keeps saving checkpoints
+        """
+        self.addEventToFEL(Event.create(self.clock, self.clock + self.checkpointInterval, EventType.CP))
+        self.saveCheckpoint(self.checkpointPath)
+
+    def saveCheckpoint(self, path: str):
+        """
+        Saves the full state of the simulation, including the future event list, the contents of the buffers, the
+        state of every inspector and workstation, the statistics and the random number streams, to a compressed file.
+        The file is replaced in one step, so a run killed while saving leaves the previous checkpoint intact
+        Args:
+            path: The checkpoint file
+        """
+        temporaryPath = path + ".tmp"
+        with gzip.open(temporaryPath, 'wb', compresslevel=6) as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporaryPath, path)
+
+    @staticmethod
+    def loadCheckpoint(path: str) -> "Simulation":
+        """
+        Loads a simulation saved by saveCheckpoint. Calling run() on it continues the simulation from where it was saved
+        Args:
+            path: The checkpoint file
+        Returns:
+            Simulation: The saved simulation
+        """
+        with gzip.open(path, 'rb') as f:
+            return pickle.load(f)
+
+    def extendRun(self, time: float):
+        """
+        Move the end of the simulation to a later time. Calling run() again continues the simulation up to that time
+        Args:
+            time: The new time the simulation ends at
+        """
+        self.time = time
+        self.steadyStateTime = self.time - self.warmup
+        self.addEventToFEL(Event.create(self.clock, self.time, EventType.SD))
+
+    def runBatchMeans(self, batchLength: float, numBatches: int = 30, metrics: List[str] = None,
+                      maxAutocorrelation: float = 0.2, maxBatchSize: int = 64) -> List[Replication]:
+        """
+        Runs a single long simulation after one warm-up, split into numBatches batches. While the lag-1
+        autocorrelation of the batch means of any of the chosen metrics is above maxAutocorrelation, the batch size is
+        doubled and the run is extended so there are still numBatches batches
+        Args:
+            batchLength: The length of the smallest batch, in minutes
+            numBatches: The number of batches to split the run into
+            metrics: The names of the quantities, as in Replication.getReplicationHeaders, that must have batch means
+                     that are close to independent. The throughput by default
+            maxAutocorrelation: The largest acceptable lag-1 autocorrelation
+            maxBatchSize: The largest batch size to try, as a multiple of batchLength
+        Returns:
+            List[Replication]: The statistics of each batch
+        """
+        self.startBatches(batchLength)
+        self.extendRun(self.getBatchBoundary(numBatches))
+        self.run()
+        headers = self.getStatistics().getReplicationHeaders()
+        columns = [headers.index(metric) for metric in (metrics if metrics else ['Throughput'])]
+        while True:
+            batches = self.getBatchMeans(self.batchSize, numBatches)
+            self.batchAutocorrelations = lag1Autocorrelations(batches)
+            if all(abs(self.batchAutocorrelations[column]) <= maxAutocorrelation for column in columns):
+                break
+            if 2 * self.batchSize > maxBatchSize:
+                print(f"Batch means are still correlated with batches of {self.batchSize * batchLength} minutes")
+                break
+            self.batchSize *= 2
+            self.extendRun(self.getBatchBoundary(self.batchSize * numBatches))
+            self.run()
+        return [self.createReplication(batch) for batch in batches]
+
+    def runWithBatches(self, batchLength: float) -> List[Replication]:
+        """
+        Runs the simulation to its end time, recording the statistics of every batch of batchLength minutes after
+        the warm-up
+        Args:
+            batchLength: The length of each batch, in minutes
+        Returns:
+            List[Replication]: The statistics of each complete batch
+        """
+        self.startBatches(batchLength)
+        self.run()
+        return [self.createReplication(batch) for batch in self.getBatchMeans(1, len(self.batchTotals) - 1)]
+
+    def startBatches(self, batchLength: float):
+        """
+        Schedules the first batch to start when steady state starts
+        Args:
+            batchLength: The length of the smallest batch, in minutes
+        """
+        if self.clock > 0:
+            raise ValueError("Batches must be recorded from the start of the simulation")
+        self.batchLength = batchLength
+        self.batchTotals = []
+        self.batchSize = 1
+        self.addEventToFEL(Event.create(self.clock, self.warmup, EventType.BE))
+
+    def getBatchBoundary(self, index: int) -> float:
+        """
+        Gets the time the smallest batch with the given index starts at
+        Args:
+            index: The index of the batch
+        Returns: The start time of the batch
+        """
+        return self.warmup + index * self.batchLength
+
+    def handleBatchEnded(self):
+        """
+        Records the totals at the batch boundary and schedules the next Batch Ended event
+        """
+        self.recordBatchTotals()
+        self.addEventToFEL(Event.create(self.clock, self.getBatchBoundary(len(self.batchTotals)), EventType.BE))
+
+    def recordBatchTotals(self):
+        """
+        Records the totals for every batch boundary reached that has not been recorded yet
+        """
+        while self.getBatchBoundary(len(self.batchTotals)) <= self.clock:
+            self.batchTotals.append(self.getTotals())
+
+    def getTotals(self) -> List[float]:
+        """
+        Gets the totals accumulated since steady state started, in the same order as Replication.getReplicationData:
+        the number of products, minutes busy of each workstation, minutes blocked of each inspector and the
+        cumulative occupancy of each buffer. The services and blocked spells in progress count up to the current
+        time, so that each batch is only credited with the part of a spell that falls within it
+        Returns: The totals
+        """
+        totals = [sum(workstation.getNumProductsCreated() for workstation in self.workstations)]
+        totals += [workstation.getMinutesBusyUntil(self.clock) for workstation in self.workstations]
+        totals += [inspector.getTimeBlockedUntil(self.clock) for inspector in self.inspectors]
+        totals += [buffer.occupancy.getArea(self.clock) for buffer in self.buffers]
+        return totals
+
+    def getBatchMeans(self, batchSize: int, numBatches: int) -> List[List[float]]:
+        """
+        Gets the quantities of interest of each batch from the totals recorded at the batch boundaries
+        Args:
+            batchSize: The size of each batch as a multiple of the smallest batch
+            numBatches: The number of batches
+        Returns: One list of the quantities of interest per batch
+        Raises:
+            ValueError: If a busy or blocked probability of a batch is outside [0, 1]
+        """
+        length = batchSize * self.batchLength
+        probabilityColumns = range(1, 1 + len(self.workstations) + len(self.inspectors))
+        batches = []
+        for batch in range(numBatches):
+            start = self.batchTotals[batch * batchSize]
+            end = self.batchTotals[(batch + 1) * batchSize]
+            batches.append([(endTotal - startTotal) / length for startTotal, endTotal in zip(start, end)])
+            for column in probabilityColumns:
+                if not -PROBABILITY_TOLERANCE <= batches[-1][column] <= 1 + PROBABILITY_TOLERANCE:
+                    raise ValueError(f"Batch {batch + 1} has the probability {batches[-1][column]} in column {column}")
+        return batches
+
+    def createReplication(self, data: List[float]) -> Replication:
+        """
+        Store quantities of interest given in the order of Replication.getReplicationData into a Replication object
+        Args:
+            data: The quantities of interest
+        Returns:
+            (Replication): The created Replication object
+        """
+        replication = Replication()
+        values = iter(data)
+        replication.setThroughput(next(values))
+        for workstation in self.workstations:
+            replication.addWorkstationBusyProbability(workstation.getId(), next(values))
+        for inspector in self.inspectors:
+            replication.addInspectorBlockedProbability(inspector.getId(), next(values))
+        for buffer in self.buffers:
+            replication.addAvgBufferOccupancy(buffer.getId(), next(values))
+        return replication
+
     def printWorkstationStats(self, workstation:WorkStation):
         """
         Print out the statistics of a given workstation
@@ -377,9 +777,7 @@ class Simulation:
         for workstation in self.workstations:
             self.printWorkstationStats(workstation)
             totalProducts += workstation.getNumProductsCreated()
-            for comp in workstation.componentsBuilt:
-                time = comp.getDepartureTime() - comp.getArrivalTime()
-                totalCompletedCompTime += time
+            totalCompletedCompTime += workstation.getTimeInSystem().getSum()
         for inspector in self.inspectors:
             self.printInspectorStats(inspector)
             if inspector.isBlocked:
@@ -0,0 +1,239 @@
+from typing import Callable, Dict, List, Tuple
+from Distributions import getCdf, getMean, getTailExpectation
+from RandomNumberGeneration import RandomNumberGeneration
+import math
+import numpy as np
+
+DEFAULT_TABLE_SIZE = 1024
+BISECTION_STEPS = 64
+# the largest relative difference between the mean of a table and the mean of its distribution. Tables of heavy
+# tailed distributions are refined up to MAX_TABLE_SIZE cells until their mean is this close
+TABLE_MEAN_TOLERANCE = 0.005
+MAX_TABLE_SIZE = 16384
+
+# the quantile tables already computed by this process with the scale of their tail, keyed by the distribution, its
+# parameters and the table size
+distributionTables: Dict[Tuple, Tuple[List[float], float]] = {}
+
+
+class InverseTableGenerator(RandomNumberGeneration):
+    """
+    A generator that samples any continuous distribution from a table of its quantiles at equally spaced
+    probabilities, interpolating linearly between them. A draw takes one number of the generator's stream, looks up
+    the cell it falls in and interpolates, so it costs the same whatever the distribution, with no search. For a
+    distribution without an upper bound, the last cell is sampled from an exponential tail instead of being
+    interpolated to an arbitrary largest value
+    """
+
+    def __init__(self, xi: int, quantiles: List[float], tailScale: float = None):
+        """
+        Args:
+            xi: The initial seed value
+            quantiles: The quantiles at the probabilities 0, 1/n, ..., 1 for a table of n cells, non-decreasing. With
+                       a tail, the quantiles at 0, 1/n, ..., (n-1)/n
+            tailScale: If given, the values above the last quantile are the last quantile plus an exponential with
+                       this mean
+        """
+        quantiles = np.asarray(quantiles, dtype=np.float64)
+        if len(quantiles) < 2 or (np.diff(quantiles) < 0).any():
+            raise ValueError("The quantile table needs at least two non-decreasing quantiles")
+        if tailScale is not None and tailScale <= 0:
+            raise ValueError(f"The mean of the tail must be positive, not {tailScale}")
+        if tailScale is None:
+            cellMeans = (quantiles[:-1] + quantiles[1:]) / 2
+        else:
+            cellMeans = np.append((quantiles[:-1] + quantiles[1:]) / 2, quantiles[-1] + tailScale)
+        RandomNumberGeneration.__init__(self, xi, 1 / float(cellMeans.mean()))
+        self.tableSize = len(cellMeans)
+        # Python lists, since indexing them gives floats without creating NumPy scalars
+        self.quantiles = quantiles[:self.tableSize].tolist()
+        self.widths = np.diff(quantiles).tolist()
+        self.tailCell = self.tableSize - 1 if tailScale is not None else -1
+        self.tailScale = tailScale
+
+    def setLambda(self, lmbda: float):
+        raise ValueError("The rate of a generator sampling from a table cannot be changed")
+
+    def generateRandomServiceTime(self) -> float:
+        """
+        Generates a service time by inverting the tabulated distribution function at the next random number
+        Returns: The service time
+        """
+        self.lcm()
+        position = self.xi / (self.m + 1) * self.tableSize
+        cell = int(position)
+        if cell == self.tailCell:
+            # within the last cell, cell + 1 - position is uniform on (0, 1]
+            return self.quantiles[cell] - self.tailScale * math.log(cell + 1 - position)
+        return self.quantiles[cell] + (position - cell) * self.widths[cell]
+
+
+class AliasGenerator(RandomNumberGeneration):
+    """
+    A generator that samples a piecewise-linear distribution function, i.e. a density that is constant on each of a
+    set of intervals, with the alias method. The one random number of a draw picks a column of the alias table, its
+    fraction decides between the column's interval and its alias, and what is left of the fraction gives the position
+    within that interval, so every draw takes constant time and one number of the stream
+    """
+
+    def __init__(self, xi: int, breakpoints: List[float], probabilities: List[float]):
+        """
+        Args:
+            xi: The initial seed value
+            breakpoints: The ends of the intervals, increasing, one more than the probabilities
+            probabilities: The probability of each interval, summing to one
+        """
+        breakpoints = np.asarray(breakpoints, dtype=np.float64)
+        probabilities = np.asarray(probabilities, dtype=np.float64)
+        if len(breakpoints) != len(probabilities) + 1 or (np.diff(breakpoints) <= 0).any():
+            raise ValueError("The breakpoints must be increasing and one more than the probabilities")
+        if (probabilities < 0).any() or not np.isclose(probabilities.sum(), 1):
+            raise ValueError("The probabilities must be non-negative and sum to one")
+        mean = float((probabilities * (breakpoints[:-1] + breakpoints[1:]) / 2).sum())
+        RandomNumberGeneration.__init__(self, xi, 1 / mean)
+        self.numColumns = len(probabilities)
+        self.lows = breakpoints[:-1].tolist()
+        self.widths = np.diff(breakpoints).tolist()
+        self.thresholds, self.aliases = buildAliasTable(probabilities / probabilities.sum())
+
+    def setLambda(self, lmbda: float):
+        raise ValueError("The rate of a generator sampling from a table cannot be changed")
+
+    def generateRandomServiceTime(self) -> float:
+        """
+        Generates a service time from the next random number
+        Returns: The service time
+        """
+        self.lcm()
+        position = self.xi / (self.m + 1) * self.numColumns
+        column = int(position)
+        fraction = position - column
+        threshold = self.thresholds[column]
+        if fraction < threshold:
+            return self.lows[column] + fraction / threshold * self.widths[column]
+        interval = self.aliases[column]
+        return self.lows[interval] + (fraction - threshold) / (1 - threshold) * self.widths[interval]
+
+
+def buildAliasTable(probabilities: np.ndarray) -> Tuple[List[float], List[int]]:
+    """
+    Builds the alias table of a discrete distribution with Vose's method. Column i is kept with probability
+    thresholds[i] and otherwise gives aliases[i]
+    Args:
+        probabilities: The probability of each outcome, summing to one
+    Returns:
+        Tuple[List[float], List[int]]: The thresholds and aliases of the columns
+    """
+    n = len(probabilities)
+    scaled = (probabilities * n).tolist()
+    thresholds = [1.0] * n
+    aliases = list(range(n))
+    small = [i for i, value in enumerate(scaled) if value < 1]
+    large = [i for i, value in enumerate(scaled) if value >= 1]
+    while small and large:
+        less, more = small.pop(), large.pop()
+        thresholds[less] = scaled[less]
+        aliases[less] = more
+        scaled[more] -= 1 - scaled[less]
+        (small if scaled[more] < 1 else large).append(more)
+    # whatever is left over only differs from 1 by rounding
+    for i in small + large:
+        thresholds[i] = 1.0
+    return thresholds, aliases
+
+
+def getQuantileTable(cdf: Callable[[np.ndarray], np.ndarray], tableSize: int = DEFAULT_TABLE_SIZE) -> List[float]:
+    """
+    Inverts a continuous distribution function at the probabilities 0, 1/n, ..., (n-1)/n. Every quantile is found by
+    bisection at once
+    Args:
+        cdf: The distribution function of a positive random variable, evaluated on arrays
+        tableSize: The number of cells n of the table
+    Returns:
+        List[float]: The n quantiles
+    """
+    probabilities = np.arange(tableSize) / tableSize
+    upper = 1.0
+    while cdf(np.array([upper]))[0] < probabilities[-1]:
+        upper *= 2
+    low = np.zeros(tableSize)
+    high = np.full(tableSize, upper)
+    for _ in range(BISECTION_STEPS):
+        middle = (low + high) / 2
+        below = cdf(middle) < probabilities
+        low = np.where(below, middle, low)
+        high = np.where(below, high, middle)
+    quantiles = (low + high) / 2
+    quantiles[0] = 0.0
+    return quantiles.tolist()
+
+
+def getDistributionTable(family: str, parameters: Dict[str, float],
+                         tableSize: int = DEFAULT_TABLE_SIZE) -> Tuple[List[float], float]:
+    """
+    Gets the quantile table of a distribution of Distributions.FAMILIES, computing it only the first time it is asked
+    for in this process. The values above the last quantile q are sampled as q plus an exponential whose mean is the
+    mean excess of the distribution above q, so the tail keeps its share of the mean. Interpolating linearly still
+    overestimates the mean of the cells where the quantiles grow quickly, so the number of cells is doubled until the
+    mean of the table is within TABLE_MEAN_TOLERANCE of the mean of the distribution
+    Args:
+        family: The distribution
+        parameters: The parameters of the distribution
+        tableSize: The smallest number of cells of the table
+    Returns:
+        Tuple[List[float], float]: The quantiles, as getQuantileTable gives them, and the mean of the tail above the
+        last one, the arguments of an InverseTableGenerator
+    Raises:
+        ValueError: If the mean of a table of MAX_TABLE_SIZE cells is still not close enough
+    """
+    key = (family, tuple(sorted(parameters.items())), tableSize)
+    if key not in distributionTables:
+        mean = getMean(family, parameters)
+        size = tableSize
+        while True:
+            quantiles = getQuantileTable(lambda x: getCdf(family, parameters, x), size)
+            tailScale = size * getTailExpectation(family, parameters, quantiles[-1]) - quantiles[-1]
+            # the midpoints of the interpolated cells, then the mean of the tail cell
+            tableMean = (sum(quantiles) - quantiles[0] / 2 + quantiles[-1] / 2 + tailScale) / size
+            if abs(tableMean - mean) <= TABLE_MEAN_TOLERANCE * mean:
+                break
+            if 2 * size > max(tableSize, MAX_TABLE_SIZE):
+                raise ValueError(f"The table of {family} {parameters} has the mean {tableMean} instead of {mean}")
+            size *= 2
+        distributionTables[key] = (quantiles, tailScale)
+    return distributionTables[key]
+
+
+def createEmpiricalGenerator(xi: int, observations: np.ndarray, lowerBound: float = 0.0) -> InverseTableGenerator:
+    """
+    Creates a generator for the continuous empirical distribution of observations: each of the n sorted observations
+    is the quantile at i/n and the distribution function is interpolated linearly between them, starting at the lower
+    bound
+    Args:
+        xi: The initial seed value
+        observations: The observations
+        lowerBound: The smallest possible value, at most the smallest observation
+    Returns:
+        InverseTableGenerator: The generator
+    """
+    quantiles = np.sort(np.asarray(observations, dtype=np.float64))
+    if lowerBound > quantiles[0]:
+        raise ValueError(f"The lower bound {lowerBound} is above the smallest observation {quantiles[0]}")
+    return InverseTableGenerator(xi, np.concatenate(([lowerBound], quantiles)))
+
+
+def createPiecewiseLinearGenerator(xi: int, breakpoints: List[float],
+                                   cumulativeProbabilities: List[float]) -> AliasGenerator:
+    """
+    Creates a generator for the distribution function that goes through the given points and is linear between them
+    Args:
+        xi: The initial seed value
+        breakpoints: The values, increasing
+        cumulativeProbabilities: The distribution function at each value, from 0 to 1
+    Returns:
+        AliasGenerator: The generator
+    """
+    cumulativeProbabilities = np.asarray(cumulativeProbabilities, dtype=np.float64)
+    if cumulativeProbabilities[0] != 0 or cumulativeProbabilities[-1] != 1:
+        raise ValueError("The cumulative probabilities must start at 0 and end at 1")
+    return AliasGenerator(xi, breakpoints, np.diff(cumulativeProbabilities))
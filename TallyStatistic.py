@@ -0,0 +1,110 @@
+import math
+import random
+
+
+class TallyStatistic:
+    """
+    Keeps running statistics of a series of observations, such as the time each component spent in the system,
+    without storing the observations. The variance is updated with Welford's method. Optionally a fixed size uniform
+    sample of the raw records is kept using reservoir sampling.
+    """
+
+    def __init__(self, reservoirSize: int = 0, seed: int = 0):
+        """
+        Initialize the statistic
+        Args:
+            reservoirSize: The number of raw records to keep a uniform sample of, 0 to keep none
+            seed: The seed for choosing which records are kept in the sample
+        """
+        self.count = 0
+        self.total = 0.0
+        self.mean = 0.0
+        self.sumSquaredDeviations = 0.0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+        self.reservoirSize = reservoirSize
+        self.reservoir = []
+        self.reservoirRandom = random.Random(seed) if reservoirSize > 0 else None
+
+    def record(self, value: float, rawRecord=None):
+        """
+        Records an observation
+        Args:
+            value: The observed value
+            rawRecord: The record to keep in the sample if a reservoir is kept, the value itself if not given
+        """
+        self.count += 1
+        self.total += value
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.sumSquaredDeviations += delta * (value - self.mean)
+        if value < self.minimum:
+            self.minimum = value
+        if value > self.maximum:
+            self.maximum = value
+        if self.reservoirSize > 0:
+            self.__sample(value if rawRecord is None else rawRecord)
+
+    def __sample(self, rawRecord):
+        """
+        Keeps each record seen so far in the sample with equal probability (Algorithm R)
+        Args:
+            rawRecord: The record to possibly keep
+        """
+        if len(self.reservoir) < self.reservoirSize:
+            self.reservoir.append(rawRecord)
+        else:
+            index = self.reservoirRandom.randrange(self.count)
+            if index < self.reservoirSize:
+                self.reservoir[index] = rawRecord
+
+    def getCount(self) -> int:
+        """
+        Gets the number of observations
+        Returns: The number of observations
+        """
+        return self.count
+
+    def getSum(self) -> float:
+        """
+        Gets the sum of the observations
+        Returns: The sum of the observations
+        """
+        return self.total
+
+    def getMean(self) -> float:
+        """
+        Gets the mean of the observations
+        Returns: The mean, 0 if there are no observations
+        """
+        return self.mean
+
+    def getVariance(self) -> float:
+        """
+        Gets the sample variance of the observations
+        Returns: The sample variance, 0 if there are fewer than two observations
+        """
+        if self.count < 2:
+            return 0.0
+        return self.sumSquaredDeviations / (self.count - 1)
+
+    def getMin(self) -> float:
+        """
+        Gets the smallest observation
+        Returns: The smallest observation, infinity if there are no observations
+        """
+        return self.minimum
+
+    def getMax(self) -> float:
+        """
+        Gets the largest observation
+        Returns: The largest observation, negative infinity if there are no observations
+        """
+        return self.maximum
+
+    def getReservoir(self) -> list:
+        """
+        Gets the uniform sample of the raw records
+        Returns: The sampled records, empty if no reservoir is kept
+        """
+        return self.reservoir
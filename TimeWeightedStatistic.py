@@ -0,0 +1,77 @@
+class TimeWeightedStatistic:
+    """
+    Keeps the time-weighted area under a quantity that only changes at discrete points in time, such as a buffer's
+    occupancy. The area only needs to be updated when the quantity changes, not on every event.
+    """
+
+    def __init__(self, initialValue: float = 0.0, startTime: float = 0.0):
+        """
+        Initialize the statistic
+        Args:
+            initialValue: The value of the quantity at the start time
+            startTime: The time the statistic starts recording at
+        """
+        self.value = initialValue
+        self.startTime = startTime
+        self.lastChangeTime = startTime
+        self.area = 0.0
+
+    def getValue(self) -> float:
+        """
+        Gets the current value of the quantity
+        Returns: The current value
+        """
+        return self.value
+
+    def update(self, currentTime: float, value: float):
+        """
+        Records a change of the quantity, accumulating the area under the old value since the last change
+        Args:
+            currentTime: The time the quantity changed at
+            value: The new value of the quantity
+        """
+        self.area += self.value * (currentTime - self.lastChangeTime)
+        self.lastChangeTime = currentTime
+        self.value = value
+
+    def add(self, currentTime: float, delta: float):
+        """
+        Records a change of the quantity by the given amount
+        Args:
+            currentTime: The time the quantity changed at
+            delta: The amount the quantity changed by
+        """
+        self.update(currentTime, self.value + delta)
+
+    def reset(self, currentTime: float):
+        """
+        Discards the area accumulated so far and starts recording again from the current time, keeping the current value
+        Args:
+            currentTime: The time to start recording from
+        """
+        self.area = 0.0
+        self.startTime = currentTime
+        self.lastChangeTime = currentTime
+
+    def getArea(self, currentTime: float = None) -> float:
+        """
+        Gets the area under the quantity since the start time
+        Args:
+            currentTime: If given, includes the area since the last change up to this time
+        Returns: The time-weighted area
+        """
+        if currentTime is None:
+            return self.area
+        return self.area + self.value * (currentTime - self.lastChangeTime)
+
+    def getAverage(self, currentTime: float) -> float:
+        """
+        Gets the time-weighted average of the quantity since the start time
+        Args:
+            currentTime: The time to average up to
+        Returns: The time-weighted average, 0 if no time has elapsed
+        """
+        elapsed = currentTime - self.startTime
+        if elapsed <= 0:
+            return 0.0
+        return self.getArea(currentTime) / elapsed
@@ -0,0 +1,190 @@
+from typing import Dict, List
+from ComponentType import ComponentType
+from Distributions import FAMILIES
+import json
+import os
+
+# the factory of the project, as the simulation builds it when no other topology is given
+DEFAULT_TOPOLOGY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Factory.json")
+# exponential times are sampled with a rate, replayed and bootstrapped times are served from a data file, empirical
+# times are interpolated between the observations of a data file, piecewise-linear times follow the distribution
+# function through the given points, and gamma, Weibull and lognormal times are sampled from a table of quantiles
+DISTRIBUTIONS = ["exponential", "replay", "bootstrap", "empirical", "piecewiseLinear"] + \
+                [family for family in FAMILIES if family != "exponential"]
+
+
+def loadTopology(path: str = DEFAULT_TOPOLOGY_FILE) -> dict:
+    """
+    Loads a factory from a json file. The file lists the buffers (their id, the component type they hold and
+    optionally their capacity), the inspectors (their id, the component types they clean with the stream and
+    distribution of each, the stream they choose a component with if they clean more than one, and the ids of the
+    buffers they deliver to, in the order they try them) and the workstations (their id, stream, distribution and the
+    ids of the buffers they take from). Factory.json describes the factory of the project
+    Args:
+        path: The json file
+    Returns:
+        dict: The validated topology
+    """
+    with open(path, encoding='UTF8') as f:
+        topology = json.load(f)
+    validateTopology(topology)
+    return topology
+
+
+def validateTopology(topology: dict):
+    """
+    Checks that a topology describes a factory that can be simulated
+    Args:
+        topology: The topology
+    Raises:
+        ValueError: If an id or stream is repeated, a component type or distribution is unknown, an inspector or
+                    workstation refers to a buffer that does not exist, or an inspector delivers to a buffer of a
+                    component type it does not clean
+    """
+    bufferTypes = {}
+    for buffer in topology["buffers"]:
+        if buffer["id"] in bufferTypes:
+            raise ValueError(f"Buffer {buffer['id']} is defined more than once")
+        if buffer["componentType"] not in ComponentType.__members__:
+            raise ValueError(f"Buffer {buffer['id']} holds the unknown component type {buffer['componentType']}")
+        bufferTypes[buffer["id"]] = buffer["componentType"]
+
+    streams = []
+    for entity in ("inspectors", "workstations"):
+        ids = [spec["id"] for spec in topology[entity]]
+        if len(set(ids)) != len(ids):
+            raise ValueError(f"The {entity} ids {ids} are not unique")
+    for inspector in topology["inspectors"]:
+        name = f"Inspector {inspector['id']}"
+        componentTypes = [component["componentType"] for component in inspector["components"]]
+        for component in inspector["components"]:
+            validateDistribution(component, name)
+            streams.append(component["stream"])
+        if len(componentTypes) > 1:
+            if "chooserStream" not in inspector:
+                raise ValueError(f"{name} cleans more than one component type but has no chooserStream")
+            streams.append(inspector["chooserStream"])
+        for bufferId in inspector["buffers"]:
+            if bufferId not in bufferTypes:
+                raise ValueError(f"{name} delivers to buffer {bufferId}, which does not exist")
+            if bufferTypes[bufferId] not in componentTypes:
+                raise ValueError(f"{name} delivers to buffer {bufferId} but does not clean {bufferTypes[bufferId]}")
+    for workstation in topology["workstations"]:
+        name = f"Workstation {workstation['id']}"
+        validateDistribution(workstation, name)
+        streams.append(workstation["stream"])
+        for bufferId in workstation["buffers"]:
+            if bufferId not in bufferTypes:
+                raise ValueError(f"{name} takes from buffer {bufferId}, which does not exist")
+    if len(set(streams)) != len(streams):
+        raise ValueError(f"The streams {streams} are not unique, every generator needs its own")
+
+
+def validateDistribution(spec: dict, name: str):
+    """
+    Checks the distribution of one cleaning or service time
+    Args:
+        spec: The component of an inspector or the workstation
+        name: The entity it belongs to, for the error message
+    Raises:
+        ValueError: If the distribution is unknown, an exponential rate is neither a number nor a name, the data
+                    file of replayed or empirical times is not named, the points of a piecewise-linear distribution
+                    are missing, or the parameters of a tabulated distribution do not match its family
+    """
+    if spec["distribution"] not in DISTRIBUTIONS:
+        raise ValueError(f"{name} uses the unknown distribution {spec['distribution']}, expected one of "
+                         f"{DISTRIBUTIONS}")
+    if spec["distribution"] == "exponential" and not isinstance(spec.get("rate"), (str, int, float)):
+        raise ValueError(f"{name} has the rate {spec.get('rate')}, expected a number or the name of a rate")
+    if spec["distribution"] in ("replay", "bootstrap", "empirical") and not isinstance(spec.get("data"), str):
+        raise ValueError(f"{name} replays {spec.get('data')}, expected the name of a data file")
+    if spec["distribution"] == "piecewiseLinear":
+        breakpoints, probabilities = spec.get("breakpoints"), spec.get("cumulativeProbabilities")
+        if not isinstance(breakpoints, list) or not isinstance(probabilities, list) or \
+                len(breakpoints) != len(probabilities) or len(breakpoints) < 2:
+            raise ValueError(f"{name} needs as many breakpoints as cumulativeProbabilities, at least two")
+    if spec["distribution"] in FAMILIES and spec["distribution"] != "exponential" and \
+            sorted(spec.get("parameters", {})) != sorted(FAMILIES[spec["distribution"]]):
+        raise ValueError(f"{name} has the parameters {spec.get('parameters')}, expected "
+                         f"{FAMILIES[spec['distribution']]}")
+
+
+def getRate(spec: dict, serviceRates: dict) -> float:
+    """
+    Gets the rate of one cleaning or service time. Rates given by name are looked up in the service rates, so sweeps
+    and scenarios can change them without editing the topology
+    Args:
+        spec: The component of an inspector or the workstation
+        serviceRates: The rates of the simulation, keyed by name
+    Returns:
+        float: The rate
+    """
+    rate = spec["rate"]
+    return serviceRates[rate] if isinstance(rate, str) else float(rate)
+
+
+def getStreamKeys(topology: dict) -> List[int]:
+    """
+    Gets the stream of every generator in the factory
+    Args:
+        topology: The topology
+    Returns:
+        List[int]: The streams, sorted
+    """
+    keys = [workstation["stream"] for workstation in topology["workstations"]]
+    for inspector in topology["inspectors"]:
+        keys += [component["stream"] for component in inspector["components"]]
+        if len(inspector["components"]) > 1:
+            keys.append(inspector["chooserStream"])
+    return sorted(keys)
+
+
+def getDistributionSpecs(topology: dict) -> List[dict]:
+    """
+    Gets the spec of every cleaning and service time in the factory
+    Args:
+        topology: The topology
+    Returns:
+        List[dict]: The components of the inspectors, then the workstations. These are the topology's own dicts
+    """
+    specs = [component for inspector in topology["inspectors"] for component in inspector["components"]]
+    return specs + topology["workstations"]
+
+
+def getNamedRateStreams(topology: dict) -> Dict[str, int]:
+    """
+    Gets the stream of every cleaning and service time whose rate is given by name
+    Args:
+        topology: The topology
+    Returns:
+        Dict[str, int]: The streams keyed by the name of their rate
+    """
+    specs = getDistributionSpecs(topology)
+    return {spec["rate"]: spec["stream"] for spec in specs if isinstance(spec.get("rate"), str)}
+
+
+def getReplayTopology(topology: dict, bootstrap: bool = False) -> dict:
+    """
+    Gets a copy of a topology that serves recorded observations instead of sampling exponentials, wherever the rate
+    is given by name. The rates are named after the data files they were fitted to, e.g. servinsp1 for servinsp1.dat
+    Args:
+        topology: The topology
+        bootstrap: If True, the observations are resampled. Otherwise they are replayed in order
+    Returns:
+        dict: The new topology
+    """
+    def replay(spec: dict) -> dict:
+        if not isinstance(spec.get("rate"), str):
+            return dict(spec)
+        replayed = {key: value for key, value in spec.items() if key != "rate"}
+        replayed["distribution"] = "bootstrap" if bootstrap else "replay"
+        replayed["data"] = spec["rate"]
+        return replayed
+
+    inspectors = [{**inspector, "components": [replay(component) for component in inspector["components"]]}
+                  for inspector in topology["inspectors"]]
+    return {**topology, "inspectors": inspectors,
+            "workstations": [replay(workstation) for workstation in topology["workstations"]]}
+
+
+DEFAULT_TOPOLOGY = loadTopology()
@@ -0,0 +1,117 @@
+from EventType import EventType
+import numpy as np
+import struct
+
+# events are stored as the index of their type in this list
+EVENT_TYPES = list(EventType)
+EVENT_TYPE_CODES = {eventType: code for code, eventType in enumerate(EVENT_TYPES)}
+# hashing an Enum member runs Python code, so the recorder looks the codes up by the identity of the members instead
+CODES_BY_ID = {id(eventType): code for eventType, code in EVENT_TYPE_CODES.items()}
+MAGIC = b"SIMTRACE"
+# version 2 widened the entity ids and buffer sizes to 32 bits
+VERSION = 2
+# magic, version and number of buffers
+HEADER = struct.Struct("<8sII")
+
+
+def getRecordFormat(numBuffers: int) -> str:
+    """
+    Gets the layout of one trace record: the clock, the event type code, the id of the entity the event belongs to (-1
+    for events without one) and the size of every buffer when the event is taken off the future event list, before it
+    is handled
+    Args:
+        numBuffers: The number of buffers in the simulation
+    Returns:
+        str: The struct format of a record
+    """
+    return f"<dBi{numBuffers}I"
+
+
+def getTraceDtype(numBuffers: int) -> np.dtype:
+    """
+    Gets the NumPy dtype matching getRecordFormat, for reading traces
+    Args:
+        numBuffers: The number of buffers in the simulation
+    Returns:
+        np.dtype: The packed record dtype
+    """
+    return np.dtype([("time", "<f8"), ("eventType", "u1"), ("entityId", "<i4"), ("bufferSizes", "<u4", (numBuffers,))])
+
+
+def readTrace(path: str) -> np.memmap:
+    """
+    Maps a trace file into memory without reading it, so even traces of very long runs can be sliced and filtered
+    with NumPy, e.g. trace[trace["eventType"] == EVENT_TYPE_CODES[EventType.WD]]["time"]
+    Args:
+        path: The trace file
+    Returns:
+        np.memmap: The records, with the fields time, eventType, entityId and bufferSizes
+    """
+    with open(path, "rb") as f:
+        magic, version, numBuffers = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path} is not a version {VERSION} simulation trace")
+    return np.memmap(path, dtype=getTraceDtype(numBuffers), mode="r", offset=HEADER.size)
+
+
+class TraceRecorder:
+    """
+    Records every handled event as a fixed width binary record. Records are packed into a preallocated buffer, which
+    is written to the trace file whenever it fills up and when flush is called
+    """
+
+    def __init__(self, path: str, numBuffers: int, capacity: int = 65536):
+        """
+        Creates the trace file, replacing any existing one
+        Args:
+            path: The trace file
+            numBuffers: The number of buffers in the simulation
+            capacity: The number of records buffered before they are written
+        """
+        self.path = path
+        self.numBuffers = numBuffers
+        self.capacity = capacity
+        self.record = struct.Struct(getRecordFormat(numBuffers))
+        self.buffer = bytearray(self.record.size * capacity)
+        self.count = 0
+        self.numWritten = 0
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, numBuffers))
+
+    def recordEvent(self, time: float, eventType: EventType, entityId: int, bufferSizes: list):
+        """
+        Adds a record for a handled event
+        Args:
+            time: The clock when the event was handled
+            eventType: The type of the event
+            entityId: The id of the inspector or workstation the event belongs to, or None
+            bufferSizes: The size of every buffer before the event is handled
+        """
+        self.record.pack_into(self.buffer, self.count * self.record.size, time, CODES_BY_ID[id(eventType)],
+                              -1 if entityId is None else entityId, *bufferSizes)
+        self.count += 1
+        if self.count == self.capacity:
+            self.flush()
+
+    def flush(self):
+        """
+        Writes the buffered records to the trace file. Records are written right after the ones this recorder has
+        already written and anything after them is cut off, so a simulation resumed from a checkpoint rewrites the
+        events it handled after the checkpoint instead of duplicating them
+        """
+        with open(self.path, "r+b") as f:
+            f.seek(HEADER.size + self.numWritten * self.record.size)
+            f.write(memoryview(self.buffer)[:self.count * self.record.size])
+            f.truncate()
+        self.numWritten += self.count
+        self.count = 0
+
+    def __getstate__(self) -> dict:
+        # struct objects cannot be pickled, so the record layout is rebuilt when a checkpoint is loaded
+        state = dict(self.__dict__)
+        del state["record"]
+        return state
+
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        self.record = struct.Struct(getRecordFormat(self.numBuffers))
@@ -0,0 +1,372 @@
+from typing import Dict, List
+from RandomNumberGeneration import RandomNumberGeneration
+from Replication import Replication
+from Simulation import createBuffers, createInspectors, createWorkstations, getSharedBufferSubscribers, \
+    MAX_BUFFER_SIZE, SERVICE_RATES, SIMULATION_TIME, WARMUP_TIME
+from Topology import DEFAULT_TOPOLOGY
+import numpy as np
+
+
+class VectorizedSimulation:
+    """
+    Simulates many replications of the factory built by createBuffers, createInspectors and createWorkstations at once.
+    The state of every replication is held in NumPy arrays with one row per replication, and every step processes the
+    next timed event (Inspector Done, Workstation Done, Steady State Started or Simulation Done) of every replication
+    together. The Inspect Started and Workstation Started events that follow at the same time are handled right away,
+    in the same order the Simulation handles them, so each replication gives the same statistics as a Simulation run
+    with the same seeds.
+    """
+
+    def __init__(self, replicationSeeds: List[Dict[int, int]], isRoundRobin: bool, time: float = SIMULATION_TIME,
+                 warmup: float = WARMUP_TIME, maxBufferSize: int = MAX_BUFFER_SIZE, serviceRates: dict = None,
+                 topology: dict = None):
+        """
+        Args:
+            replicationSeeds: The seeds of each replication, keyed the same way the Simulation expects
+            isRoundRobin: If True, the inspectors use the round robin policy. Otherwise the original priority policy
+            time: The time the replications end at, in minutes
+            warmup: The time steady state starts at, in minutes
+            maxBufferSize: The capacity of every buffer
+            serviceRates: Rates that replace the ones in SERVICE_RATES, keyed the same way
+            topology: The factory to simulate, as loaded by loadTopology. The factory of the project if None
+        """
+        self.time = time
+        self.topology = DEFAULT_TOPOLOGY if topology is None else topology
+        self.maxBufferSize = maxBufferSize
+        self.serviceRates = {**SERVICE_RATES, **(serviceRates or {})}
+        self.warmup = warmup
+        self.steadyStateTime = self.time - self.warmup
+        self.isRoundRobin = isRoundRobin
+        self.numReplications = len(replicationSeeds)
+        self.streamKeys = sorted(replicationSeeds[0].keys())
+        self.compileTopology()
+
+        n = self.numReplications
+        self.xis = np.array([[seeds[key] for key in self.streamKeys] for seeds in replicationSeeds], dtype=np.uint64)
+        self.clock = np.zeros(n)
+        self.isSteadyState = np.zeros(n, dtype=bool)
+        self.done = np.zeros(n, dtype=bool)
+
+        numInspectors = len(self.inspectorIds)
+        self.inspectorDoneTime = np.zeros((n, numInspectors))
+        self.isBlocked = np.zeros((n, numInspectors), dtype=bool)
+        self.blockedStartTime = np.zeros((n, numInspectors))
+        self.timeBlocked = np.zeros((n, numInspectors))
+        self.currComponentType = np.zeros((n, numInspectors), dtype=np.int64)
+        self.currStartIdx = np.zeros((n, numInspectors), dtype=np.int64)
+
+        numWorkstations = len(self.workstationIds)
+        self.workstationDoneTime = np.full((n, numWorkstations), np.inf)
+        self.isBusy = np.zeros((n, numWorkstations), dtype=bool)
+        self.serviceStartTime = np.zeros((n, numWorkstations))
+        self.minutesBusy = np.zeros((n, numWorkstations))
+        self.numProductsCreated = np.zeros((n, numWorkstations), dtype=np.int64)
+
+        numBuffers = len(self.bufferIds)
+        self.bufferSize = np.zeros((n, numBuffers), dtype=np.int64)
+        self.cumulativeOcc = np.zeros((n, numBuffers))
+        self.lastOccChange = np.zeros((n, numBuffers))
+
+        # every inspector starts inspecting at time 0
+        allRows = np.arange(n)
+        for inspector in range(numInspectors):
+            self.startInspection(inspector, allRows)
+
+    def compileTopology(self):
+        """
+        Builds the system once with every stream seeded with its own key, and reads the wiring, buffer capacities,
+        component types and the stream and lambda of every generator into index tables
+        """
+        identitySeeds = {key: key for key in self.streamKeys}
+        buffers = createBuffers(self.maxBufferSize, self.topology)
+        inspectors = createInspectors(buffers, identitySeeds, self.isRoundRobin, serviceRates=self.serviceRates,
+                                      topology=self.topology)
+        workstations = createWorkstations(buffers, identitySeeds, serviceRates=self.serviceRates,
+                                          topology=self.topology)
+        for inspector in inspectors:
+            self.checkGenerators(inspector.getGenerators())
+        self.checkGenerators([workstation.getGenerator() for workstation in workstations])
+        bufferIndex = {id(buffer): i for i, buffer in enumerate(buffers)}
+        streamIndex = {key: i for i, key in enumerate(self.streamKeys)}
+
+        self.bufferIds = [buffer.getId() for buffer in buffers]
+        self.bufferCapacity = np.array([buffer.maxSize for buffer in buffers], dtype=np.int64)
+        self.bufferComponentType = np.array([buffer.getComponentType().value for buffer in buffers], dtype=np.int64)
+
+        self.inspectorIds = [inspector.getId() for inspector in inspectors]
+        self.inspectorBuffers = [np.array([bufferIndex[id(buffer)] for buffer in inspector.getBuffers()])
+                                 for inspector in inspectors]
+        self.inspectorComponentTypes = []
+        self.inspectorStreams = []
+        self.inspectorLambdas = []
+        self.inspectorChooserStream = []
+        for inspector in inspectors:
+            componentTypes = inspector.getComponentsToHandle()
+            generators = inspector.getGenerators()
+            self.inspectorComponentTypes.append([componentType.value for componentType in componentTypes])
+            self.inspectorStreams.append([streamIndex[gen.getXi()] for gen in generators[:len(componentTypes)]])
+            self.inspectorLambdas.append([gen.getLambda() for gen in generators[:len(componentTypes)]])
+            chooser = streamIndex[generators[len(componentTypes)].getXi()] if len(componentTypes) > 1 else None
+            self.inspectorChooserStream.append(chooser)
+
+        self.workstationIds = [workstation.getId() for workstation in workstations]
+        self.workstationBuffers = [[bufferIndex[id(buffer)] for buffer in workstation.getBuffers()]
+                                   for workstation in workstations]
+        self.workstationStreams = [streamIndex[workstation.getGenerator().getXi()] for workstation in workstations]
+        self.workstationLambdas = [workstation.getGenerator().getLambda() for workstation in workstations]
+
+        # the same subscriptions the Simulation's router makes
+        self.inspectorSubscribers, self.workstationSubscribers = getSharedBufferSubscribers(inspectors, workstations)
+
+    @staticmethod
+    def checkGenerators(generators: List[RandomNumberGeneration]):
+        """
+        Checks that the generators sample exponential times, the only ones the vectorized engine generates
+        Args:
+            generators: The generators of an inspector or workstation
+        Raises:
+            ValueError: If one of them serves times another way, such as replaying observations
+        """
+        for generator in generators:
+            if type(generator) is not RandomNumberGeneration:
+                raise ValueError(f"The vectorized engine only samples exponential times, not {type(generator).__name__}")
+
+    def run(self):
+        """
+        Runs every replication until its Simulation Done event
+        """
+        numInspectors = len(self.inspectorIds)
+        numWorkstations = len(self.workstationIds)
+        steadyStateColumn = numInspectors + numWorkstations
+        doneColumn = steadyStateColumn + 1
+        eventTimes = np.empty((self.numReplications, doneColumn + 1))
+        while not self.done.all():
+            eventTimes[:, :numInspectors] = np.where(self.isBlocked, np.inf, self.inspectorDoneTime)
+            eventTimes[:, numInspectors:steadyStateColumn] = self.workstationDoneTime
+            eventTimes[:, steadyStateColumn] = np.where(self.isSteadyState, np.inf, self.warmup)
+            eventTimes[:, doneColumn] = self.time
+            nextEvent = np.argmin(eventTimes, axis=1)
+            active = ~self.done
+            self.clock[active] = eventTimes[active, nextEvent[active]]
+
+            for inspector in range(numInspectors):
+                rows = np.flatnonzero(active & (nextEvent == inspector))
+                if rows.size:
+                    self.handleInspectorDone(inspector, rows)
+            for workstation in range(numWorkstations):
+                rows = np.flatnonzero(active & (nextEvent == numInspectors + workstation))
+                if rows.size:
+                    self.handleWorkstationDone(workstation, rows)
+            rows = np.flatnonzero(active & (nextEvent == steadyStateColumn))
+            if rows.size:
+                self.setSteadyState(rows)
+            rows = np.flatnonzero(active & (nextEvent == doneColumn))
+            if rows.size:
+                for buffer in range(len(self.bufferIds)):
+                    self.updateOcc(rows, buffer, 0)
+                self.done[rows] = True
+
+    def handleInspectorDone(self, inspector: int, rows: np.ndarray):
+        """
+        The inspector tries to deliver its component. If it can, it starts inspecting the next one, otherwise it is
+        blocked. The workstations taking from its buffers then start if they are ready and free
+        Args:
+            inspector: The index of the inspector
+            rows: The replications the event happens in
+        """
+        delivered = self.deliver(inspector, rows)
+        self.startInspection(inspector, rows[delivered])
+        blockedRows = rows[~delivered]
+        self.isBlocked[blockedRows, inspector] = True
+        self.blockedStartTime[blockedRows, inspector] = self.clock[blockedRows]
+
+        startingRows = [rows[self.canStart(workstation, rows)] for workstation in self.inspectorSubscribers[inspector]]
+        for workstation, started in zip(self.inspectorSubscribers[inspector], startingRows):
+            if started.size:
+                self.startWorkstation(workstation, started)
+
+    def handleWorkstationDone(self, workstation: int, rows: np.ndarray):
+        """
+        The workstation finishes its product and starts the next one if its buffers are ready
+        Args:
+            workstation: The index of the workstation
+            rows: The replications the event happens in
+        """
+        self.isBusy[rows, workstation] = False
+        self.workstationDoneTime[rows, workstation] = np.inf
+        steadyRows = rows[self.isSteadyState[rows]]
+        self.numProductsCreated[steadyRows, workstation] += 1
+        self.minutesBusy[steadyRows, workstation] += \
+            self.clock[steadyRows] - self.serviceStartTime[steadyRows, workstation]
+        started = rows[self.canStart(workstation, rows)]
+        if started.size:
+            self.startWorkstation(workstation, started)
+
+    def startInspection(self, inspector: int, rows: np.ndarray):
+        """
+        The inspector picks the next component to clean and schedules when it is done cleaning it
+        Args:
+            inspector: The index of the inspector
+            rows: The replications the inspector starts in
+        """
+        if rows.size == 0:
+            return
+        componentTypes = self.inspectorComponentTypes[inspector]
+        if self.inspectorChooserStream[inspector] is not None:
+            choices = self.lcm(self.inspectorChooserStream[inspector], rows) % np.uint64(len(componentTypes))
+            choices = choices.astype(np.int64)
+        else:
+            choices = np.zeros(rows.size, dtype=np.int64)
+        self.currComponentType[rows, inspector] = np.array(componentTypes)[choices]
+        for choice in range(len(componentTypes)):
+            chosenRows = rows[choices == choice]
+            if chosenRows.size:
+                cleaningTime = self.generateRandomServiceTime(self.inspectorStreams[inspector][choice],
+                                                              self.inspectorLambdas[inspector][choice], chosenRows)
+                self.inspectorDoneTime[chosenRows, inspector] = self.clock[chosenRows] + cleaningTime
+
+    def startWorkstation(self, workstation: int, rows: np.ndarray):
+        """
+        The workstation takes a component from each of its buffers and schedules when the product is done. Blocked
+        inspectors delivering to its buffers then try to deliver again
+        Args:
+            workstation: The index of the workstation
+            rows: The replications the workstation starts in
+        """
+        self.isBusy[rows, workstation] = True
+        serviceTime = self.generateRandomServiceTime(self.workstationStreams[workstation],
+                                                     self.workstationLambdas[workstation], rows)
+        for buffer in self.workstationBuffers[workstation]:
+            self.updateOcc(rows, buffer, -1)
+        self.serviceStartTime[rows, workstation] = self.clock[rows]
+        self.workstationDoneTime[rows, workstation] = self.clock[rows] + serviceTime
+
+        for inspector in self.workstationSubscribers[workstation]:
+            blockedRows = rows[self.isBlocked[rows, inspector]]
+            if blockedRows.size == 0:
+                continue
+            unblocked = blockedRows[self.deliver(inspector, blockedRows)]
+            self.isBlocked[unblocked, inspector] = False
+            steadyRows = unblocked[self.isSteadyState[unblocked]]
+            self.timeBlocked[steadyRows, inspector] += \
+                self.clock[steadyRows] - self.blockedStartTime[steadyRows, inspector]
+            self.startInspection(inspector, unblocked)
+
+    def deliver(self, inspector: int, rows: np.ndarray) -> np.ndarray:
+        """
+        The inspector goes through its buffers, starting from its current start index, and adds its component to the
+        first buffer of the right type with space
+        Args:
+            inspector: The index of the inspector
+            rows: The replications the inspector delivers in
+        Returns:
+            np.ndarray: For each of the rows, True if the component was delivered
+        """
+        buffers = self.inspectorBuffers[inspector]
+        numBuffers = len(buffers)
+        delivered = np.zeros(rows.size, dtype=bool)
+        componentType = self.currComponentType[rows, inspector]
+        startIdx = self.currStartIdx[rows, inspector]
+        for i in range(numBuffers):
+            buffer = buffers[(startIdx + i) % numBuffers]
+            canAdd = ~delivered & (self.bufferComponentType[buffer] == componentType) & \
+                (self.bufferSize[rows, buffer] < self.bufferCapacity[buffer])
+            if canAdd.any():
+                self.updateOcc(rows[canAdd], buffer[canAdd], 1)
+                delivered |= canAdd
+                if self.isRoundRobin:
+                    self.currStartIdx[rows[canAdd], inspector] = (startIdx[canAdd] + i + 1) % numBuffers
+        return delivered
+
+    def canStart(self, workstation: int, rows: np.ndarray) -> np.ndarray:
+        """
+        Checks if the workstation is free and has a component in each of its buffers
+        Args:
+            workstation: The index of the workstation
+            rows: The replications to check
+        Returns:
+            np.ndarray: For each of the rows, True if the workstation can start
+        """
+        ready = ~self.isBusy[rows, workstation]
+        for buffer in self.workstationBuffers[workstation]:
+            ready &= self.bufferSize[rows, buffer] > 0
+        return ready
+
+    def updateOcc(self, rows: np.ndarray, buffers, change: int):
+        """
+        Accumulates the buffer occupancy up to the current time and changes the buffer sizes
+        Args:
+            rows: The replications the buffers change in
+            buffers: The index of the buffer, or an index for each of the rows
+            change: The amount the buffer sizes change by
+        """
+        self.cumulativeOcc[rows, buffers] += \
+            self.bufferSize[rows, buffers] * (self.clock[rows] - self.lastOccChange[rows, buffers])
+        self.lastOccChange[rows, buffers] = self.clock[rows]
+        self.bufferSize[rows, buffers] += change
+
+    def setSteadyState(self, rows: np.ndarray):
+        """
+        Starts the steady state period, discarding the buffer occupancy accumulated during warm-up
+        Args:
+            rows: The replications entering steady state
+        """
+        self.isSteadyState[rows] = True
+        self.cumulativeOcc[rows] = 0.0
+        self.lastOccChange[rows] = self.clock[rows, np.newaxis]
+
+    def lcm(self, stream: int, rows: np.ndarray) -> np.ndarray:
+        """
+        Advances one stream of the given replications
+        Args:
+            stream: The index of the stream
+            rows: The replications to advance the stream of
+        Returns:
+            np.ndarray: The new xi values
+        """
+        xi = (np.uint64(RandomNumberGeneration.a) * self.xis[rows, stream] + np.uint64(RandomNumberGeneration.c)) \
+            % np.uint64(RandomNumberGeneration.m)
+        self.xis[rows, stream] = xi
+        return xi
+
+    def generateRandomServiceTime(self, stream: int, lmbda: float, rows: np.ndarray) -> np.ndarray:
+        """
+        Generates the next exponential service time from one stream of the given replications
+        Args:
+            stream: The index of the stream
+            lmbda: The lambda value of the exponential distribution
+            rows: The replications to generate service times for
+        Returns:
+            np.ndarray: The service times
+        """
+        ri = self.lcm(stream, rows) / (RandomNumberGeneration.m + 1)
+        return ((-1)/lmbda) * np.log(ri)
+
+    def getXis(self, replication: int) -> Dict[int, int]:
+        """
+        Get the current xi values of each random number stream of a replication
+        Args:
+            replication: The index of the replication
+        Returns:
+            Dict[int, int]: The xi values keyed the same way as the seeds
+        """
+        return {key: int(self.xis[replication, stream]) for stream, key in enumerate(self.streamKeys)}
+
+    def getStatistics(self) -> List[Replication]:
+        """
+        Store the statistics of every replication into Replication objects
+        Returns:
+            List[Replication]: The Replication of each replication, in the order their seeds were given
+        """
+        replications = []
+        for r in range(self.numReplications):
+            replication = Replication()
+            for w, workstationId in enumerate(self.workstationIds):
+                replication.addWorkstationBusyProbability(workstationId, self.minutesBusy[r, w] / self.steadyStateTime)
+            for i, inspectorId in enumerate(self.inspectorIds):
+                replication.addInspectorBlockedProbability(inspectorId, self.timeBlocked[r, i] / self.steadyStateTime)
+            for b, bufferId in enumerate(self.bufferIds):
+                replication.addAvgBufferOccupancy(bufferId, self.cumulativeOcc[r, b] / self.steadyStateTime)
+            replication.setThroughput(int(self.numProductsCreated[r].sum()) / self.steadyStateTime)
+            replications.append(replication)
+        return replications
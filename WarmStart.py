@@ -0,0 +1,84 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import List
+from RandomNumberGeneration import RandomNumberGeneration
+from Replication import Replication
+from Simulation import Simulation
+import argparse
+import multiprocessing
+
+# the warmed up simulation the worker processes create their scenarios from. With the fork start method the workers
+# inherit it from the parent copy-on-write, otherwise it is sent to each worker once as a snapshot
+warmSnapshot = None
+
+
+def setWarmSnapshot(snapshot: bytes):
+    """
+    Sets the snapshot the scenarios of this process are created from. This is the initializer of the worker processes
+    Args:
+        snapshot: The snapshot, or None if the process already inherited it
+    """
+    global warmSnapshot
+    if snapshot is not None:
+        warmSnapshot = snapshot
+
+
+def runScenario(scenario: dict) -> Replication:
+    """
+    Creates one scenario from the warmed up snapshot and runs it to the end. This is a module level function so it
+    can be sent to worker processes
+    Args:
+        scenario: The changes the scenario makes, as keyword arguments of Simulation.fromSnapshot
+    Returns:
+        Replication: The statistics of the scenario
+    """
+    sim = Simulation.fromSnapshot(warmSnapshot, **scenario)
+    sim.run()
+    return sim.getStatistics()
+
+
+def runScenarios(sim: Simulation, scenarios: List[dict], numWorkers: int = None) -> List[Replication]:
+    """
+    Runs the warm-up of a simulation once and then runs every scenario from the warmed up state, on a pool of worker
+    processes. Where the operating system supports it the workers are forked, so they share the warmed up state with
+    the parent instead of each receiving a copy
+    Args:
+        sim: The simulation to warm up, which must not have started yet
+        scenarios: The changes each scenario makes, as keyword arguments of Simulation.fromSnapshot, e.g.
+                   {"isRoundRobin": False, "seeds": RandomNumberGeneration.getReplicationSeeds(3)}
+        numWorkers: The number of processes to run on, all cores if None. If 1, the scenarios run in this process
+    Returns:
+        List[Replication]: The statistics of each scenario, in the order of the scenarios
+    """
+    global warmSnapshot
+    sim.runToSteadyState()
+    warmSnapshot = sim.snapshot()
+    if numWorkers == 1:
+        return [runScenario(scenario) for scenario in scenarios]
+    if "fork" in multiprocessing.get_all_start_methods():
+        context, initialSnapshot = multiprocessing.get_context("fork"), None
+    else:
+        context, initialSnapshot = multiprocessing.get_context(), warmSnapshot
+    with ProcessPoolExecutor(max_workers=numWorkers, mp_context=context, initializer=setWarmSnapshot,
+                             initargs=(initialSnapshot,)) as executor:
+        return list(executor.map(runScenario, scenarios))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Warm up the simulation once and run both policies from the warmed "
+                                                 "up state, each with several independent continuations")
+    parser.add_argument("--continuations", type=int, default=5,
+                        help="number of independent continuations of each policy, each with the streams of another "
+                             "replication")
+    parser.add_argument("--workers", type=int, default=None, help="number of processes, all cores by default")
+    args = parser.parse_args()
+    sim = Simulation(RandomNumberGeneration.getReplicationSeeds(0), True)
+    scenarios = [{"isRoundRobin": isRoundRobin, "seeds": RandomNumberGeneration.getReplicationSeeds(x + 1)}
+                 for isRoundRobin in (True, False) for x in range(args.continuations)]
+    for x, (scenario, replication) in enumerate(zip(scenarios, runScenarios(sim, scenarios, args.workers))):
+        policy = "Round robin" if scenario["isRoundRobin"] else "Priority"
+        print(f"\n{policy} policy, continuation {x % args.continuations + 1}")
+        replication.printStats()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+from typing import Dict, List, Tuple
+from Simulation import Simulation
+import numpy as np
+
+
+def mser(series, batchSize: int = 5) -> Tuple[int, np.ndarray]:
+    """
+    Finds the truncation point of a series with the MSER-m heuristic (MSER-5 by default). The series is averaged in
+    batches of batchSize observations, and the number of batches d to delete is the one minimising the marginal
+    standard error sum((Z_j - mean(Z_d+1..n))^2) / (n - d)^2, searched over the first half of the batches
+    Args:
+        series: The observations in time order
+        batchSize: The number of observations averaged into each batch
+    Returns:
+        Tuple[int, np.ndarray]: The number of observations to delete, and the MSER statistic for each number of
+        deleted batches
+    """
+    series = np.asarray(series, dtype=float)
+    numBatches = len(series) // batchSize
+    if numBatches < 2:
+        return 0, np.zeros(1)
+    batches = series[:numBatches * batchSize].reshape(numBatches, batchSize).mean(axis=1)
+    # sums over the batches kept after deleting d batches, for every d at once
+    keptSums = np.cumsum(batches[::-1])[::-1]
+    keptSquares = np.cumsum((batches ** 2)[::-1])[::-1]
+    kept = np.arange(numBatches, 0, -1)
+    candidates = numBatches // 2 + 1
+    keptSums, keptSquares, kept = keptSums[:candidates], keptSquares[:candidates], kept[:candidates]
+    statistics = (keptSquares - keptSums ** 2 / kept) / kept ** 2
+    return int(np.argmin(statistics)) * batchSize, statistics
+
+
+def welchMovingAverages(seriesPerReplication, window: int) -> np.ndarray:
+    """
+    Computes the data for Welch's plot: the series averaged across replications and smoothed with a moving average of
+    the given window, using a shorter symmetric window for the first observations
+    Args:
+        seriesPerReplication: One series per replication, all of the same length
+        window: The number of observations on each side of the moving average
+    Returns:
+        np.ndarray: The smoothed averages, window fewer than the length of the series
+    """
+    averages = np.asarray(seriesPerReplication, dtype=float).mean(axis=0)
+    numSmoothed = len(averages) - window
+    cumulative = np.concatenate(([0.0], np.cumsum(averages)))
+    smoothed = np.empty(numSmoothed)
+    for i in range(numSmoothed):
+        halfWidth = min(i, window)
+        smoothed[i] = (cumulative[i + halfWidth + 1] - cumulative[i - halfWidth]) / (2 * halfWidth + 1)
+    return smoothed
+
+
+class WarmupDetector:
+    """
+    Chooses the warm-up period from pilot runs. Each pilot run starts collecting statistics at time 0 and records
+    the throughput and the total buffer occupancy of every interval, and the truncation point is the latest one MSER-5
+    finds for either series, averaged across the pilot runs
+    """
+
+    def __init__(self, isRoundRobin: bool, pilotTime: float = 6600, interval: float = 10, serviceRates: dict = None,
+                 topology: dict = None):
+        """
+        Args:
+            isRoundRobin: If True, the inspectors use the round robin policy. Otherwise the original priority policy
+            pilotTime: The length of each pilot run, in minutes
+            interval: The length of each observation interval, in minutes
+            serviceRates: Rates that replace the ones in SERVICE_RATES, keyed the same way
+            topology: The factory to simulate, the factory of the project if None
+        """
+        self.isRoundRobin = isRoundRobin
+        self.pilotTime = pilotTime
+        self.interval = interval
+        self.serviceRates = serviceRates
+        self.topology = topology
+        self.series: Dict[str, List[List[float]]] = {'Throughput': [], 'Buffer Occupancy': []}
+
+    def runPilots(self, replicationSeeds: List[Dict[int, int]]):
+        """
+        Runs a pilot run for each set of seeds and records its series
+        Args:
+            replicationSeeds: The seeds of each pilot run
+        """
+        for seeds in replicationSeeds:
+            sim = Simulation(seeds, self.isRoundRobin, time=self.pilotTime, warmup=0, serviceRates=self.serviceRates,
+                             topology=self.topology)
+            intervals = sim.runWithBatches(self.interval)
+            self.series['Throughput'].append([interval.getThroughput() for interval in intervals])
+            self.series['Buffer Occupancy'].append([sum(interval.getAvgBufferOccupancy().values())
+                                                    for interval in intervals])
+
+    def detect(self, batchSize: int = 5) -> float:
+        """
+        Applies MSER to each series averaged across the pilot runs
+        Args:
+            batchSize: The number of intervals averaged into each MSER batch
+        Returns:
+            float: The warm-up period, in minutes
+        """
+        if not self.series['Throughput']:
+            raise ValueError("Run the pilot runs before detecting the warm-up period")
+        truncation = 0
+        for seriesPerReplication in self.series.values():
+            deleted, _ = mser(np.mean(seriesPerReplication, axis=0), batchSize)
+            truncation = max(truncation, deleted)
+        return truncation * self.interval
+
+    def getWelchData(self, window: int) -> Dict[str, np.ndarray]:
+        """
+        Gets the data for Welch's plot of each series
+        Args:
+            window: The number of intervals on each side of the moving average
+        Returns:
+            Dict[str, np.ndarray]: The smoothed averages of each series
+        """
+        return {name: welchMovingAverages(seriesPerReplication, window)
+                for name, seriesPerReplication in self.series.items()}
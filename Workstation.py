@@ -5,18 +5,21 @@ from Event import Event
 from EventType import EventType
 from InspectorEvent import InspectorEvent
 from RandomNumberGeneration import RandomNumberGeneration
+from TallyStatistic import TallyStatistic
+from TimeWeightedStatistic import TimeWeightedStatistic
 from WorkstationEvent import WorkstationEvent
 import numpy as np
 
 class WorkStation:
     
-    def __init__(self, id:int, numBuffers:int, randomNumberGenerator:RandomNumberGeneration):
+    def __init__(self, id:int, numBuffers:int, randomNumberGenerator:RandomNumberGeneration, reservoirSize:int = 0):
         """Workstation constructor
 
         Args:
             id (int): The workstation's id. In our simulation this will either be 1, 2 or 3
             numBuffers (int): The number of buffers assigned to this inspector
             randomNumberGenerator (RandomNumberGeneration): The generator to use to generate service times
+            reservoirSize (int): The number of consumed components to keep a uniform sample of, 0 to keep none
         """
 
         self.id = id
@@ -24,10 +27,13 @@ class WorkStation:
         self.numProductsCreated = 0
         self.isBusy = False
         self.minutesBusy = 0.0
+        self.serviceStartTime = 0.0
         self.randomNumberGenerator = randomNumberGenerator
         self.currComponents = [None] * numBuffers
-        self.componentsBuilt = []
+        self.timeInSystem = TallyStatistic(reservoirSize, id)
+        self.workInProcess = None
         self.isSteadyState = False
+        self.recycleComponents = False
 
     def getBuffers(self):
         """Get the list of buffers this workstation has
@@ -101,6 +107,28 @@ class WorkStation:
 
         return self.minutesBusy
 
+    def getMinutesBusyUntil(self, currentTime: float) -> float:
+        """
+        Get the minutes busy including the service in progress up to the current time. A service is added to the
+        minutes busy whole when it finishes, so this is what the minutes busy will have grown by at currentTime
+        Args:
+            currentTime: The current time
+        Returns:
+            float: Minutes the workstation has been busy in steady state, up to the current time
+        """
+        if self.isBusy and self.isSteadyState:
+            return self.minutesBusy + currentTime - self.serviceStartTime
+        return self.minutesBusy
+
+    def getTimeInSystem(self) -> TallyStatistic:
+        """
+        Statistics of the time the components this workstation consumed spent in the system
+
+        Returns:
+            TallyStatistic: The time in system statistics, with a sample of the components if a reservoir is kept
+        """
+        return self.timeInSystem
+
     def getGenerator(self) -> RandomNumberGeneration:
         """
         Get the random number generator associated to this workstation
@@ -109,6 +137,24 @@ class WorkStation:
         """
         return self.randomNumberGenerator
 
+    def setWorkInProcess(self, workInProcess:TimeWeightedStatistic):
+        """
+        Set the statistic counting the components in the whole system, which this workstation updates when it starts
+        and finishes a product
+        Args:
+            workInProcess: The shared work in process statistic
+        """
+        self.workInProcess = workInProcess
+
+    def setRecycleComponents(self, recycleComponents: bool):
+        """
+        Set if the components this workstation consumes are released to be reused by the inspectors. They must not be
+        kept anywhere else, such as in the time in system sample
+        Args:
+            recycleComponents: True to release every component once its time in system is recorded
+        """
+        self.recycleComponents = recycleComponents
+
     def setSteadyState(self, steadyState:bool):
         """
         Set if we are in steady state or not
@@ -136,7 +182,7 @@ class WorkStation:
 
         #Create the workstation started event only if the buffers are ready and if the workstation is free
         if self.__buffersAreReady() and not self.getIsBusy():
-            startEvent = WorkstationEvent(currentTime, currentTime, EventType.WS, self.getId())
+            startEvent = WorkstationEvent.create(currentTime, currentTime, EventType.WS, self.getId())
         
         return startEvent
 
@@ -162,15 +208,18 @@ class WorkStation:
         randomServiceTime = self.__generateRandomServiceTime()
 
         currentTime = event.getStartTime()
+        self.serviceStartTime = currentTime
 
         # Remove a component from each buffer in order to build the product
         for i in range(len(self.buffers)):
             if self.buffers[i].isEmpty():
                 raise ValueError("Buffer is empty it should not be empty")
             else:
-                self.currComponents[i] = self.buffers[i].removeComponent()
+                self.currComponents[i] = self.buffers[i].removeComponent(currentTime)
                 # print(f"Workstation {self.id} removed component {self.buffers[i].getComponentType()} from Buffer {self.buffers[i].getId()} at {currentTime}")
-        workStationDone = WorkstationEvent(currentTime, currentTime + randomServiceTime, EventType.WD, self.getId())
+        if self.workInProcess is not None:
+            self.workInProcess.add(currentTime, len(self.buffers))
+        workStationDone = WorkstationEvent.create(currentTime, currentTime + randomServiceTime, EventType.WD, self.getId())
         return workStationDone
 
     def handleWorkstationDone(self, event: WorkstationEvent) -> Event:
@@ -193,10 +242,14 @@ class WorkStation:
             self.numProductsCreated += 1
         
         currentTime = event.getStartTime()
-        
+        if self.workInProcess is not None:
+            self.workInProcess.add(currentTime, -len(self.buffers))
+
         for component in self.currComponents:
             component.setDepartureTime(currentTime)
-            self.componentsBuilt.append(component)
+            self.timeInSystem.record(currentTime - component.getArrivalTime(), component)
+            if self.recycleComponents:
+                component.release()
 
         #Calculate how long it took to build the product
         prouductionTime = currentTime - event.getCreatedTime()
@@ -210,7 +263,7 @@ class WorkStation:
 
         #Create the workstation started event only if the buffers are ready and if the workstation is free
         if self.__buffersAreReady() and not self.getIsBusy():
-            startEvent = WorkstationEvent(currentTime, currentTime, EventType.WS, self.getId())
+            startEvent = WorkstationEvent.create(currentTime, currentTime, EventType.WS, self.getId())
         
         return startEvent
         
@@ -3,6 +3,10 @@ from EventType import EventType
 
 
 class WorkstationEvent(Event):
+    __slots__ = ("workstationId",)
+
+    freeList = []
+
     def __init__(self, createdTime: float, startTime: float, eventType: EventType, workstationId: int):
         """Initialize an workstation event
 
@@ -14,6 +18,26 @@ class WorkstationEvent(Event):
         """
         Event.__init__(self, createdTime, startTime, eventType)
         self.workstationId = workstationId
+
+    @classmethod
+    def create(cls, createdTime: float, startTime: float, eventType: EventType, workstationId: int):
+        """Get an workstation event, reusing a released one if there is one
+
+        Args:
+            createdTime (float): The time the event was created at
+            startTime (float): The time where this event should start at
+            eventType (EventType): The type of event
+            workstationId (int): The id of the workstation
+
+        Returns:
+            WorkstationEvent : The event
+        """
+        if cls.freeList:
+            event = cls.freeList.pop()
+            Event.__init__(event, createdTime, startTime, eventType)
+            event.workstationId = workstationId
+            return event
+        return cls(createdTime, startTime, eventType, workstationId)
     
     def getWorkstationId(self) -> int:
         """Get the id of the workstation that created this event
@@ -22,3 +46,11 @@ class WorkstationEvent(Event):
             int : Id of the workstaiton
         """
         return self.workstationId
+
+    def getEntityId(self) -> int:
+        """Get the id of the workstation that created this event
+
+        Returns:
+            int : Id of the workstation
+        """
+        return self.workstationId